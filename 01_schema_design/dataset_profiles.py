@@ -0,0 +1,208 @@
+import os
+import sqlite3
+import uuid
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from faker import Faker
+from generators import (
+    generate_film_work_data,
+    generate_genre_data,
+    generate_genre_film_work_data,
+    generate_person_data,
+    generate_person_film_work_data,
+)
+from samplers import IdPool, RelatedIdSampler
+
+"""
+Профили синтетических данных и воспроизводимая генерация записей по ним.
+Записи таблицы генерируются частями по SHARD_SIZE записей, у каждой части свой Faker с seed,
+вычисленным из общего seed, таблицы и номера части. Поэтому при одном профиле и seed данные совпадают
+побайтно независимо от способа записи (insert, copy, выгрузка в SQLite) и количества процессов.
+Связи выбираются из id, упорядоченных по значению, и тоже не зависят от порядка записей в базе
+"""
+
+# количество записей в части, изменение размера меняет сгенерированные данные
+SHARD_SIZE = 10000
+
+
+@dataclass(frozen=True)
+class DatasetProfile:
+    """
+    Количество записей таблиц, наибольшее количество персон и жанров у фильма
+    и распределение выбора связанных записей (см. samplers.RelatedIdSampler)
+    """
+
+    persons: int
+    genres: int
+    film_works: int
+    persons_per_film: int = 1
+    genres_per_film: int = 1
+    links_distribution: str = 'uniform'
+    zipf_exponent: float = 1.1
+
+
+PROFILES = {
+    'small': DatasetProfile(persons=1000, genres=15, film_works=5000, persons_per_film=3, genres_per_film=1),
+    'medium': DatasetProfile(
+        persons=20000, genres=15, film_works=100000, persons_per_film=5, genres_per_film=2, links_distribution='zipf'
+    ),
+    'production': DatasetProfile(
+        persons=100000, genres=15, film_works=1100000, persons_per_film=8, genres_per_film=3, links_distribution='zipf'
+    ),
+}
+
+# генераторы и поля таблиц с количеством записей из профиля
+TABLES = {
+    'person': {
+        'function': generate_person_data,
+        'fields': ['id', 'full_name'],
+        'count': lambda profile: profile.persons,
+    },
+    'genre': {
+        'function': generate_genre_data,
+        'fields': ['id', 'name', 'description'],
+        'count': lambda profile: profile.genres,
+    },
+    'film_work': {
+        'function': generate_film_work_data,
+        'fields': ['id', 'title', 'description', 'creation_date', 'rating', 'type'],
+        'count': lambda profile: profile.film_works,
+    },
+}
+
+# генераторы и поля промежуточных таблиц, связанные таблицы и наибольшее количество связей у фильма
+LINK_TABLES = {
+    'person_film_work': {
+        'function': generate_person_film_work_data,
+        'fields': ['id', 'film_work_id', 'person_id', 'role'],
+        'root_table': 'film_work',
+        'related_table': 'person',
+        'max_links': lambda profile: profile.persons_per_film,
+    },
+    'genre_film_work': {
+        'function': generate_genre_film_work_data,
+        'fields': ['id', 'film_work_id', 'genre_id'],
+        'root_table': 'film_work',
+        'related_table': 'genre',
+        'max_links': lambda profile: profile.genres_per_film,
+    },
+}
+
+# схема базы SQLite, которую переносит 03_sqlite_to_postgres
+SQLITE_SCHEMA = (
+    'CREATE TABLE person (id text primary key, full_name text not null, created_at timestamp, updated_at timestamp)',
+    'CREATE TABLE genre (id text primary key, name text not null, description text, '
+    'created_at timestamp, updated_at timestamp)',
+    'CREATE TABLE film_work (id text primary key, title text not null, description text, creation_date date, '
+    'file_path text, rating float, type text not null, created_at timestamp, updated_at timestamp)',
+    'CREATE TABLE genre_film_work (id text primary key, film_work_id text not null, genre_id text not null, '
+    'created_at timestamp)',
+    'CREATE TABLE person_film_work (id text primary key, film_work_id text not null, person_id text not null, '
+    'role text not null, created_at timestamp)',
+)
+
+
+def get_shard_fake(seed: int, table: str, shard: int) -> Faker:
+    fake = Faker()
+    fake.seed_instance(f'{seed}:{table}:{shard}')
+    return fake
+
+
+def split_shards(count: int) -> List[Tuple[int, int, int]]:
+    """
+    Разбиение записей на части по SHARD_SIZE: номер части, первая запись и количество записей
+    """
+
+    return [(shard, start, min(SHARD_SIZE, count - start)) for shard, start in enumerate(range(0, count, SHARD_SIZE))]
+
+
+def generate_shard(table: str, count: int, seed: int, shard: int) -> Iterator[tuple]:
+    yield from TABLES[table]['function'](fake=get_shard_fake(seed=seed, table=table, shard=shard), count=count)
+
+
+def generate_links_shard(
+    profile: DatasetProfile, table: str, root_obj_ids: IdPool, related_obj_ids: IdPool, seed: int, shard: int
+) -> Iterator[tuple]:
+    """
+    Связи для части записей основной таблицы: root_obj_ids - id этой части, related_obj_ids - все id связанной таблицы
+    """
+
+    fake = get_shard_fake(seed=seed, table=table, shard=shard)
+    sampler = RelatedIdSampler(
+        pool=related_obj_ids,
+        rnd=fake.random,
+        max_links=LINK_TABLES[table]['max_links'](profile),
+        distribution=profile.links_distribution,
+        zipf_exponent=profile.zipf_exponent,
+    )
+    function = LINK_TABLES[table]['function']
+    for root_obj_id in root_obj_ids:
+        for related_obj_id in sampler.sample():
+            yield function(fake, root_obj_id, related_obj_id)
+
+
+def get_sorted_pool(ids: Iterable) -> IdPool:
+    """
+    Пул id в порядке значений, как их возвращает Postgres при ORDER BY id
+    """
+
+    return IdPool(sorted(ids, key=lambda obj_id: obj_id.bytes))
+
+
+def format_sqlite_value(value):
+    """
+    Приведение значения к формату SQLite 03_sqlite_to_postgres: id - строки, дата создания - строка даты и времени
+    """
+
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, date):
+        return f'{value.isoformat()} 00:00:00'
+    return value
+
+
+def export_to_sqlite(profile: DatasetProfile, seed: int, path: str) -> Dict[str, int]:
+    """
+    Выгрузка данных профиля в новую базу SQLite по пути path, возвращает количество записей по таблицам
+    """
+
+    if os.path.exists(path):
+        os.remove(path)
+    counts = dict()
+    pools = dict()
+    with closing(sqlite3.connect(path)) as connection:
+        for statement in SQLITE_SCHEMA:
+            connection.execute(statement)
+
+        def insert(table: str, fields: List[str], rows: Iterable[tuple]) -> int:
+            query = f'INSERT INTO {table} ({", ".join(fields)}) VALUES ({", ".join(["?"] * len(fields))})'
+            cursor = connection.executemany(query, (tuple(format_sqlite_value(value) for value in row) for row in rows))
+            return cursor.rowcount
+
+        for table, parameters in TABLES.items():
+            ids = list()
+            counts[table] = 0
+            for shard, _, count in split_shards(parameters['count'](profile)):
+                rows = list(generate_shard(table=table, count=count, seed=seed, shard=shard))
+                ids.extend(row[0] for row in rows)
+                counts[table] += insert(table=table, fields=parameters['fields'], rows=rows)
+            pools[table] = get_sorted_pool(ids)
+
+        for table, parameters in LINK_TABLES.items():
+            root_obj_ids = pools[parameters['root_table']]
+            counts[table] = 0
+            for shard, start, count in split_shards(len(root_obj_ids)):
+                links = generate_links_shard(
+                    profile=profile,
+                    table=table,
+                    root_obj_ids=IdPool.from_bytes(root_obj_ids.slice(start, start + count)),
+                    related_obj_ids=pools[parameters['related_table']],
+                    seed=seed,
+                    shard=shard,
+                )
+                counts[table] += insert(table=table, fields=parameters['fields'], rows=links)
+        connection.commit()
+    return counts
@@ -1,147 +1,259 @@
+import argparse
 import logging
 import random
-import uuid
-from datetime import date
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Optional
 
-from faker import Faker
+from dataset_profiles import (
+    LINK_TABLES,
+    PROFILES,
+    TABLES,
+    DatasetProfile,
+    export_to_sqlite,
+    generate_links_shard,
+    generate_shard,
+    split_shards,
+)
+from indexes import clear_deferred, drop_deferrable_objects, rebuild_objects
+from samplers import IdPool
 from services import PostgresService
 from settings import settings
 
 """
-Скрипт для заполнения базы данными
+Скрипт для заполнения базы данными.
+Данные генерируются по профилю (см. dataset_profiles) и при одном seed совпадают при любом способе записи
 """
 
 logger = logging.getLogger()
-fake = Faker()
-PERSON_FILM_WORK_ROLES = ['actor', 'producer', 'director']
 
 
-def generate_person_data():
-    for _ in range(settings.CONTENT_PERSONS_COUNT):
-        yield str(uuid.uuid4()), fake.name()
-
-
-def generate_genre_data():
-    for _ in range(settings.CONTENT_GENRES_COUNT):
-        yield str(uuid.uuid4()), fake.word(), fake.texts()
-
-
-def generate_film_work_data():
-    for _ in range(settings.CONTENT_FILM_WORK_COUNT):
-        yield (
-            str(uuid.uuid4()),
-            fake.catch_phrase(),
-            fake.texts(),
-            fake.date_between_dates(date(year=1900, month=1, day=1)),
-            fake.pyfloat(min_value=0, max_value=100, right_digits=1),
-            fake.random_element(elements=('movie', 'tv_show')),
-        )
-
-
-def generate_person_film_work_data(film_work_id: uuid.UUID, person_id: uuid.UUID):
-    yield str(uuid.uuid4()), film_work_id, person_id, random.choice(PERSON_FILM_WORK_ROLES)
+def get_profile(name: Optional[str]) -> DatasetProfile:
+    """
+    Профиль по имени, без имени - профиль из настроек CONTENT_*
+    """
 
+    if name:
+        return PROFILES[name]
+    return DatasetProfile(
+        persons=settings.CONTENT_PERSONS_COUNT,
+        genres=settings.CONTENT_GENRES_COUNT,
+        film_works=settings.CONTENT_FILM_WORK_COUNT,
+        persons_per_film=settings.CONTENT_PERSONS_PER_FILM,
+        genres_per_film=settings.CONTENT_GENRES_PER_FILM,
+        links_distribution=settings.CONTENT_LINKS_DISTRIBUTION,
+        zipf_exponent=settings.CONTENT_ZIPF_EXPONENT,
+    )
 
-def generate_genre_film_work_data(film_work_id: uuid.UUID, genre_id: uuid.UUID):
-    yield str(uuid.uuid4()), film_work_id, genre_id
 
+def load_sorted_pool(pg_service: PostgresService, table: str) -> IdPool:
+    return IdPool.from_batches(
+        pg_service.get_batches(query=f'SELECT id FROM {table} ORDER BY id', size=settings.CONTENT_PAGE_SIZE_COUNT)
+    )
 
-def filling_table_with_generated_data(pg_service: PostgresService, table: str):
-    filling_parameters = {
-        'person': {
-            'query': 'INSERT INTO person (id, full_name) VALUES (%s, %s) ON CONFLICT DO NOTHING',
-            'function': generate_person_data,
-        },
-        'genre': {
-            'query': 'INSERT INTO genre (id, name, description) VALUES (%s, %s, %s) ON CONFLICT DO NOTHING',
-            'function': generate_genre_data,
-        },
-        'film_work': {
-            'query': 'INSERT INTO film_work (id, title, description, creation_date, rating, type) '
-            'VALUES (%s, %s, %s, %s, %s, %s) ON CONFLICT DO NOTHING',
-            'function': generate_film_work_data,
-        },
-    }
 
-    logger.info(f'Запись данных в таблицу {table} начата')
+def save_in_pages(pg_service: PostgresService, table: str, fields: list, rows: Iterable[tuple]):
+    query = (
+        f'INSERT INTO {table} ({", ".join(fields)}) VALUES ({", ".join(["%s"] * len(fields))}) ON CONFLICT DO NOTHING'
+    )
     data = list()
-    for row in filling_parameters[table]['function']():
+    for row in rows:
         data.append(row)
         if (saved_rows := len(data)) == settings.CONTENT_PAGE_SIZE_COUNT:
-            pg_service.save_all_data(data=data, query=filling_parameters[table]['query'])
+            pg_service.save_all_data(data=data, query=query)
             logger.debug(f'В таблицу {table} записано {saved_rows} записей')
             data = list()
     else:
         if saved_rows := len(data):
-            pg_service.save_all_data(data=data, query=filling_parameters[table]['query'])
+            pg_service.save_all_data(data=data, query=query)
             logger.debug(f'В таблицу {table} записано {saved_rows} записей')
+
+
+def filling_table_with_generated_data(pg_service: PostgresService, profile: DatasetProfile, seed: int, table: str):
+    logger.info(f'Запись данных в таблицу {table} начата')
+    for shard, _, count in split_shards(TABLES[table]['count'](profile)):
+        save_in_pages(
+            pg_service=pg_service,
+            table=table,
+            fields=TABLES[table]['fields'],
+            rows=generate_shard(table=table, count=count, seed=seed, shard=shard),
+        )
     logger.info(f'Запись данных в таблицу {table} завершена')
 
 
 def filling_intermediate_table_with_generated_data(
-    pg_service: PostgresService, intermediate_table: str, related_table: str, root_table: str = 'film_work'
+    pg_service: PostgresService, profile: DatasetProfile, seed: int, intermediate_table: str
 ):
-    filling_parameters = {
-        'person_film_work': {
-            'query': 'INSERT INTO person_film_work (id, film_work_id, person_id, role) '
-            'VALUES (%s, %s, %s, %s) ON CONFLICT DO NOTHING',
-            'function': generate_person_film_work_data,
-        },
-        'genre_film_work': {
-            'query': 'INSERT INTO genre_film_work (id, film_work_id, genre_id) '
-            'VALUES (%s, %s, %s) ON CONFLICT DO NOTHING',
-            'function': generate_genre_film_work_data,
-        },
-    }
-
-    get_root_obj_id_query = f'SELECT id FROM {root_table}'
-    get_related_obj_id_query = f'SELECT id FROM {related_table} ORDER BY RANDOM() LIMIT 1'
+    # id основной и связанной таблиц загружаются один раз, связи выбираются локально
+    parameters = LINK_TABLES[intermediate_table]
+    root_obj_ids = load_sorted_pool(pg_service=pg_service, table=parameters['root_table'])
+    related_obj_ids = load_sorted_pool(pg_service=pg_service, table=parameters['related_table'])
 
     logger.info(f'Запись данных в таблицу {intermediate_table} начата')
-    data = list()
-    related_obj_id = None
-    for root_obj_id in pg_service.get_data(query=get_root_obj_id_query):
-        if not related_obj_id:
-            related_obj_id = pg_service.get_row(query=get_related_obj_id_query)
-        person_film_work = next(filling_parameters[intermediate_table]['function'](root_obj_id, related_obj_id))
-        data.append(person_film_work)
-
-        if (saved_rows := len(data)) == settings.CONTENT_PAGE_SIZE_COUNT:
-            pg_service.save_all_data(data=data, query=filling_parameters[intermediate_table]['query'])
-            logger.debug(f'В таблицу {intermediate_table} записано {saved_rows} записей')
-            data = list()
-            related_obj_id = None
-    else:
-        if saved_rows := len(data):
-            pg_service.save_all_data(data=data, query=filling_parameters[intermediate_table]['query'])
-            logger.debug(f'В таблицу {intermediate_table} записано {saved_rows} записей')
+    for shard, start, count in split_shards(len(root_obj_ids)):
+        links = generate_links_shard(
+            profile=profile,
+            table=intermediate_table,
+            root_obj_ids=IdPool.from_bytes(root_obj_ids.slice(start, start + count)),
+            related_obj_ids=related_obj_ids,
+            seed=seed,
+            shard=shard,
+        )
+        save_in_pages(pg_service=pg_service, table=intermediate_table, fields=parameters['fields'], rows=links)
     logger.info(f'Запись данных в таблицу {intermediate_table} завершена')
 
 
-def generate_data():
-    simple_tables = (
-        'person',
-        'genre',
-        'film_work',
+def copy_generated_shard(table: str, count: int, seed: int, shard: int) -> int:
+    """
+    Генерация части записей таблицы в процессе пула и запись их одной командой COPY на отдельном соединении
+    """
+
+    rows = generate_shard(table=table, count=count, seed=seed, shard=shard)
+    with PostgresService(dsn=settings.DATABASE_URL) as postgres:
+        return postgres.copy_data(data=rows, table=table, fields=TABLES[table]['fields'])
+
+
+def copy_generated_links_shard(
+    profile: DatasetProfile, intermediate_table: str, root_obj_ids: bytes, related_obj_ids: bytes, seed: int, shard: int
+) -> int:
+    """
+    Генерация связей для части записей основной таблицы в процессе пула и запись их одной командой COPY
+    """
+
+    links = generate_links_shard(
+        profile=profile,
+        table=intermediate_table,
+        root_obj_ids=IdPool.from_bytes(root_obj_ids),
+        related_obj_ids=IdPool.from_bytes(related_obj_ids),
+        seed=seed,
+        shard=shard,
+    )
+    with PostgresService(dsn=settings.DATABASE_URL) as postgres:
+        return postgres.copy_data(
+            data=links, table=intermediate_table, fields=LINK_TABLES[intermediate_table]['fields']
+        )
+
+
+def log_copy_result(table: str, rows: int, started: float):
+    seconds = time.perf_counter() - started
+    logger.info(
+        f'Запись данных в таблицу {table} завершена: {rows} записей за {seconds:.2f} с, {rows / seconds:.0f} записей/с'
+    )
+
+
+def copy_table_with_generated_data(executor: ProcessPoolExecutor, profile: DatasetProfile, seed: int, table: str):
+    logger.info(f'Запись данных в таблицу {table} начата')
+    started = time.perf_counter()
+    shards = split_shards(TABLES[table]['count'](profile))
+    rows = sum(
+        executor.map(
+            copy_generated_shard,
+            [table] * len(shards),
+            [count for _, _, count in shards],
+            [seed] * len(shards),
+            [shard for shard, _, _ in shards],
+        )
     )
+    log_copy_result(table=table, rows=rows, started=started)
 
-    intermediate_tables = {
-        'person_film_work': 'person',
-        'genre_film_work': 'genre',
-    }
 
+def copy_intermediate_table_with_generated_data(
+    executor: ProcessPoolExecutor, profile: DatasetProfile, seed: int, intermediate_table: str
+):
+    parameters = LINK_TABLES[intermediate_table]
     with PostgresService(dsn=settings.DATABASE_URL) as postgres:
+        root_obj_ids = load_sorted_pool(pg_service=postgres, table=parameters['root_table'])
+        related_obj_ids = load_sorted_pool(pg_service=postgres, table=parameters['related_table'])
 
-        for table in simple_tables:
-            filling_table_with_generated_data(pg_service=postgres, table=table)
+    logger.info(f'Запись данных в таблицу {intermediate_table} начата')
+    started = time.perf_counter()
+    shards = split_shards(len(root_obj_ids))
+    rows = sum(
+        executor.map(
+            copy_generated_links_shard,
+            [profile] * len(shards),
+            [intermediate_table] * len(shards),
+            [root_obj_ids.slice(start, start + count) for _, start, count in shards],
+            [related_obj_ids.slice(0, len(related_obj_ids))] * len(shards),
+            [seed] * len(shards),
+            [shard for shard, _, _ in shards],
+        )
+    )
+    log_copy_result(table=intermediate_table, rows=rows, started=started)
+
+
+def generate_data(
+    profile: DatasetProfile, seed: int, mode: str = 'insert', workers: int = 1, defer_indexes: bool = False
+):
+    """
+    Заполнение базы данными профиля: insert - execute_batch в одном процессе,
+    copy - COPY частями таблиц из workers процессов.
+    При defer_indexes вторичные индексы и внешние ключи удаляются на время заполнения (см. indexes)
+    """
 
-        for table in intermediate_tables:
+    if not defer_indexes:
+        fill_tables(profile=profile, seed=seed, mode=mode, workers=workers)
+        return
+
+    with PostgresService(dsn=settings.DATABASE_URL) as postgres:
+        deferred_objects = drop_deferrable_objects(
+            pg_service=postgres, tables=[*TABLES, *LINK_TABLES], path=settings.CONTENT_DEFERRED_FILE
+        )
+    started = time.perf_counter()
+    fill_tables(profile=profile, seed=seed, mode=mode, workers=workers)
+    logger.info(f'Заполнение таблиц без индексов и внешних ключей заняло {time.perf_counter() - started:.2f} с')
+    started = time.perf_counter()
+    rebuild_objects(objects=deferred_objects, workers=workers)
+    clear_deferred(settings.CONTENT_DEFERRED_FILE)
+    logger.info(f'Индексы и внешние ключи восстановлены за {time.perf_counter() - started:.2f} с')
+
+
+def fill_tables(profile: DatasetProfile, seed: int, mode: str, workers: int):
+    if mode == 'copy':
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for table in TABLES:
+                copy_table_with_generated_data(executor=executor, profile=profile, seed=seed, table=table)
+            for table in LINK_TABLES:
+                copy_intermediate_table_with_generated_data(
+                    executor=executor, profile=profile, seed=seed, intermediate_table=table
+                )
+        return
+
+    with PostgresService(dsn=settings.DATABASE_URL) as postgres:
+
+        for table in TABLES:
+            filling_table_with_generated_data(pg_service=postgres, profile=profile, seed=seed, table=table)
+
+        for table in LINK_TABLES:
             filling_intermediate_table_with_generated_data(
-                pg_service=postgres, intermediate_table=table, related_table=intermediate_tables[table]
+                pg_service=postgres, profile=profile, seed=seed, intermediate_table=table
             )
 
 
 if __name__ == '__main__':
-    logger.info('Работа скрипта начата')
-    generate_data()
+    parser = argparse.ArgumentParser(description='Заполнение базы синтетическими данными')
+    parser.add_argument('--profile', choices=PROFILES, default=settings.CONTENT_PROFILE, help='профиль данных')
+    parser.add_argument('--seed', type=int, default=settings.CONTENT_SEED, help='seed генерации данных')
+    parser.add_argument('--mode', choices=('insert', 'copy'), default=settings.CONTENT_MODE, help='способ записи')
+    parser.add_argument('--workers', type=int, default=settings.CONTENT_WORKERS, help='количество процессов copy')
+    parser.add_argument(
+        '--defer-indexes',
+        action='store_true',
+        default=settings.CONTENT_DEFER_INDEXES,
+        help='удалить вторичные индексы и внешние ключи на время заполнения',
+    )
+    parser.add_argument('--sqlite', help='выгрузить данные в новую базу SQLite для 03_sqlite_to_postgres')
+    args = parser.parse_args()
+
+    profile = get_profile(name=args.profile)
+    seed = args.seed if args.seed is not None else random.SystemRandom().randrange(2**32)
+
+    logger.info(f'Работа скрипта начата, профиль {args.profile or "из настроек"}: {profile}, seed {seed}')
+    if args.sqlite:
+        counts = export_to_sqlite(profile=profile, seed=seed, path=args.sqlite)
+        logger.info(f'Данные выгружены в {args.sqlite}: {counts}')
+    else:
+        generate_data(
+            profile=profile, seed=seed, mode=args.mode, workers=args.workers, defer_indexes=args.defer_indexes
+        )
     logger.info('Работа скрипта завершена')
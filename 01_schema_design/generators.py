@@ -0,0 +1,45 @@
+import uuid
+from datetime import date
+from typing import Iterator
+
+from faker import Faker
+
+"""
+Генераторы синтетических записей таблиц схемы content.
+Все случайные значения, включая id (uuid.UUID), берутся из переданного экземпляра Faker,
+поэтому при заданном seed (Faker.seed_instance) записи воспроизводятся, границы дат тоже фиксированы.
+Модуль не зависит от настроек и соединений и используется также бенчмарками 03_sqlite_to_postgres
+"""
+
+PERSON_FILM_WORK_ROLES = ['actor', 'producer', 'director']
+FILM_WORK_TYPES = ('movie', 'tv_show')
+
+
+def generate_person_data(fake: Faker, count: int) -> Iterator[tuple]:
+    for _ in range(count):
+        yield fake.uuid4(cast_to=None), fake.name()
+
+
+def generate_genre_data(fake: Faker, count: int) -> Iterator[tuple]:
+    for _ in range(count):
+        yield fake.uuid4(cast_to=None), fake.word(), fake.text()
+
+
+def generate_film_work_data(fake: Faker, count: int) -> Iterator[tuple]:
+    for _ in range(count):
+        yield (
+            fake.uuid4(cast_to=None),
+            fake.catch_phrase(),
+            fake.text(),
+            fake.date_between_dates(date(year=1900, month=1, day=1), date(year=2022, month=1, day=1)),
+            fake.pyfloat(min_value=0, max_value=100, right_digits=1),
+            fake.random_element(elements=FILM_WORK_TYPES),
+        )
+
+
+def generate_person_film_work_data(fake: Faker, film_work_id: uuid.UUID, person_id: uuid.UUID) -> tuple:
+    return fake.uuid4(cast_to=None), film_work_id, person_id, fake.random_element(elements=PERSON_FILM_WORK_ROLES)
+
+
+def generate_genre_film_work_data(fake: Faker, film_work_id: uuid.UUID, genre_id: uuid.UUID) -> tuple:
+    return fake.uuid4(cast_to=None), film_work_id, genre_id
@@ -0,0 +1,145 @@
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List
+
+from services import PostgresService
+from settings import settings
+
+"""
+Отложенное создание вторичных индексов и внешних ключей при заполнении базы.
+Перед заполнением индексы (кроме первичных ключей) и внешние ключи удаляются, после него индексы строятся
+параллельно на отдельных соединениях, а внешние ключи добавляются без проверки (NOT VALID)
+и проверяются VALIDATE CONSTRAINT. Определения сохраняются в файл до удаления и удаляются из него после
+восстановления: если заполнение прервано, следующий запуск с отложенными индексами восстанавливает их по файлу
+"""
+
+logger = logging.getLogger()
+
+INDEX = 'index'
+FOREIGN_KEY = 'foreign_key'
+
+# вторичные индексы таблиц схемы, не являющиеся первичными ключами и не обслуживающие ограничения
+INDEXES_QUERY = '''
+SELECT format('%%I.%%I', n.nspname, ic.relname), format('%%I.%%I', n.nspname, c.relname), pg_get_indexdef(i.indexrelid)
+FROM pg_index i
+JOIN pg_class ic ON ic.oid = i.indexrelid
+JOIN pg_class c ON c.oid = i.indrelid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE n.nspname = %s AND c.relname = ANY(%s) AND NOT i.indisprimary
+AND NOT EXISTS (SELECT 1 FROM pg_constraint con WHERE con.conindid = i.indexrelid)
+ORDER BY 1
+'''
+
+FOREIGN_KEYS_QUERY = '''
+SELECT format('%%I', con.conname), format('%%I.%%I', n.nspname, c.relname), pg_get_constraintdef(con.oid)
+FROM pg_constraint con
+JOIN pg_class c ON c.oid = con.conrelid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE n.nspname = %s AND c.relname = ANY(%s) AND con.contype = 'f'
+ORDER BY 1
+'''
+
+
+@dataclass
+class DeferredObject:
+    kind: str
+    name: str
+    table: str
+    definition: str
+
+    def get_drop_query(self) -> str:
+        if self.kind == INDEX:
+            return f'DROP INDEX IF EXISTS {self.name}'
+        return f'ALTER TABLE {self.table} DROP CONSTRAINT IF EXISTS {self.name}'
+
+    def get_create_query(self) -> str:
+        if self.kind == INDEX:
+            return self.definition
+        return f'ALTER TABLE {self.table} ADD CONSTRAINT {self.name} {self.definition} NOT VALID'
+
+
+def load_deferred(path: str) -> List[DeferredObject]:
+    if not os.path.exists(path):
+        return list()
+    with open(path) as deferred_file:
+        return [DeferredObject(**saved) for saved in json.load(deferred_file)]
+
+
+def save_deferred(path: str, objects: List[DeferredObject]):
+    with open(path, 'w') as deferred_file:
+        json.dump([asdict(deferred) for deferred in objects], deferred_file, indent=2)
+
+
+def clear_deferred(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def get_deferrable_objects(pg_service: PostgresService, tables: Iterable[str]) -> List[DeferredObject]:
+    objects = list()
+    for kind, query in ((FOREIGN_KEY, FOREIGN_KEYS_QUERY), (INDEX, INDEXES_QUERY)):
+        for rows in pg_service.get_batches(query=query, params=(settings.DB_SCHEMA, list(tables))):
+            objects.extend(DeferredObject(kind, name, table, definition) for name, table, definition in rows)
+    return objects
+
+
+def drop_deferrable_objects(pg_service: PostgresService, tables: Iterable[str], path: str) -> List[DeferredObject]:
+    """
+    Удаление индексов и внешних ключей таблиц в одной транзакции, возвращает их определения для восстановления.
+    Определения сохраняются в файл path до удаления, а если там остались определения прерванного заполнения,
+    используются они
+    """
+
+    objects = load_deferred(path)
+    if not objects:
+        objects = get_deferrable_objects(pg_service=pg_service, tables=tables)
+        save_deferred(path, objects)
+
+    for deferred in objects:
+        if not pg_service.execute(query=deferred.get_drop_query()):
+            pg_service.connection.rollback()
+            raise RuntimeError(f'Не удалось удалить {deferred.kind} {deferred.name} таблицы {deferred.table}')
+        logger.info(f'Удален {deferred.kind} {deferred.name} таблицы {deferred.table}')
+    if not pg_service.commit():
+        raise RuntimeError('Не удалось удалить индексы и внешние ключи перед заполнением')
+    return objects
+
+
+def run_query(deferred: DeferredObject, query: str) -> float:
+    started = time.perf_counter()
+    with PostgresService(dsn=settings.DATABASE_URL) as postgres:
+        if not postgres.execute(query=query) or not postgres.commit():
+            raise RuntimeError(f'Не удалось восстановить {deferred.kind} {deferred.name} таблицы {deferred.table}')
+    return time.perf_counter() - started
+
+
+def rebuild_objects(objects: List[DeferredObject], workers: int) -> Dict[str, float]:
+    """
+    Восстановление индексов и внешних ключей после заполнения, возвращает время восстановления каждого объекта
+    """
+
+    indexes = [deferred for deferred in objects if deferred.kind == INDEX]
+    foreign_keys = [deferred for deferred in objects if deferred.kind == FOREIGN_KEY]
+    timings = dict()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        index_timings = executor.map(lambda deferred: run_query(deferred, deferred.get_create_query()), indexes)
+        timings.update(zip((deferred.name for deferred in indexes), index_timings))
+
+        for deferred in foreign_keys:
+            timings[deferred.name] = run_query(deferred, deferred.get_create_query())
+        validate_timings = executor.map(
+            lambda deferred: run_query(deferred, f'ALTER TABLE {deferred.table} VALIDATE CONSTRAINT {deferred.name}'),
+            foreign_keys,
+        )
+        for deferred, seconds in zip(foreign_keys, validate_timings):
+            timings[deferred.name] += seconds
+
+    for deferred in objects:
+        logger.info(
+            f'Восстановлен {deferred.kind} {deferred.name} таблицы {deferred.table} за {timings[deferred.name]:.2f} с'
+        )
+    return timings
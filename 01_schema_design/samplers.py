@@ -0,0 +1,96 @@
+import random
+import uuid
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Iterable, List
+
+"""
+Выбор связанных записей при заполнении промежуточных таблиц без обращений к базе
+"""
+
+LINKS_DISTRIBUTIONS = ('uniform', 'zipf')
+
+
+class IdPool:
+    """
+    Компактное хранение id таблицы в памяти: 16 байт на id в одном буфере вместо списка объектов UUID
+    """
+
+    def __init__(self, ids: Iterable[uuid.UUID] = ()):
+        self.buffer = bytearray()
+        for obj_id in ids:
+            self.append(obj_id)
+
+    @classmethod
+    def from_batches(cls, batches: Iterable[List[tuple]]) -> 'IdPool':
+        """
+        Пул из пачек записей выборки, первое значение каждой записи - id
+        """
+
+        pool = cls()
+        for rows in batches:
+            for row in rows:
+                pool.append(row[0])
+        return pool
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'IdPool':
+        pool = cls()
+        pool.buffer = bytearray(data)
+        return pool
+
+    def append(self, obj_id: uuid.UUID):
+        self.buffer += obj_id.bytes
+
+    def slice(self, start: int, stop: int) -> bytes:
+        return bytes(self.buffer[start * 16 : stop * 16])
+
+    def __len__(self) -> int:
+        return len(self.buffer) // 16
+
+    def __getitem__(self, index: int) -> uuid.UUID:
+        return uuid.UUID(bytes=bytes(self.buffer[index * 16 : index * 16 + 16]))
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
+
+
+class RelatedIdSampler:
+    """
+    Выбор от 1 до max_links различных связанных id для каждой записи основной таблицы.
+    При распределении uniform все id равновероятны, при zipf вероятность id с номером k в пуле
+    пропорциональна 1 / k ** zipf_exponent: небольшая часть персон и жанров связана с большинством фильмов
+    """
+
+    def __init__(
+        self,
+        pool: IdPool,
+        rnd: random.Random,
+        max_links: int = 1,
+        distribution: str = 'uniform',
+        zipf_exponent: float = 1.1,
+    ):
+        if distribution not in LINKS_DISTRIBUTIONS:
+            raise ValueError(f'Неизвестное распределение связей {distribution}')
+        self.pool = pool
+        self.rnd = rnd
+        self.max_links = min(max_links, len(pool))
+        self.cumulative_weights = None
+        if distribution == 'zipf':
+            self.cumulative_weights = array(
+                'd', accumulate(1 / rank**zipf_exponent for rank in range(1, len(pool) + 1))
+            )
+
+    def draw_index(self) -> int:
+        if self.cumulative_weights is None:
+            return self.rnd.randrange(len(self.pool))
+        index = bisect_right(self.cumulative_weights, self.rnd.random() * self.cumulative_weights[-1])
+        return min(index, len(self.pool) - 1)
+
+    def sample(self) -> List[uuid.UUID]:
+        links = self.rnd.randint(1, self.max_links) if self.max_links else 0
+        indexes = dict()
+        while len(indexes) < links:
+            indexes.setdefault(self.draw_index())
+        return [self.pool[index] for index in indexes]
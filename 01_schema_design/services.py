@@ -1,16 +1,54 @@
 import logging
+import uuid
 from contextlib import closing
-from typing import List
+from typing import Iterable, List
 
 import psycopg2
+import psycopg2.extras
 from settings import settings
 
 logger = logging.getLogger()
 
 
+def prepare_copy_value(value) -> str:
+    """
+    Приведение значения к текстовому формату COPY с экранированием спецсимволов
+    """
+    if value is None:
+        return '\\N'
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+class CopyStream:
+    """
+    Файлоподобный источник данных для COPY: строки формата COPY формируются из записей по мере чтения,
+    поэтому поток записей любой длины передается одной командой COPY без накопления в памяти
+    """
+
+    def __init__(self, rows: Iterable[tuple]):
+        self.lines = ('\t'.join(prepare_copy_value(value) for value in row) + '\n' for row in rows)
+        self.buffer = ''
+
+    def read(self, size: int = -1) -> str:
+        chunks = [self.buffer]
+        length = len(self.buffer)
+        while size < 0 or length < size:
+            line = next(self.lines, None)
+            if line is None:
+                break
+            chunks.append(line)
+            length += len(line)
+        data = ''.join(chunks)
+        if size < 0:
+            size = len(data)
+        self.buffer = data[size:]
+        return data[:size]
+
+
 class PostgresService:
-    def __init__(self, dsn: str):
+    def __init__(self, dsn: str, itersize: int = settings.DB_ITER_SIZE):
         self.dsn = dsn
+        self.itersize = itersize
         self.connection = None
 
     def __enter__(self):
@@ -25,6 +63,17 @@ class PostgresService:
             self.connection.commit()
             self.connection.close()
 
+    def commit(self) -> bool:
+        """
+        Фиксация транзакции, прерванная ошибкой транзакция откатывается с результатом False
+        """
+
+        if self.connection.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_INERROR:
+            self.connection.rollback()
+            return False
+        self.connection.commit()
+        return True
+
     def save_all_data(self, data: List[tuple], query: str):
         with closing(self.connection.cursor()) as cursor:
             try:
@@ -32,16 +81,50 @@ class PostgresService:
             except (psycopg2.IntegrityError, psycopg2.DatabaseError) as exc:
                 logger.exception(exc)
 
+    def copy_data(self, data: Iterable[tuple], table: str, fields: List[str]) -> int:
+        """
+        Запись потока записей в таблицу одной командой COPY, возвращает количество записанных записей
+        """
+
+        with closing(self.connection.cursor()) as cursor:
+            try:
+                cursor.copy_expert(sql=f'COPY {table} ({", ".join(fields)}) FROM STDIN', file=CopyStream(rows=data))
+                return cursor.rowcount
+            except (psycopg2.IntegrityError, psycopg2.DatabaseError) as exc:
+                logger.exception(exc)
+                return 0
+
     def get_data(self, query: str):
+        for rows in self.get_batches(query=query):
+            yield from rows
+
+    def get_batches(self, query: str, size: int = None, params: tuple = None):
+        """
+        Чтение результата запроса пачками по size записей через именованный курсор на стороне сервера,
+        без загрузки всего результата в память клиента. Должно выполняться внутри транзакции
+        """
+
+        size = size or self.itersize
+        with closing(self.connection.cursor(name=f'batches_{uuid.uuid4().hex}')) as cursor:
+            try:
+                cursor.execute(query, params)
+                while rows := cursor.fetchmany(size):
+                    yield rows
+            except psycopg2.DatabaseError as exc:
+                logger.exception(exc)
+
+    def execute(self, query: str, params: tuple = None) -> bool:
+        """
+        Выполнение команды без результата, ошибка записывается в лог с результатом False
+        """
+
         with closing(self.connection.cursor()) as cursor:
             try:
-                cursor.execute(query)
-                row = cursor.fetchone()
-                while row is not None:
-                    yield row
-                    row = cursor.fetchone()
+                cursor.execute(query, params)
+                return True
             except psycopg2.DatabaseError as exc:
                 logger.exception(exc)
+                return False
 
     def get_count_for_table(self, table_name: str):
         query = f'SELECT COUNT(*) FROM {table_name}'
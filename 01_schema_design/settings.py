@@ -2,8 +2,10 @@ import logging
 import os
 from typing import Optional
 
+from dataset_profiles import PROFILES
 from dotenv import load_dotenv
 from pydantic import BaseSettings, validator
+from samplers import LINKS_DISTRIBUTIONS
 
 dotenv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env')
 if os.path.exists(dotenv_path):
@@ -18,11 +20,31 @@ class Settings(BaseSettings):
     DB_PORT: int = os.environ.get('DB_PORT', 5432)
     DATABASE_URL: Optional[str] = os.environ.get('DATABASE_URL')
     DB_SCHEMA: str = os.environ.get('DB_SCHEMA', 'content')
+    # количество записей, получаемых за одно обращение к курсору на стороне сервера
+    DB_ITER_SIZE: int = os.environ.get('DB_ITER_SIZE', 2000)
 
     CONTENT_PERSONS_COUNT: int = os.environ.get('CONTENT_PERSONS_COUNT', 100000)
     CONTENT_GENRES_COUNT: int = os.environ.get('CONTENT_GENRES_COUNT', 15)
     CONTENT_FILM_WORK_COUNT: int = os.environ.get('CONTENT_FILM_WORK_COUNT', 1100000)
     CONTENT_PAGE_SIZE_COUNT: int = os.environ.get('CONTENT_PAGE_SIZE_COUNT', 1000)
+    # способ заполнения таблиц: insert (execute_batch в одном процессе) или copy (COPY из CONTENT_WORKERS процессов)
+    CONTENT_MODE: str = os.environ.get('CONTENT_MODE', 'insert')
+    CONTENT_WORKERS: int = os.environ.get('CONTENT_WORKERS', 4)
+    # удаление вторичных индексов и внешних ключей на время заполнения и их восстановление в CONTENT_WORKERS потоков
+    CONTENT_DEFER_INDEXES: bool = os.environ.get('CONTENT_DEFER_INDEXES', False)
+    # файл с определениями удаленных индексов и внешних ключей: если заполнение прервано,
+    # следующий запуск с CONTENT_DEFER_INDEXES восстанавливает их по этому файлу
+    CONTENT_DEFERRED_FILE: str = os.environ.get('CONTENT_DEFERRED_FILE', 'deferred_objects.json')
+    # профиль данных (small, medium, production, см. dataset_profiles), без него используются настройки CONTENT_*;
+    # seed генерации данных, без него выбирается случайно и выводится в лог для повторения запуска
+    CONTENT_PROFILE: Optional[str] = os.environ.get('CONTENT_PROFILE') or None
+    CONTENT_SEED: Optional[int] = os.environ.get('CONTENT_SEED') or None
+    # наибольшее количество персон и жанров у одного фильма и распределение выбора связанных записей:
+    # uniform или zipf с показателем CONTENT_ZIPF_EXPONENT
+    CONTENT_PERSONS_PER_FILM: int = os.environ.get('CONTENT_PERSONS_PER_FILM', 1)
+    CONTENT_GENRES_PER_FILM: int = os.environ.get('CONTENT_GENRES_PER_FILM', 1)
+    CONTENT_LINKS_DISTRIBUTION: str = os.environ.get('CONTENT_LINKS_DISTRIBUTION', 'uniform')
+    CONTENT_ZIPF_EXPONENT: float = os.environ.get('CONTENT_ZIPF_EXPONENT', 1.1)
 
     LOG_LEVEL: str = os.environ.get('LOG_LEVEL', 'INFO')
 
@@ -34,6 +56,29 @@ class Settings(BaseSettings):
         )
         return database_url
 
+    @validator('CONTENT_PROFILE', 'CONTENT_SEED', pre=True)
+    def empty_to_None(cls, value):
+        # пустое значение из .env (CONTENT_PROFILE=) означает, что параметр не задан
+        return value or None
+
+    @validator('CONTENT_LINKS_DISTRIBUTION')
+    def check_CONTENT_LINKS_DISTRIBUTION(cls, value):
+        if value not in LINKS_DISTRIBUTIONS:
+            raise ValueError(f'Неизвестное распределение связей {value}')
+        return value
+
+    @validator('CONTENT_PROFILE')
+    def check_CONTENT_PROFILE(cls, value):
+        if value is not None and value not in PROFILES:
+            raise ValueError(f'Неизвестный профиль данных {value}')
+        return value
+
+    @validator('CONTENT_MODE')
+    def check_CONTENT_MODE(cls, value):
+        if value not in ('insert', 'copy'):
+            raise ValueError(f'Неизвестный способ заполнения таблиц {value}')
+        return value
+
 
 settings = Settings()
 
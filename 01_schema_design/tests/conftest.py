@@ -0,0 +1,48 @@
+import os
+import uuid
+from contextlib import closing
+
+import psycopg2
+import pytest
+from psycopg2 import sql
+from settings import settings
+
+"""
+Временные базы Postgres со схемой из schema.ddl для тестов заполнения,
+создаются и удаляются на сервере из настроек (DB_*), пользователю нужно право CREATEDB
+"""
+
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'schema.ddl')
+
+
+def execute_autocommit(dsn: str, query):
+    with closing(psycopg2.connect(dsn=dsn)) as connection:
+        connection.autocommit = True
+        connection.set_client_encoding('UTF8')
+        with closing(connection.cursor()) as cursor:
+            cursor.execute(query)
+
+
+@pytest.fixture
+def create_database():
+    # базы создаются и удаляются через базу из настроек, даже если тест подменил DATABASE_URL
+    database_url = settings.DATABASE_URL
+    names = list()
+
+    def create() -> str:
+        name = f'test_content_{uuid.uuid4().hex[:8]}'
+        execute_autocommit(
+            database_url,
+            sql.SQL("CREATE DATABASE {} ENCODING 'UTF8' TEMPLATE template0").format(sql.Identifier(name)),
+        )
+        names.append(name)
+        dsn = f'{database_url.rsplit("/", 1)[0]}/{name}'
+        with open(SCHEMA_FILE) as schema_file:
+            execute_autocommit(dsn, schema_file.read())
+        return dsn
+
+    try:
+        yield create
+    finally:
+        for name in names:
+            execute_autocommit(database_url, sql.SQL('DROP DATABASE {}').format(sql.Identifier(name)))
@@ -0,0 +1,77 @@
+import hashlib
+import sqlite3
+from contextlib import closing
+from typing import Dict, Iterable
+
+import dataset_profiles
+import pytest
+from dataset_profiles import LINK_TABLES, TABLES, DatasetProfile, export_to_sqlite
+from db_content import generate_data
+from services import PostgresService
+from settings import settings
+
+FIELDS = {table: parameters['fields'] for table, parameters in {**TABLES, **LINK_TABLES}.items()}
+
+
+def get_checksum(rows: Iterable[tuple]) -> str:
+    """
+    Контрольная сумма записей, упорядоченных по id. Значения сравниваются как строки, у даты создания только дата:
+    в SQLite она хранится строкой даты и времени
+    """
+
+    checksum = hashlib.md5()
+    for row in sorted(tuple(str(value) for value in row) for row in rows):
+        checksum.update(repr(row).encode())
+    return checksum.hexdigest()
+
+
+def normalize_row(table: str, row: tuple) -> tuple:
+    if 'creation_date' not in FIELDS[table]:
+        return row
+    index = FIELDS[table].index('creation_date')
+    return row[:index] + (str(row[index])[:10],) + row[index + 1 :]
+
+
+def get_postgres_checksums(dsn: str) -> Dict[str, str]:
+    checksums = dict()
+    with PostgresService(dsn=dsn) as postgres:
+        for table, fields in FIELDS.items():
+            query = f'SELECT {", ".join(fields)} FROM {table}'
+            rows = (normalize_row(table, row) for batch in postgres.get_batches(query=query, size=100) for row in batch)
+            checksums[table] = get_checksum(rows)
+    return checksums
+
+
+def get_sqlite_checksums(path: str) -> Dict[str, str]:
+    with closing(sqlite3.connect(path)) as connection:
+        return {
+            table: get_checksum(
+                normalize_row(table, row) for row in connection.execute(f'SELECT {", ".join(fields)} FROM {table}')
+            )
+            for table, fields in FIELDS.items()
+        }
+
+
+@pytest.mark.database_access
+def test_insert_copy_and_sqlite_give_same_data(tmp_path, monkeypatch, create_database):
+    """
+    Тест воспроизводимости профиля: при одном seed insert, copy из нескольких процессов и выгрузка в SQLite
+    записывают одни и те же записи
+    """
+
+    # несколько частей на таблицу, чтобы copy записывал их из разных процессов
+    monkeypatch.setattr(dataset_profiles, 'SHARD_SIZE', 7)
+    profile = DatasetProfile(
+        persons=20, genres=5, film_works=30, persons_per_film=3, genres_per_film=2, links_distribution='zipf'
+    )
+    checksums = dict()
+    for mode in ('insert', 'copy'):
+        monkeypatch.setattr(settings, 'DATABASE_URL', create_database())
+        generate_data(profile=profile, seed=3, mode=mode, workers=2)
+        checksums[mode] = get_postgres_checksums(dsn=settings.DATABASE_URL)
+    path = str(tmp_path / 'content.sqlite')
+    export_to_sqlite(profile=profile, seed=3, path=path)
+    checksums['sqlite'] = get_sqlite_checksums(path=path)
+
+    assert checksums['insert'] == checksums['copy'] == checksums['sqlite']
+    assert len(set(checksums['insert'].values())) == len(FIELDS)
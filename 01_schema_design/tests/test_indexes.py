@@ -0,0 +1,62 @@
+import pytest
+from dataset_profiles import LINK_TABLES, TABLES, DatasetProfile
+from db_content import generate_data
+from indexes import (
+    FOREIGN_KEY,
+    DeferredObject,
+    drop_deferrable_objects,
+    get_deferrable_objects,
+    load_deferred,
+    save_deferred,
+)
+from services import PostgresService
+from settings import settings
+
+CONTENT_TABLES = [*TABLES, *LINK_TABLES]
+
+
+def get_objects(dsn: str) -> list:
+    with PostgresService(dsn=dsn) as postgres:
+        return get_deferrable_objects(pg_service=postgres, tables=CONTENT_TABLES)
+
+
+@pytest.mark.database_access
+def test_drop_is_rolled_back_on_error(tmp_path, create_database):
+    """
+    Тест удаления индексов и внешних ключей одной транзакцией: при ошибке удаления одного объекта
+    остальные не удаляются, а определения остаются в файле
+    """
+
+    dsn = create_database()
+    path = str(tmp_path / 'deferred.json')
+    objects = get_objects(dsn=dsn)
+    missing = DeferredObject(
+        FOREIGN_KEY, 'missing_fkey', 'content.missing', 'FOREIGN KEY (id) REFERENCES content.genre(id)'
+    )
+    save_deferred(path, [*objects, missing])
+
+    with PostgresService(dsn=dsn) as postgres:
+        with pytest.raises(RuntimeError):
+            drop_deferrable_objects(pg_service=postgres, tables=CONTENT_TABLES, path=path)
+
+    assert objects
+    assert get_objects(dsn=dsn) == objects
+    assert load_deferred(path) == [*objects, missing]
+
+
+@pytest.mark.database_access
+def test_deferred_objects_are_restored_after_filling(tmp_path, monkeypatch, create_database):
+    """
+    Тест заполнения с отложенными индексами: индексы и внешние ключи восстанавливаются, файл определений удаляется
+    """
+
+    dsn = create_database()
+    path = str(tmp_path / 'deferred.json')
+    monkeypatch.setattr(settings, 'DATABASE_URL', dsn)
+    monkeypatch.setattr(settings, 'CONTENT_DEFERRED_FILE', path)
+    objects = get_objects(dsn=dsn)
+
+    generate_data(profile=DatasetProfile(persons=5, genres=3, film_works=10), seed=1, defer_indexes=True, workers=2)
+
+    assert get_objects(dsn=dsn) == objects
+    assert load_deferred(path) == []
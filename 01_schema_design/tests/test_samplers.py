@@ -0,0 +1,85 @@
+import random
+import uuid
+from collections import Counter
+
+import pytest
+from samplers import IdPool, RelatedIdSampler
+
+
+def get_pool(size: int) -> IdPool:
+    rnd = random.Random(0)
+    return IdPool(uuid.UUID(int=rnd.getrandbits(128), version=4) for _ in range(size))
+
+
+def count_ranks(pool: IdPool, distribution: str, draws: int) -> Counter:
+    sampler = RelatedIdSampler(pool=pool, rnd=random.Random(1), max_links=1, distribution=distribution)
+    ranks = {obj_id: rank for rank, obj_id in enumerate(pool)}
+    return Counter(ranks[sampler.sample()[0]] for _ in range(draws))
+
+
+def test_id_pool_round_trip():
+    """
+    Тест хранения id в пуле: те же UUID в том же порядке, в том числе после from_bytes и from_batches
+    """
+
+    ids = [uuid.uuid4() for _ in range(5)]
+    pool = IdPool(ids)
+
+    assert len(pool) == 5
+    assert list(pool) == ids
+    assert pool[3] == ids[3]
+    assert list(IdPool.from_bytes(pool.slice(1, 4))) == ids[1:4]
+    assert list(IdPool.from_batches([[(ids[0], 'a'), (ids[1], 'b')], [(ids[2], 'c')]])) == ids[:3]
+
+
+@pytest.mark.parametrize('distribution', ['uniform', 'zipf'])
+def test_sample_links_are_distinct(distribution):
+    """
+    Тест выбора связей для одной записи: от 1 до max_links различных id из пула
+    """
+
+    pool = get_pool(5)
+    sampler = RelatedIdSampler(pool=pool, rnd=random.Random(1), max_links=5, distribution=distribution)
+    samples = [sampler.sample() for _ in range(500)]
+
+    assert all(1 <= len(links) <= 5 and len(set(links)) == len(links) for links in samples)
+    assert set(obj_id for links in samples for obj_id in links) == set(pool)
+    assert {len(links) for links in samples} == {1, 2, 3, 4, 5}
+
+
+def test_zipf_skews_to_low_ranks():
+    """
+    Тест распределения zipf: первые id пула выбираются намного чаще последних, при uniform - примерно поровну
+    """
+
+    pool = get_pool(100)
+    draws = 20000
+
+    zipf = count_ranks(pool=pool, distribution='zipf', draws=draws)
+    # доля первых 10 из 100 id при показателе 1.1 - около 60%
+    assert sum(zipf[rank] for rank in range(10)) > draws / 2
+    assert zipf[0] > 10 * zipf[99]
+
+    uniform = count_ranks(pool=pool, distribution='uniform', draws=draws)
+    assert 0.07 < sum(uniform[rank] for rank in range(10)) / draws < 0.13
+    assert max(uniform.values()) < 2 * min(uniform[rank] for rank in range(100))
+
+
+def test_fixed_seed_reproduces_samples():
+    """
+    Тест воспроизводимости: с одним и тем же seed выбираются те же связи
+    """
+
+    pool = get_pool(50)
+
+    def get_samples(seed: int) -> list:
+        sampler = RelatedIdSampler(pool=pool, rnd=random.Random(seed), max_links=4, distribution='zipf')
+        return [sampler.sample() for _ in range(100)]
+
+    assert get_samples(seed=7) == get_samples(seed=7)
+    assert get_samples(seed=7) != get_samples(seed=8)
+
+
+def test_unknown_distribution():
+    with pytest.raises(ValueError):
+        RelatedIdSampler(pool=get_pool(1), rnd=random.Random(), distribution='normal')
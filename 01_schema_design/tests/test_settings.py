@@ -0,0 +1,29 @@
+from settings import Settings
+
+
+def test_empty_optional_settings(monkeypatch):
+    """
+    Тест пустых CONTENT_PROFILE и CONTENT_SEED из example.env: пустые значения считаются незаданными
+    """
+
+    monkeypatch.setenv('CONTENT_PROFILE', '')
+    monkeypatch.setenv('CONTENT_SEED', '')
+
+    settings = Settings()
+
+    assert settings.CONTENT_PROFILE is None
+    assert settings.CONTENT_SEED is None
+
+
+def test_optional_settings(monkeypatch):
+    """
+    Тест заданных CONTENT_PROFILE и CONTENT_SEED
+    """
+
+    monkeypatch.setenv('CONTENT_PROFILE', 'small')
+    monkeypatch.setenv('CONTENT_SEED', '42')
+
+    settings = Settings()
+
+    assert settings.CONTENT_PROFILE == 'small'
+    assert settings.CONTENT_SEED == 42
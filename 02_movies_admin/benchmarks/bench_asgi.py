@@ -0,0 +1,178 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List
+
+from benchmarks.bench_connections import get_commit, get_environ
+
+"""
+Сравнение пропускной способности JSON API при одновременных запросах: синхронные представления под WSGI
+(config/wsgi.py, по потоку на одновременный запрос, как в gunicorn с потоками), синхронные и асинхронные
+представления (movies.async_api, чтение через пул asyncpg) под ASGI (config/asgi.py, одновременные запросы -
+задачи одного цикла событий).
+Приложения вызываются в процессе без сервера, каждая конфигурация - в отдельном процессе, кэш ответов API
+и замеры запросов отключены. Нужна база из .env со схемой content.
+Запуск из каталога 02_movies_admin: python -m benchmarks.bench_asgi --concurrency 16 --requests 50
+"""
+
+CONFIGS = {
+    'wsgi': ('wsgi', '/api/v1/{}/'),
+    'asgi_sync': ('asgi', '/api/v1/{}/'),
+    'asgi_async': ('asgi', '/api/v1/async/{}/'),
+}
+ENVIRON = {'API_CACHE_TIMEOUT': '0', 'INSTRUMENTATION_SAMPLE_RATE': '0', 'DJANGO_SETTINGS_MODULE': 'config.settings'}
+
+
+def get_scope(path: str) -> dict:
+    return {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [(b'host', b'127.0.0.1')],
+        'client': ('127.0.0.1', 0),
+        'server': ('127.0.0.1', 80),
+    }
+
+
+def run_wsgi(path: str, concurrency: int, requests: int) -> List[float]:
+    from django.core.wsgi import get_wsgi_application
+
+    application = get_wsgi_application()
+
+    def request() -> float:
+        started = time.perf_counter()
+        statuses = list()
+        response = application(get_environ(path), lambda status, headers: statuses.append(status))
+        try:
+            b''.join(response)
+        finally:
+            response.close()
+        if not statuses[0].startswith('200'):
+            raise RuntimeError(f'Ответ {statuses[0]} на {path}')
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = executor.map(lambda _: [request() for _ in range(requests)], range(concurrency))
+        return [latency for result in results for latency in result]
+
+
+def run_asgi(path: str, concurrency: int, requests: int) -> List[float]:
+    from django.core.asgi import get_asgi_application
+
+    application = get_asgi_application()
+
+    async def request() -> float:
+        started = time.perf_counter()
+        messages = list()
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        await application(get_scope(path), receive, send)
+        if messages[0]['status'] != 200:
+            raise RuntimeError(f'Ответ {messages[0]["status"]} на {path}')
+        return time.perf_counter() - started
+
+    async def worker() -> List[float]:
+        return [await request() for _ in range(requests)]
+
+    async def run() -> List[float]:
+        from movies.async_api import close_pool
+
+        try:
+            results = await asyncio.gather(*(worker() for _ in range(concurrency)))
+        finally:
+            # пул asyncpg привязан к циклу событий, который завершает asyncio.run
+            await close_pool()
+        return [latency for result in results for latency in result]
+
+    return asyncio.run(run())
+
+
+def run_config(name: str, resource: str, concurrency: int, requests: int) -> dict:
+    """
+    Запросы в отдельном процессе, чтобы соединения и пулы потоков конфигураций не пересекались
+    """
+
+    os.environ.update(ENVIRON)
+    import django
+
+    django.setup(set_prefix=False)
+
+    handler, path = CONFIGS[name]
+    run = run_wsgi if handler == 'wsgi' else run_asgi
+    path = path.format(resource)
+    # прогрев: соединения и кэш шаблонов URL
+    run(path, concurrency, 1)
+
+    started = time.perf_counter()
+    latencies = run(path, concurrency, requests)
+    seconds = time.perf_counter() - started
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        'path': path,
+        'seconds': seconds,
+        'requests_per_second': len(latencies) / seconds,
+        'latency_p50_ms': quantiles[49] * 1000,
+        'latency_p95_ms': quantiles[94] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Сравнение WSGI и ASGI при одновременных запросах')
+    parser.add_argument('--configs', nargs='+', choices=CONFIGS, default=list(CONFIGS), help='конфигурации')
+    parser.add_argument('--resource', default='persons', help='список API: film_works, persons или genres')
+    parser.add_argument('--concurrency', type=int, default=16, help='количество одновременных запросов')
+    parser.add_argument('--requests', type=int, default=50, help='количество запросов каждого клиента')
+    parser.add_argument('--results', default='benchmark_results.json', help='файл результатов в формате JSON')
+    args = parser.parse_args()
+
+    results = list()
+    for name in args.configs:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            result = executor.submit(run_config, name, args.resource, args.concurrency, args.requests).result()
+        result.update(config=name)
+        results.append(result)
+        print(
+            f'{name:<12} {result["requests_per_second"]:>8.0f} запросов/с '
+            f'p50 {result["latency_p50_ms"]:>7.2f} мс p95 {result["latency_p95_ms"]:>7.2f} мс'
+        )
+
+    # результаты добавляются к предыдущим запускам, чтобы сравнивать их между коммитами
+    runs = list()
+    if os.path.exists(args.results):
+        with open(args.results) as results_file:
+            runs = json.load(results_file)
+    runs.append(
+        {
+            'commit': get_commit(),
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'benchmark': 'asgi',
+            'resource': args.resource,
+            'concurrency': args.concurrency,
+            'requests': args.requests,
+            'results': results,
+        }
+    )
+    with open(args.results, 'w') as results_file:
+        json.dump(runs, results_file, indent=2)
+    print(f'Результаты сохранены в {args.results}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import statistics
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List
+
+"""
+Нагрузочный тест соединений с базой: запросы к JSON API выполняются обработчиком WSGI (как в воркере gunicorn,
+с сигналами начала и конца запроса, по которым Django закрывает соединения) из нескольких потоков.
+Каждая конфигурация соединений (переменные DB_* из config/components/database.py) запускается в отдельном процессе,
+кэш ответов API отключен, чтобы каждый запрос обращался к базе. Нужна база из .env со схемой content.
+Запуск из каталога 02_movies_admin: python -m benchmarks.bench_connections --threads 4 --requests 200
+"""
+
+CONFIGS = {
+    'per_request': {'DB_CONN_MAX_AGE': '0', 'DB_POOL_SIZE': '0'},
+    'persistent': {'DB_CONN_MAX_AGE': '60', 'DB_POOL_SIZE': '0'},
+    'pool': {'DB_CONN_MAX_AGE': '0', 'DB_POOL_SIZE': '8'},
+}
+
+
+def get_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def get_environ(path: str) -> dict:
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': '127.0.0.1',
+        'SERVER_PORT': '80',
+        'HTTP_HOST': '127.0.0.1',
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': io.StringIO(),
+    }
+
+
+def run_config(config: Dict[str, str], path: str, threads: int, requests: int) -> dict:
+    """
+    Запросы в отдельном процессе: настройки соединений читаются при запуске Django
+    """
+
+    os.environ.update(config, API_CACHE_TIMEOUT='0', DJANGO_SETTINGS_MODULE='config.settings')
+
+    from config.postgresql.base import get_connection_metrics
+    from django.core.wsgi import get_wsgi_application
+
+    application = get_wsgi_application()
+
+    def request() -> float:
+        started = time.perf_counter()
+        statuses = list()
+        response = application(get_environ(path), lambda status, headers: statuses.append(status))
+        try:
+            b''.join(response)
+        finally:
+            response.close()
+        if not statuses[0].startswith('200'):
+            raise RuntimeError(f'Ответ {statuses[0]} на {path}')
+        return time.perf_counter() - started
+
+    def worker() -> List[float]:
+        return [request() for _ in range(requests)]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = [latency for result in executor.map(lambda _: worker(), range(threads)) for latency in result]
+    seconds = time.perf_counter() - started
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        'seconds': seconds,
+        'requests_per_second': len(latencies) / seconds,
+        'latency_p50_ms': quantiles[49] * 1000,
+        'latency_p95_ms': quantiles[94] * 1000,
+        'connections': get_connection_metrics(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Нагрузочный тест соединений с базой')
+    parser.add_argument('--configs', nargs='+', choices=CONFIGS, default=list(CONFIGS), help='конфигурации соединений')
+    parser.add_argument('--path', default='/api/v1/genres/', help='путь запроса')
+    parser.add_argument('--threads', type=int, default=4, help='количество потоков')
+    parser.add_argument('--requests', type=int, default=200, help='количество запросов каждого потока')
+    parser.add_argument('--results', default='benchmark_results.json', help='файл результатов в формате JSON')
+    args = parser.parse_args()
+
+    results = list()
+    for name in args.configs:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            result = executor.submit(run_config, CONFIGS[name], args.path, args.threads, args.requests).result()
+        result.update(config=name, **CONFIGS[name])
+        results.append(result)
+        print(
+            f'{name:<12} {result["requests_per_second"]:>8.0f} запросов/с '
+            f'p50 {result["latency_p50_ms"]:>7.2f} мс p95 {result["latency_p95_ms"]:>7.2f} мс '
+            f'соединений открыто {result["connections"].get("connections_opened", 0)}'
+        )
+
+    # результаты добавляются к предыдущим запускам, чтобы сравнивать их между коммитами
+    runs = list()
+    if os.path.exists(args.results):
+        with open(args.results) as results_file:
+            runs = json.load(results_file)
+    runs.append(
+        {
+            'commit': get_commit(),
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'benchmark': 'connections',
+            'path': args.path,
+            'threads': args.threads,
+            'requests': args.requests,
+            'results': results,
+        }
+    )
+    with open(args.results, 'w') as results_file:
+        json.dump(runs, results_file, indent=2)
+    print(f'Результаты сохранены в {args.results}')
+
+
+if __name__ == '__main__':
+    main()
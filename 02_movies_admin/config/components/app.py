@@ -1,3 +1,5 @@
+import os
+
 from config.components.security import DEBUG
 
 INSTALLED_APPS = [
@@ -14,7 +16,7 @@ if DEBUG:
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'movies.instrumentation.QueryInstrumentationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -22,6 +24,8 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
+if DEBUG:
+    MIDDLEWARE.insert(2, 'debug_toolbar.middleware.DebugToolbarMiddleware')
 WSGI_APPLICATION = 'config.wsgi.application'
 TEMPLATES = [
     {
@@ -39,3 +43,30 @@ TEMPLATES = [
     },
 ]
 ROOT_URLCONF = 'config.urls'
+
+# оценка количества записей вместо COUNT(*) в списках админки начиная с этого количества
+ADMIN_COUNT_ESTIMATE_THRESHOLD = int(os.environ.get('ADMIN_COUNT_ESTIMATE_THRESHOLD', 10000))
+ADMIN_FILTER_CACHE_TIMEOUT = int(os.environ.get('ADMIN_FILTER_CACHE_TIMEOUT', 300))
+# наибольшее количество записей, изменяемых одним массовым действием админки
+ADMIN_BULK_ACTION_MAX_ROWS = int(os.environ.get('ADMIN_BULK_ACTION_MAX_ROWS', 10000))
+
+# JSON API: размер страницы по умолчанию, наибольший размер страницы и время кэширования ответов в секундах
+API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 50))
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 500))
+API_CACHE_TIMEOUT = int(os.environ.get('API_CACHE_TIMEOUT', 60))
+
+# замеры запросов к базе: доля замеряемых запросов, пороги записи в лог и токен для /metrics/ (пустой - отключено)
+INSTRUMENTATION_SAMPLE_RATE = float(os.environ.get('INSTRUMENTATION_SAMPLE_RATE', 0.1))
+INSTRUMENTATION_SLOW_REQUEST_MS = float(os.environ.get('INSTRUMENTATION_SLOW_REQUEST_MS', 500))
+INSTRUMENTATION_SLOW_QUERY_MS = float(os.environ.get('INSTRUMENTATION_SLOW_QUERY_MS', 100))
+INSTRUMENTATION_QUERY_COUNT_THRESHOLD = int(os.environ.get('INSTRUMENTATION_QUERY_COUNT_THRESHOLD', 50))
+INSTRUMENTATION_SLOWEST_QUERIES = int(os.environ.get('INSTRUMENTATION_SLOWEST_QUERIES', 5))
+INSTRUMENTATION_METRICS_TOKEN = os.environ.get('INSTRUMENTATION_METRICS_TOKEN', '')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {'plain': {'format': '%(asctime)s - %(levelname)s - %(name)s - %(message)s'}},
+    'handlers': {'console': {'class': 'logging.StreamHandler', 'formatter': 'plain'}},
+    'loggers': {'movies.instrumentation': {'handlers': ['console'], 'level': 'INFO', 'propagate': False}},
+}
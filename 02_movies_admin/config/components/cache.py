@@ -0,0 +1,22 @@
+import os
+
+# locmem - кэш в памяти процесса, redis - общий кэш процессов (movies.redis_cache.RedisCache)
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+CACHE_TIMEOUT = int(os.environ.get('CACHE_TIMEOUT', 300))
+
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'movies.redis_cache.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/0'),
+            'TIMEOUT': CACHE_TIMEOUT,
+            'KEY_PREFIX': os.environ.get('CACHE_KEY_PREFIX', 'movies_admin'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'TIMEOUT': CACHE_TIMEOUT,
+        }
+    }
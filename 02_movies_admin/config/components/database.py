@@ -1,14 +1,23 @@
 import os
 
+# время жизни соединения в секундах: 0 - соединение на запрос, пусто - без ограничения
+DB_CONN_MAX_AGE = os.environ.get('DB_CONN_MAX_AGE', '60')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'config.postgresql',
         'NAME': os.environ['DB_NAME'],
         'USER': os.environ['DB_USER'],
         'PASSWORD': os.environ['DB_PASSWORD'],
         'HOST': os.environ['DB_HOST'],
         'PORT': os.environ.get('DB_PORT', 5432),
         'OPTIONS': {'options': f'-c search_path={os.environ.get("DB_SCHEMA", "content")},public -c log_statement=mod'},
+        'CONN_MAX_AGE': int(DB_CONN_MAX_AGE) if DB_CONN_MAX_AGE else None,
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+        # количество свободных соединений в пуле процесса, 0 - без пула (см. config.postgresql)
+        'POOL_SIZE': int(os.environ.get('DB_POOL_SIZE', 0)),
     }
 }
+# наибольшее количество соединений asyncpg в пуле цикла событий асинхронных представлений (movies.async_api)
+DB_ASYNC_POOL_SIZE = int(os.environ.get('DB_ASYNC_POOL_SIZE', 10))
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
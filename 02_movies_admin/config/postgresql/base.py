@@ -0,0 +1,150 @@
+import os
+import threading
+from collections import Counter
+from typing import Callable, Dict, List
+
+from django.db.backends.postgresql import base
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+"""
+Бэкенд PostgreSQL с проверкой постоянных соединений и необязательным пулом соединений процесса.
+CONN_HEALTH_CHECKS: соединение, оставшееся с прошлого запроса, проверяется перед первым запросом к базе
+и пересоздается, если сервер его закрыл (как в Django 4.1).
+POOL_SIZE: при закрытии соединение возвращается в пул процесса (не больше POOL_SIZE свободных соединений),
+новое соединение берется из пула, поэтому search_path и параметры сессии задаются только при подключении.
+Счетчики соединений ведутся в каждом процессе (get_connection_metrics)
+"""
+
+_metrics = Counter()
+_metrics_lock = threading.Lock()
+
+
+def count(name: str, value: int = 1):
+    with _metrics_lock:
+        _metrics[name] += value
+
+
+def get_connection_metrics() -> Dict[str, int]:
+    with _metrics_lock:
+        metrics = dict(_metrics)
+    metrics['pool_idle'] = sum(len(pool.idle) for pool in ConnectionPool.pools.values())
+    metrics['pid'] = os.getpid()
+    return metrics
+
+
+def is_connection_usable(connection) -> bool:
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except base.Database.Error:
+        return False
+    return True
+
+
+class ConnectionPool:
+    """
+    Свободные соединения процесса для одной базы; соединения сверх size при возврате закрываются
+    """
+
+    pools: Dict[str, 'ConnectionPool'] = dict()
+    pools_lock = threading.Lock()
+
+    def __init__(self, size: int, health_checks: bool):
+        self.size = size
+        self.health_checks = health_checks
+        self.idle: List = list()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def get(cls, alias: str, size: int, health_checks: bool) -> 'ConnectionPool':
+        with cls.pools_lock:
+            if alias not in cls.pools:
+                cls.pools[alias] = cls(size=size, health_checks=health_checks)
+            return cls.pools[alias]
+
+    def acquire(self, connect: Callable):
+        while True:
+            with self.lock:
+                connection = self.idle.pop() if self.idle else None
+            if connection is None:
+                count('connections_opened')
+                return connect()
+            if connection.closed:
+                continue
+            if self.health_checks:
+                count('health_checks')
+                if not is_connection_usable(connection):
+                    count('health_check_failures')
+                    self.discard(connection)
+                    continue
+            count('connections_reused')
+            return connection
+
+    def release(self, connection):
+        if not connection.closed and connection.info.transaction_status != TRANSACTION_STATUS_IDLE:
+            try:
+                connection.rollback()
+            except base.Database.Error:
+                self.discard(connection)
+                return
+        with self.lock:
+            if not connection.closed and len(self.idle) < self.size:
+                self.idle.append(connection)
+                return
+        self.discard(connection)
+
+    @staticmethod
+    def discard(connection):
+        count('connections_closed')
+        try:
+            connection.close()
+        except base.Database.Error:
+            pass
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    health_check_pending = False
+
+    @property
+    def pool(self):
+        if not self.settings_dict.get('POOL_SIZE'):
+            return None
+        return ConnectionPool.get(
+            alias=self.alias,
+            size=self.settings_dict['POOL_SIZE'],
+            health_checks=self.settings_dict.get('CONN_HEALTH_CHECKS', False),
+        )
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            count('connections_opened')
+            return super().get_new_connection(conn_params)
+
+        connection = pool.acquire(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+        # уровень изоляции соединения из пула уже задан при его создании
+        self.isolation_level = self.settings_dict['OPTIONS'].get('isolation_level', connection.isolation_level)
+        return connection
+
+    def _close(self):
+        pool = self.pool
+        if pool is None:
+            count('connections_closed')
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.release(self.connection)
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        # соединение прошлого запроса проверяется при первом обращении к базе в новом запросе
+        if self.connection is not None and self.settings_dict.get('CONN_HEALTH_CHECKS'):
+            self.health_check_pending = True
+
+    def ensure_connection(self):
+        if self.connection is not None and self.health_check_pending:
+            self.health_check_pending = False
+            count('health_checks')
+            if not self.is_usable():
+                count('health_check_failures')
+                self.close()
+        super().ensure_connection()
@@ -9,6 +9,7 @@ if os.path.exists(dotenv_path):
 
 include(
     'components/app.py',
+    'components/cache.py',
     'components/database.py',
     'components/localization.py',
     'components/security.py',
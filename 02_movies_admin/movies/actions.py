@@ -0,0 +1,243 @@
+import uuid
+from typing import List, Optional
+
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.admin.models import DELETION, LogEntry
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.utils.translation import gettext_lazy as _
+from movies.caching import GENRE, PERSON, invalidate, invalidate_film_works
+from movies.changelist import get_genre_choices, invalidate_genre_choices
+from movies.constants import FilmWorkType
+from movies.read_model import refresh_film_works
+
+"""
+Массовые действия админки: каждое изменение выполняется одним запросом UPDATE, INSERT ... SELECT или DELETE
+по списку id выбранных записей (не больше ADMIN_BULK_ACTION_MAX_ROWS), без загрузки объектов и сигналов
+на каждую строку. Поле modified измененных кинопроизведений обновляется тем же запросом, запрос возвращает их id,
+по которым затем пересчитывается FilmWorkDetail и сбрасывается кэш (movies.caching).
+Удаленные записи попадают в журнал админки (LogEntry) одним INSERT, как при стандартном удалении
+"""
+
+EMPTY_CHOICE = ('', '---------')
+
+ASSIGN_GENRE_QUERY = '''
+WITH inserted AS (
+    INSERT INTO content.genre_film_work (id, film_work_id, genre_id, created)
+    SELECT link.id, fw.id, g.id, NOW()
+    FROM content.genre g
+    CROSS JOIN unnest(%(link_ids)s::uuid[], %(film_work_ids)s::uuid[]) AS link (id, film_work_id)
+    JOIN content.film_work fw ON fw.id = link.film_work_id
+    WHERE g.id = %(genre_id)s::uuid
+    ON CONFLICT (film_work_id, genre_id) DO NOTHING
+    RETURNING film_work_id
+)
+UPDATE content.film_work SET modified = NOW() WHERE id IN (SELECT film_work_id FROM inserted) RETURNING id
+'''
+
+REMOVE_GENRE_QUERY = '''
+WITH deleted AS (
+    DELETE FROM content.genre_film_work
+    WHERE genre_id = %(genre_id)s::uuid AND film_work_id = ANY(%(film_work_ids)s::uuid[])
+    RETURNING film_work_id
+)
+UPDATE content.film_work SET modified = NOW() WHERE id IN (SELECT film_work_id FROM deleted) RETURNING id
+'''
+
+CHANGE_TYPE_QUERY = '''
+UPDATE content.film_work SET type = %(type)s, modified = NOW()
+WHERE id = ANY(%(film_work_ids)s::uuid[]) AND type <> %(type)s
+RETURNING id
+'''
+
+DELETE_FILM_WORKS_QUERY = '''
+WITH genres AS (
+    DELETE FROM content.genre_film_work WHERE film_work_id = ANY(%(ids)s::uuid[])
+), persons AS (
+    DELETE FROM content.person_film_work WHERE film_work_id = ANY(%(ids)s::uuid[])
+), details AS (
+    DELETE FROM content.film_work_detail WHERE film_work_id = ANY(%(ids)s::uuid[])
+)
+DELETE FROM content.film_work WHERE id = ANY(%(ids)s::uuid[]) RETURNING id, title
+'''
+
+# удаление жанров или персон вместе со связями, modified связанных кинопроизведений обновляется тем же запросом
+DELETE_LINKED_QUERY = '''
+WITH links AS (
+    DELETE FROM content.{link_table} WHERE {column} = ANY(%(ids)s::uuid[]) RETURNING film_work_id
+), deleted AS (
+    DELETE FROM content.{table} WHERE id = ANY(%(ids)s::uuid[]) RETURNING id, {repr_column}
+), film_works AS (
+    UPDATE content.film_work SET modified = NOW() WHERE id IN (SELECT film_work_id FROM links) RETURNING id
+)
+SELECT ARRAY(SELECT ARRAY[id::text, {repr_column}] FROM deleted), ARRAY(SELECT id FROM film_works)
+'''
+
+
+class FilmWorkActionForm(ActionForm):
+    genre = forms.ChoiceField(label=_('genre'), required=False)
+    type = forms.ChoiceField(label=_('type'), choices=[EMPTY_CHOICE, *FilmWorkType.choices], required=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['genre'].choices = [EMPTY_CHOICE, *get_genre_choices()]
+
+
+def execute(query: str, params: dict) -> List[tuple]:
+    with connection.cursor() as cursor:
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+
+def get_selected_ids(modeladmin, request, queryset) -> Optional[list]:
+    limit = settings.ADMIN_BULK_ACTION_MAX_ROWS
+    ids = list(queryset.order_by().values_list('pk', flat=True)[: limit + 1])
+    if len(ids) > limit:
+        modeladmin.message_user(
+            request,
+            _('More than %(limit)d rows selected, narrow the selection with filters or search') % {'limit': limit},
+            messages.ERROR,
+        )
+        return None
+    return ids
+
+
+def get_action_value(modeladmin, request, name: str) -> Optional[str]:
+    # поле action формы проверяется списком действий админки, здесь нужно только поле значения
+    field = FilmWorkActionForm().fields[name]
+    try:
+        value = field.clean(request.POST.get(name, ''))
+    except ValidationError:
+        value = None
+    if not value:
+        modeladmin.message_user(
+            request, _('Choose %(field)s for the action') % {'field': field.label}, messages.WARNING
+        )
+        return None
+    return value
+
+
+def log_deletions(request, model, rows: List[tuple]):
+    """
+    Записи журнала админки об удалении строк (id, представление), как log_deletion у ModelAdmin
+    """
+
+    content_type_id = ContentType.objects.get_for_model(model).pk
+    LogEntry.objects.bulk_create(
+        LogEntry(
+            user_id=request.user.pk,
+            content_type_id=content_type_id,
+            object_id=str(pk),
+            object_repr=str(object_repr)[:200],
+            action_flag=DELETION,
+        )
+        for pk, object_repr in rows
+    )
+
+
+def update_film_works(modeladmin, request, ids: list, query: str, params: dict, message: str):
+    with transaction.atomic():
+        changed = [row[0] for row in execute(query, {**params, 'film_work_ids': ids})]
+        refresh_film_works(changed)
+        invalidate_film_works(changed)
+    modeladmin.message_user(request, message % {'count': len(changed), 'total': len(ids)}, messages.SUCCESS)
+
+
+@admin.action(description=_('Assign genre to selected filmworks'), permissions=['change'])
+def assign_genre(modeladmin, request, queryset):
+    genre_id = get_action_value(modeladmin, request, 'genre')
+    ids = genre_id and get_selected_ids(modeladmin, request, queryset)
+    if not ids:
+        return
+    # id связей генерируются заранее, как uuid4 по умолчанию в модели
+    params = {'genre_id': genre_id, 'link_ids': [uuid.uuid4() for film_work_id in ids]}
+    update_film_works(
+        modeladmin,
+        request,
+        ids,
+        ASSIGN_GENRE_QUERY,
+        params,
+        _('Genre assigned: %(count)d of %(total)d filmworks changed'),
+    )
+
+
+@admin.action(description=_('Remove genre from selected filmworks'), permissions=['change'])
+def remove_genre(modeladmin, request, queryset):
+    genre_id = get_action_value(modeladmin, request, 'genre')
+    ids = genre_id and get_selected_ids(modeladmin, request, queryset)
+    if not ids:
+        return
+    update_film_works(
+        modeladmin,
+        request,
+        ids,
+        REMOVE_GENRE_QUERY,
+        {'genre_id': genre_id},
+        _('Genre removed: %(count)d of %(total)d filmworks changed'),
+    )
+
+
+@admin.action(description=_('Change type of selected filmworks'), permissions=['change'])
+def change_type(modeladmin, request, queryset):
+    film_work_type = get_action_value(modeladmin, request, 'type')
+    ids = film_work_type and get_selected_ids(modeladmin, request, queryset)
+    if not ids:
+        return
+    update_film_works(
+        modeladmin,
+        request,
+        ids,
+        CHANGE_TYPE_QUERY,
+        {'type': film_work_type},
+        _('Type changed: %(count)d of %(total)d filmworks changed'),
+    )
+
+
+@admin.action(description=_('Delete selected filmworks in one query'), permissions=['delete'])
+def delete_film_works(modeladmin, request, queryset):
+    ids = get_selected_ids(modeladmin, request, queryset)
+    if ids is None:
+        return
+    with transaction.atomic():
+        rows = execute(DELETE_FILM_WORKS_QUERY, {'ids': ids})
+        log_deletions(request, queryset.model, rows)
+        invalidate_film_works([row[0] for row in rows])
+    modeladmin.message_user(
+        request, _('Deleted %(count)d of %(total)d filmworks') % {'count': len(rows), 'total': len(ids)}
+    )
+
+
+def delete_linked(
+    modeladmin, request, queryset, table: str, link_table: str, column: str, repr_column: str
+) -> Optional[int]:
+    ids = get_selected_ids(modeladmin, request, queryset)
+    if ids is None:
+        return None
+    query = DELETE_LINKED_QUERY.format(link_table=link_table, column=column, table=table, repr_column=repr_column)
+    with transaction.atomic():
+        [(deleted, film_work_ids)] = execute(query, {'ids': ids})
+        log_deletions(request, queryset.model, deleted)
+        refresh_film_works(film_work_ids)
+        invalidate_film_works(film_work_ids)
+        invalidate(table, ids, lists=(table,))
+    modeladmin.message_user(
+        request,
+        _('Deleted %(count)d of %(total)d, %(film_works)d filmworks changed')
+        % {'count': len(deleted), 'total': len(ids), 'film_works': len(film_work_ids)},
+    )
+    return len(deleted)
+
+
+@admin.action(description=_('Delete selected genres in one query'), permissions=['delete'])
+def delete_genres(modeladmin, request, queryset):
+    if delete_linked(modeladmin, request, queryset, GENRE, 'genre_film_work', 'genre_id', 'name'):
+        invalidate_genre_choices()
+
+
+@admin.action(description=_('Delete selected persons in one query'), permissions=['delete'])
+def delete_persons(modeladmin, request, queryset):
+    delete_linked(modeladmin, request, queryset, PERSON, 'person_film_work', 'person_id', 'full_name')
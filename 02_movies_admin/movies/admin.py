@@ -1,53 +1,96 @@
 from django.contrib import admin
-from django.db.models import Prefetch
 from django.utils.translation import gettext_lazy as _
+from movies.actions import (
+    FilmWorkActionForm,
+    assign_genre,
+    change_type,
+    delete_film_works,
+    delete_genres,
+    delete_persons,
+    remove_genre,
+)
+from movies.changelist import EstimatedCountPaginator, GenreListFilter, KeysetChangeList
+from movies.inlines import PrefetchedAutocompleteInline
 from movies.models import FilmWork, Genre, GenreFilmWork, Person, PersonFilmWork
+from movies.read_model import deferred_refresh
+from movies.search import search_film_works, search_persons
 
 
-class GenreFilmWorkInline(admin.TabularInline):
+class GenreFilmWorkInline(PrefetchedAutocompleteInline):
     model = GenreFilmWork
     autocomplete_fields = ('genre',)
-    list_prefetch_related = (Prefetch('film_work'), Prefetch('genre'))
     verbose_name = _('genre of filmwork')
     verbose_name_plural = _('genres of filmwork')
     extra = 2
 
 
-class PersonFilmWorkInline(admin.TabularInline):
+class PersonFilmWorkInline(PrefetchedAutocompleteInline):
     model = PersonFilmWork
     autocomplete_fields = ('person',)
-    list_prefetch_related = (Prefetch('film_work'), Prefetch('person'))
     verbose_name = _('person in filmwork')
     verbose_name_plural = _('persons in filmwork')
     extra = 2
 
 
+class DeferredRefreshAdmin(admin.ModelAdmin):
+    """
+    Сохранение связей и удаление пересчитывают FilmWorkDetail одним запросом, а не на каждую строку
+    """
+
+    def save_related(self, request, form, formsets, change):
+        with deferred_refresh():
+            super().save_related(request, form, formsets, change)
+
+    def delete_model(self, request, obj):
+        with deferred_refresh():
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with deferred_refresh():
+            super().delete_queryset(request, queryset)
+
+
 @admin.register(Genre)
-class GenreAdmin(admin.ModelAdmin):
+class GenreAdmin(DeferredRefreshAdmin):
     search_fields = ('name', 'description')
     list_display = ('name', 'description', 'created', 'modified')
     list_filter = ()
     readonly_fields = ('created', 'modified')
+    actions = (delete_genres,)
 
     def film_works(self, instance):
         return instance.film_works
 
 
 @admin.register(Person)
-class PersonAdmin(admin.ModelAdmin):
+class PersonAdmin(DeferredRefreshAdmin):
     search_fields = ('full_name',)
     list_display = ('full_name', 'created', 'modified')
     list_filter = ()
     readonly_fields = ('created', 'modified')
+    actions = (delete_persons,)
 
     def film_works(self, instance):
         return instance.film_works
 
+    def get_search_results(self, request, queryset, search_term):
+        return search_persons(queryset, search_term), False
+
 
 @admin.register(FilmWork)
-class FilmWorkAdmin(admin.ModelAdmin):
+class FilmWorkAdmin(DeferredRefreshAdmin):
     inlines = (GenreFilmWorkInline, PersonFilmWorkInline)
     list_display = ('title', 'type', 'creation_date', 'rating', 'created', 'modified')
-    list_filter = ('type', 'genre')
+    list_filter = ('type', GenreListFilter)
     search_fields = ('title', 'description', 'id')
     readonly_fields = ('created', 'modified')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = (assign_genre, remove_genre, change_type, delete_film_works)
+    action_form = FilmWorkActionForm
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        return search_film_works(queryset, search_term), False
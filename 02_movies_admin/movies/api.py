@@ -0,0 +1,215 @@
+import base64
+import datetime
+import functools
+import hashlib
+import json
+import uuid
+from typing import Callable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q, QuerySet
+from django.http import Http404, HttpResponse, HttpResponseNotModified, JsonResponse
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_safe
+from movies.caching import FILM_WORK, GENRE, PERSON, get_film_work, get_genre, get_person, get_version
+from movies.models import FilmWorkDetail, Genre
+from movies.read_model import FILM_WORK_FIELDS, get_persons_queryset, serialize_film_work, serialize_person
+
+"""
+JSON API только для чтения.
+Списки выводятся по ключу (курсор - последние значения сортировки предыдущей страницы) без OFFSET и COUNT,
+кинопроизведения читаются из FilmWorkDetail одним запросом на страницу, персоны - одним запросом с агрегацией.
+Тела ответов кэшируются на API_CACHE_TIMEOUT секунд или до изменения данных: в ключ входит версия записи
+для ответа одной записи или версия списка для страницы списка (movies.caching),
+ETag - хэш тела, при совпадении If-None-Match ответ 304
+"""
+
+CURSOR_VAR = 'cursor'
+PAGE_SIZE_VAR = 'page_size'
+ORDERING_VAR = 'ordering'
+API_CACHE_PREFIX = 'movies:api'
+
+
+class BadRequest(Exception):
+    pass
+
+
+def encode_cursor(values: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values, cls=DjangoJSONEncoder).encode()).decode()
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """
+    Значения курсора: список из size строк или null, как их записывает encode_cursor
+    """
+
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        values = None
+    if (
+        not isinstance(values, list)
+        or len(values) != size
+        or not all(value is None or isinstance(value, str) for value in values)
+    ):
+        raise BadRequest(f'Некорректный курсор: {cursor}')
+    return values
+
+
+def get_page_size(request) -> int:
+    try:
+        page_size = int(request.GET.get(PAGE_SIZE_VAR, settings.API_PAGE_SIZE))
+    except ValueError:
+        raise BadRequest(f'Некорректный размер страницы: {request.GET[PAGE_SIZE_VAR]}')
+    return max(1, min(page_size, settings.API_MAX_PAGE_SIZE))
+
+
+def get_next_url(request, rows: List[dict], page_size: int, cursor_fields: Tuple[str, ...]) -> Optional[str]:
+    if len(rows) < page_size:
+        return None
+    params = request.GET.copy()
+    params[CURSOR_VAR] = encode_cursor([rows[-1][field] for field in cursor_fields])
+    return request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+
+
+def get_body_cache_key(path: str, version: str) -> str:
+    return f'{API_CACHE_PREFIX}:{version}:{hashlib.md5(path.encode()).hexdigest()}'
+
+
+def encode_body(data) -> Tuple[bytes, str]:
+    body = json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False).encode()
+    return body, f'"{hashlib.md5(body).hexdigest()}"'
+
+
+def get_cached_body(key: str, version: str, build: Callable[[], object]) -> Tuple[bytes, str]:
+    cache_key = get_body_cache_key(key, version)
+    cached = cache.get(cache_key)
+    if cached is None:
+        cached = encode_body(build())
+        cache.set(cache_key, cached, settings.API_CACHE_TIMEOUT)
+    return cached
+
+
+def get_error_response(exc: BadRequest) -> HttpResponse:
+    return JsonResponse({'error': str(exc)}, status=400)
+
+
+def get_body_response(request, body: bytes, etag: str) -> HttpResponse:
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=settings.API_CACHE_TIMEOUT)
+    return response
+
+
+def get_api_response(request, version: str, build: Callable[[], object]) -> HttpResponse:
+    try:
+        body, etag = get_cached_body(request.get_full_path(), version, build)
+    except BadRequest as exc:
+        return get_error_response(exc)
+    return get_body_response(request, body, etag)
+
+
+def api_view(name: str):
+    """
+    Ответ представления сущности name кэшируется по полному пути запроса и версии записи pk
+    или, без pk, версии списка, ошибки параметров - ответ 400
+    """
+
+    def decorator(view):
+        @require_safe
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            version = get_version(name, kwargs.get('pk'))
+            return get_api_response(request, version, lambda: view(request, *args, **kwargs))
+
+        return wrapper
+
+    return decorator
+
+
+def get_keyset_page(request, queryset: QuerySet, cursor_filter: Callable[[list], Q], ordering: Tuple[str, ...]):
+    page_size = get_page_size(request)
+    if cursor := request.GET.get(CURSOR_VAR):
+        try:
+            queryset = queryset.filter(cursor_filter(decode_cursor(cursor, size=len(ordering))))
+        except (TypeError, ValueError):
+            raise BadRequest(f'Некорректный курсор: {cursor}')
+    return list(queryset.order_by(*ordering)[:page_size]), page_size
+
+
+def film_works_after_creation_date(cursor: list) -> Q:
+    # даты создания по возрастанию, кинопроизведения без даты в конце (NULLS LAST)
+    creation_date, pk = cursor
+    pk = uuid.UUID(pk)
+    if creation_date is None:
+        return Q(creation_date__isnull=True, pk__gt=pk)
+    creation_date = datetime.date.fromisoformat(creation_date)
+    return (
+        Q(creation_date__gt=creation_date) | Q(creation_date=creation_date, pk__gt=pk) | Q(creation_date__isnull=True)
+    )
+
+
+@api_view(FILM_WORK)
+def film_works(request):
+    queryset = FilmWorkDetail.objects.values(*FILM_WORK_FIELDS)
+    if request.GET.get(ORDERING_VAR) == 'creation_date':
+        cursor_fields = ('creation_date', 'film_work_id')
+        rows, page_size = get_keyset_page(request, queryset, film_works_after_creation_date, cursor_fields)
+    elif request.GET.get(ORDERING_VAR, 'id') == 'id':
+        cursor_fields = ('film_work_id',)
+        rows, page_size = get_keyset_page(request, queryset, lambda cursor: Q(pk__gt=uuid.UUID(cursor[0])), ('pk',))
+    else:
+        raise BadRequest(f'Некорректная сортировка: {request.GET[ORDERING_VAR]}')
+    return {
+        'results': [serialize_film_work(row) for row in rows],
+        'next': get_next_url(request, rows, page_size, cursor_fields),
+    }
+
+
+@api_view(FILM_WORK)
+def film_work(request, pk: uuid.UUID):
+    if (row := get_film_work(pk)) is None:
+        raise Http404
+    return row
+
+
+@api_view(PERSON)
+def persons(request):
+    rows, page_size = get_keyset_page(
+        request, get_persons_queryset(), lambda cursor: Q(pk__gt=uuid.UUID(cursor[0])), ('pk',)
+    )
+    return {
+        'results': [serialize_person(row) for row in rows],
+        'next': get_next_url(request, rows, page_size, ('id',)),
+    }
+
+
+@api_view(PERSON)
+def person(request, pk: uuid.UUID):
+    if (row := get_person(pk)) is None:
+        raise Http404
+    return row
+
+
+@api_view(GENRE)
+def genres(request):
+    rows, page_size = get_keyset_page(
+        request,
+        Genre.objects.values('id', 'name', 'description'),
+        lambda cursor: Q(pk__gt=uuid.UUID(cursor[0])),
+        ('pk',),
+    )
+    return {'results': rows, 'next': get_next_url(request, rows, page_size, ('id',))}
+
+
+@api_view(GENRE)
+def genre(request, pk: uuid.UUID):
+    if (instance := get_genre(pk)) is None:
+        raise Http404
+    return {'id': instance.pk, 'name': instance.name, 'description': instance.description}
@@ -0,0 +1,233 @@
+import asyncio
+import datetime
+import functools
+import json
+import uuid
+import weakref
+from typing import Callable, List, Optional
+
+import asyncpg
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.http import Http404, HttpResponseNotAllowed
+from movies import api
+from movies.caching import FILM_WORK, GENRE, PERSON, get_version
+from movies.read_model import FILM_WORK_FIELDS, serialize_film_work, serialize_person
+
+"""
+Асинхронные представления JSON API для запуска под ASGI (config/asgi.py), те же ответы, что у movies.api.
+В Django 3.2 нет асинхронного ORM, поэтому записи читаются драйвером asyncpg из пула соединений цикла событий
+(не больше DB_ASYNC_POOL_SIZE): ожидание ответа базы не занимает поток, и одновременные запросы
+не ограничены пулом потоков sync_to_async. Запросы повторяют выборки movies.api и используют те же индексы.
+Кэш ответов общий с movies.api, обращения к кэшу Django синхронные и выполняются в пуле потоков
+"""
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+FILM_WORK_COLUMNS = ', '.join(FILM_WORK_FIELDS)
+FILM_WORKS_QUERY = f'SELECT {FILM_WORK_COLUMNS} FROM content.film_work_detail {{where}} ORDER BY {{ordering}} {{limit}}'
+FILM_WORK_QUERY = f'SELECT {FILM_WORK_COLUMNS} FROM content.film_work_detail WHERE film_work_id = $1'
+
+PERSONS_QUERY = '''
+SELECT p.id, p.full_name,
+    jsonb_agg(jsonb_build_object('id', pfw.film_work_id, 'role', pfw.role) ORDER BY pfw.film_work_id)
+        FILTER (WHERE pfw.id IS NOT NULL) AS film_works
+FROM content.person p
+LEFT JOIN content.person_film_work pfw ON pfw.person_id = p.id
+{where}
+GROUP BY p.id
+ORDER BY {ordering}
+{limit}
+'''
+
+GENRES_QUERY = 'SELECT id, name, description FROM content.genre {where} ORDER BY {ordering} {limit}'
+
+# пул создается при первом запросе в цикле событий и работает только в нем
+_pools = weakref.WeakKeyDictionary()
+
+
+async def init_connection(connection: asyncpg.Connection):
+    await connection.set_type_codec('jsonb', encoder=json.dumps, decoder=json.loads, schema='pg_catalog')
+
+
+async def create_pool() -> asyncpg.Pool:
+    database = connections['default'].settings_dict
+    return await asyncpg.create_pool(
+        host=database['HOST'],
+        port=database['PORT'],
+        user=database['USER'],
+        password=database['PASSWORD'],
+        database=database['NAME'],
+        min_size=0,
+        max_size=settings.DB_ASYNC_POOL_SIZE,
+        init=init_connection,
+    )
+
+
+async def get_pool() -> asyncpg.Pool:
+    loop = asyncio.get_running_loop()
+    if loop not in _pools:
+        # одновременные первые запросы ждут одну задачу создания пула
+        _pools[loop] = loop.create_task(create_pool())
+    return await _pools[loop]
+
+
+async def close_pool():
+    """
+    Закрытие пула текущего цикла событий, например перед завершением цикла в тестах и замерах
+    """
+
+    loop = asyncio.get_running_loop()
+    if loop in _pools:
+        await (await _pools.pop(loop)).close()
+
+
+async def fetch(query: str, *args) -> List[dict]:
+    pool = await get_pool()
+    return [dict(row) for row in await pool.fetch(query, *args)]
+
+
+async def fetch_one(query: str, *args) -> Optional[dict]:
+    pool = await get_pool()
+    row = await pool.fetchrow(query, *args)
+    return row and dict(row)
+
+
+def get_cursor(request, size: int, parse: Callable[[list], list]) -> Optional[list]:
+    if not (cursor := request.GET.get(api.CURSOR_VAR)):
+        return None
+    try:
+        return parse(api.decode_cursor(cursor, size=size))
+    except (TypeError, ValueError):
+        raise api.BadRequest(f'Некорректный курсор: {cursor}')
+
+
+def parse_id_cursor(values: list) -> list:
+    return [uuid.UUID(values[0])]
+
+
+def parse_creation_date_cursor(values: list) -> list:
+    creation_date, pk = values
+    return [creation_date and datetime.date.fromisoformat(creation_date), uuid.UUID(pk)]
+
+
+def get_id_page_query(request, query: str, column: str) -> tuple:
+    """
+    Запрос страницы списка по возрастанию id и его параметры, как get_keyset_page в movies.api
+    """
+
+    page_size = api.get_page_size(request)
+    if cursor := get_cursor(request, size=1, parse=parse_id_cursor):
+        where, args = f'WHERE {column} > $1', cursor
+    else:
+        where, args = '', []
+    query = query.format(where=where, ordering=column, limit=f'LIMIT ${len(args) + 1}')
+    return query, [*args, page_size], page_size
+
+
+def get_creation_date_page_query(request) -> tuple:
+    """
+    Страница кинопроизведений по дате создания, без даты - в конце, как film_works_after_creation_date
+    """
+
+    page_size = api.get_page_size(request)
+    cursor = get_cursor(request, size=2, parse=parse_creation_date_cursor)
+    if cursor is None:
+        where, args = '', []
+    elif cursor[0] is None:
+        where, args = 'WHERE creation_date IS NULL AND film_work_id > $1', cursor[1:]
+    else:
+        where = 'WHERE creation_date > $1 OR creation_date = $1 AND film_work_id > $2 OR creation_date IS NULL'
+        args = cursor
+    query = FILM_WORKS_QUERY.format(
+        where=where, ordering='creation_date, film_work_id', limit=f'LIMIT ${len(args) + 1}'
+    )
+    return query, [*args, page_size], page_size
+
+
+def get_cached_entry(request, name: str, pk) -> tuple:
+    cache_key = api.get_body_cache_key(request.get_full_path(), get_version(name, pk))
+    return cache_key, cache.get(cache_key)
+
+
+def async_api_view(name: str):
+    """
+    Асинхронное представление сущности name: ответ кэшируется как в movies.api.api_view
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in SAFE_METHODS:
+                return HttpResponseNotAllowed(SAFE_METHODS)
+            get_entry = sync_to_async(get_cached_entry, thread_sensitive=False)
+            cache_key, cached = await get_entry(request, name, kwargs.get('pk'))
+            if cached is None:
+                try:
+                    cached = api.encode_body(await view(request, *args, **kwargs))
+                except api.BadRequest as exc:
+                    return api.get_error_response(exc)
+                await sync_to_async(cache.set, thread_sensitive=False)(cache_key, cached, settings.API_CACHE_TIMEOUT)
+            return api.get_body_response(request, *cached)
+
+        return wrapper
+
+    return decorator
+
+
+@async_api_view(FILM_WORK)
+async def film_works(request) -> dict:
+    ordering = request.GET.get(api.ORDERING_VAR, 'id')
+    if ordering == 'creation_date':
+        cursor_fields = ('creation_date', 'film_work_id')
+        query, args, page_size = get_creation_date_page_query(request)
+    elif ordering == 'id':
+        cursor_fields = ('film_work_id',)
+        query, args, page_size = get_id_page_query(request, FILM_WORKS_QUERY, 'film_work_id')
+    else:
+        raise api.BadRequest(f'Некорректная сортировка: {ordering}')
+    rows = await fetch(query, *args)
+    return {
+        'results': [serialize_film_work(row) for row in rows],
+        'next': api.get_next_url(request, rows, page_size, cursor_fields),
+    }
+
+
+@async_api_view(FILM_WORK)
+async def film_work(request, pk: uuid.UUID) -> dict:
+    if (row := await fetch_one(FILM_WORK_QUERY, pk)) is None:
+        raise Http404
+    return serialize_film_work(row)
+
+
+@async_api_view(PERSON)
+async def persons(request) -> dict:
+    query, args, page_size = get_id_page_query(request, PERSONS_QUERY, 'p.id')
+    rows = await fetch(query, *args)
+    return {
+        'results': [serialize_person(row) for row in rows],
+        'next': api.get_next_url(request, rows, page_size, ('id',)),
+    }
+
+
+@async_api_view(PERSON)
+async def person(request, pk: uuid.UUID) -> dict:
+    if (row := await fetch_one(PERSONS_QUERY.format(where='WHERE p.id = $1', ordering='p.id', limit=''), pk)) is None:
+        raise Http404
+    return serialize_person(row)
+
+
+@async_api_view(GENRE)
+async def genres(request) -> dict:
+    query, args, page_size = get_id_page_query(request, GENRES_QUERY, 'id')
+    rows = await fetch(query, *args)
+    return {'results': rows, 'next': api.get_next_url(request, rows, page_size, ('id',))}
+
+
+@async_api_view(GENRE)
+async def genre(request, pk: uuid.UUID) -> dict:
+    if (row := await fetch_one(GENRES_QUERY.format(where='WHERE id = $1', ordering='id', limit=''), pk)) is None:
+        raise Http404
+    return row
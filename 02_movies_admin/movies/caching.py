@@ -0,0 +1,135 @@
+import threading
+import uuid
+from collections import Counter
+from typing import Callable, Dict, Iterable, Optional
+
+from django.core.cache import cache
+from django.db import transaction
+from movies.models import FilmWorkDetail, Genre
+from movies.read_model import FILM_WORK_FIELDS, get_persons_queryset, serialize_film_work, serialize_person
+
+"""
+Кэширование жанров, сериализованных персон и кинопроизведений в кэше Django (см. config/components/cache.py).
+У каждой записи и у списка записей каждой сущности своя версия в кэше, версия входит в ключи записей
+и ответов API (movies.api). Изменение (movies.signals, movies.actions) после фиксации транзакции
+меняет версии только затронутых записей и тех списков, в строках которых есть измененные данные:
+например, новое имя персоны меняет версии персоны, списка персон, ее кинопроизведений и их списка,
+а список жанров остается в кэше. Записи со старой версией вытесняются по таймауту кэша.
+Попадания и промахи считаются в процессе
+"""
+
+CACHE_PREFIX = 'movies'
+GENRE = 'genre'
+PERSON = 'person'
+FILM_WORK = 'film_work'
+
+_missing = object()
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def count(name: str, hit: bool):
+    with _stats_lock:
+        _stats[f'{name}_{"hits" if hit else "misses"}'] += 1
+
+
+def get_cache_stats() -> Dict[str, int]:
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def new_version() -> str:
+    # случайная версия не совпадает с прежней, поэтому ключи версий хранятся с обычным таймаутом:
+    # после вытеснения ключа версии записи со старой версией просто не читаются
+    return uuid.uuid4().hex
+
+
+def get_version_key(name: str, pk=None) -> str:
+    if pk is None:
+        return f'{CACHE_PREFIX}:version:{name}'
+    return f'{CACHE_PREFIX}:version:{name}:{pk}'
+
+
+def get_version(name: str, pk=None) -> str:
+    """
+    Версия записи сущности name с ключом pk, без pk - версия списка записей
+    """
+
+    return cache.get_or_set(get_version_key(name, pk), new_version)
+
+
+def get_key(name: str, pk) -> str:
+    return f'{CACHE_PREFIX}:{name}:{pk}:{get_version(name, pk)}'
+
+
+def get_cached(name: str, pk, load: Callable[[], object]):
+    """
+    Значение из кэша или из load(), отсутствие записи (None) тоже кэшируется
+    """
+
+    key = get_key(name, pk)
+    value = cache.get(key, _missing)
+    count(name, hit=value is not _missing)
+    if value is _missing:
+        value = load()
+        cache.set(key, value)
+    return value
+
+
+def get_genre(pk) -> Optional[Genre]:
+    return get_cached(GENRE, pk, lambda: Genre.objects.filter(pk=pk).first())
+
+
+def get_person(pk) -> Optional[dict]:
+    def load():
+        row = get_persons_queryset().filter(pk=pk).first()
+        return row and serialize_person(row)
+
+    return get_cached(PERSON, pk, load)
+
+
+def get_film_work(pk) -> Optional[dict]:
+    def load():
+        row = FilmWorkDetail.objects.values(*FILM_WORK_FIELDS).filter(pk=pk).first()
+        return row and serialize_film_work(row)
+
+    return get_cached(FILM_WORK, pk, load)
+
+
+def invalidate(name: str, pks: Iterable, lists: Iterable[str] = ()):
+    """
+    Смена версий записей сущности name и списков lists после фиксации текущей транзакции, вне транзакции - сразу
+    """
+
+    keys = [get_version_key(name, pk) for pk in pks] + [get_version_key(list_name) for list_name in lists]
+    if keys:
+        transaction.on_commit(lambda: cache.set_many(dict.fromkeys(keys, new_version())))
+
+
+def invalidate_film_works(pks: Iterable):
+    pks = list(pks)
+    if pks:
+        invalidate(FILM_WORK, pks, lists=(FILM_WORK,))
+
+
+def invalidate_genre(pk, film_work_ids: Iterable = ()):
+    """
+    Жанр, список жанров и кинопроизведения film_work_ids с названием жанра
+    """
+
+    invalidate(GENRE, [pk], lists=(GENRE,))
+    invalidate_film_works(film_work_ids)
+
+
+def invalidate_person(pk, film_work_ids: Iterable = ()):
+    """
+    Персона, список персон и кинопроизведения film_work_ids с ее именем
+    """
+
+    invalidate(PERSON, [pk], lists=(PERSON,))
+    invalidate_film_works(film_work_ids)
@@ -0,0 +1,163 @@
+import json
+import uuid
+from typing import Optional
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import PAGE_VAR, ChangeList
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Exists, OuterRef
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from movies.models import Genre, GenreFilmWork
+
+"""
+Список кинопроизведений в админке для больших таблиц: оценка количества записей вместо COUNT(*),
+постраничный вывод по ключу (id) вместо OFFSET и кэшированный список жанров для фильтра
+"""
+
+AFTER_VAR = 'after'
+BEFORE_VAR = 'before'
+KEYSET_ORDERING = ('-pk',)
+GENRE_CHOICES_CACHE_KEY = 'movies:admin:genre_choices'
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Количество записей без фильтров берется из pg_class.reltuples, с фильтрами - из оценки планировщика.
+    Если оценка меньше ADMIN_COUNT_ESTIMATE_THRESHOLD, записи считаются точно
+    """
+
+    estimated = False
+
+    def get_estimate(self) -> Optional[int]:
+        queryset = self.object_list.order_by()
+        connection = connections[queryset.db]
+        with connection.cursor() as cursor:
+            if not queryset.query.where:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                    (connection.ops.quote_name(queryset.model._meta.db_table),),
+                )
+                estimate = cursor.fetchone()[0]
+            else:
+                sql, params = queryset.query.sql_with_params()
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                estimate = plan[0]['Plan']['Plan Rows']
+        # у таблицы без статистики reltuples равен -1
+        return estimate if estimate >= 0 else None
+
+    @cached_property
+    def count(self) -> int:
+        estimate = self.get_estimate()
+        if estimate is not None and estimate >= settings.ADMIN_COUNT_ESTIMATE_THRESHOLD:
+            self.estimated = True
+            return estimate
+        return super().count
+
+
+class KeysetChangeList(ChangeList):
+    """
+    При сортировке по умолчанию (-pk) страницы выбираются условием id < последнего id предыдущей страницы
+    (параметр after) или id > первого id следующей (before), по индексу первичного ключа без OFFSET.
+    При сортировке по столбцу список выводится обычными страницами
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.after = request.GET.get(AFTER_VAR)
+        self.before = request.GET.get(BEFORE_VAR)
+        self.keyset_previous = None
+        self.keyset_next = None
+        super().__init__(request, *args, **kwargs)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(AFTER_VAR, None)
+        lookup_params.pop(BEFORE_VAR, None)
+        return lookup_params
+
+    @property
+    def keyset_pagination(self) -> bool:
+        return tuple(self.queryset.query.order_by) == KEYSET_ORDERING and not self.show_all
+
+    def get_results(self, request):
+        if not self.keyset_pagination:
+            self.after = self.before = None
+            return super().get_results(request)
+
+        super().get_results(request)
+        if not self.multi_page:
+            return
+
+        # на одну запись больше страницы, чтобы знать, есть ли следующая (или предыдущая) страница
+        per_page = self.list_per_page
+        try:
+            if self.after:
+                rows = list(self.queryset.filter(pk__lt=uuid.UUID(self.after))[: per_page + 1])
+                has_previous, has_next = True, len(rows) > per_page
+                self.result_list = rows[:per_page]
+            elif self.before:
+                before = uuid.UUID(self.before)
+                page_ids = list(
+                    self.queryset.filter(pk__gt=before).order_by('pk').values_list('pk', flat=True)[: per_page + 1]
+                )
+                has_previous, has_next = len(page_ids) > per_page, True
+                self.result_list = self.queryset.filter(pk__gt=before, pk__lte=max(page_ids[:per_page], default=before))
+            else:
+                rows = list(self.queryset[: per_page + 1])
+                has_previous, has_next = False, len(rows) > per_page
+                self.result_list = rows[:per_page]
+        except ValueError:
+            raise IncorrectLookupParameters
+
+        page = list(self.result_list)
+        if has_previous and page:
+            self.keyset_previous = self.get_query_string({BEFORE_VAR: page[0].pk}, [AFTER_VAR, PAGE_VAR])
+        if has_next and page:
+            self.keyset_next = self.get_query_string({AFTER_VAR: page[-1].pk}, [BEFORE_VAR, PAGE_VAR])
+
+    def get_query_string(self, new_params=None, remove=None):
+        # ссылки фильтров и сортировки начинают список с первой страницы
+        remove = list(remove or ())
+        if not new_params or (AFTER_VAR not in new_params and BEFORE_VAR not in new_params):
+            remove += [AFTER_VAR, BEFORE_VAR]
+        return super().get_query_string(new_params, remove)
+
+
+def get_genre_choices() -> list:
+    return cache.get_or_set(
+        GENRE_CHOICES_CACHE_KEY,
+        lambda: list(Genre.objects.order_by('name').values_list('id', 'name')),
+        settings.ADMIN_FILTER_CACHE_TIMEOUT,
+    )
+
+
+def invalidate_genre_choices():
+    cache.delete(GENRE_CHOICES_CACHE_KEY)
+
+
+class GenreListFilter(admin.SimpleListFilter):
+    """
+    Фильтр по жанру: список жанров кэшируется, фильтрация подзапросом EXISTS без JOIN и DISTINCT
+    """
+
+    title = _('genre')
+    parameter_name = 'genre'
+
+    def lookups(self, request, model_admin):
+        return get_genre_choices()
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        try:
+            genre_id = uuid.UUID(self.value())
+        except ValueError:
+            raise IncorrectLookupParameters
+        return queryset.filter(Exists(GenreFilmWork.objects.filter(film_work=OuterRef('pk'), genre_id=genre_id)))
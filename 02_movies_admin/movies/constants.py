@@ -4,3 +4,7 @@ from django.db import models
 class FilmWorkType(models.TextChoices):
     MOVIE = 'movie', 'Фильм'
     TV_SHOW = 'tv_show', 'ТВ-шоу'
+
+
+# конфигурация полнотекстового поиска: названия и описания бывают на русском и английском, поэтому без стемминга
+SEARCH_CONFIG = 'simple'
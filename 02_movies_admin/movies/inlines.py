@@ -0,0 +1,65 @@
+from typing import Dict, Optional
+
+from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.forms.models import BaseInlineFormSet
+
+"""
+Встроенные формы связей кинопроизведения без запроса на каждую строку.
+Связи выбираются вместе со связанными записями (select_related), а виджет автодополнения
+берет подпись выбранного значения из уже загруженных записей вместо отдельного запроса
+"""
+
+
+class PrefetchedAutocompleteSelect(AutocompleteSelect):
+    prefetched: Optional[Dict[str, object]] = None
+
+    def optgroups(self, name, value, attr=None):
+        selected = [str(v) for v in value if str(v) not in self.choices.field.empty_values]
+        if self.prefetched is None or any(choice not in self.prefetched for choice in selected):
+            return super().optgroups(name, value, attr)
+
+        default = (None, [], 0)
+        if not self.is_required:
+            default[1].append(self.create_option(name, '', '', False, 0))
+        for choice in selected[:1]:
+            obj = self.prefetched[choice]
+            default[1].append(
+                self.create_option(name, obj.pk, self.choices.field.label_from_instance(obj), True, len(default[1]))
+            )
+        return [default]
+
+
+class PrefetchedInlineFormSet(BaseInlineFormSet):
+    def get_prefetched(self, field_name: str) -> Dict[str, object]:
+        prefetched = self.__dict__.setdefault('_prefetched', dict())
+        if field_name not in prefetched:
+            related = (getattr(instance, field_name) for instance in self.get_queryset())
+            prefetched[field_name] = {str(obj.pk): obj for obj in related}
+        return prefetched[field_name]
+
+    def _construct_form(self, i, **kwargs):
+        form = super()._construct_form(i, **kwargs)
+        for field_name, field in form.fields.items():
+            widget = getattr(field.widget, 'widget', field.widget)
+            if isinstance(widget, PrefetchedAutocompleteSelect):
+                widget.prefetched = self.get_prefetched(field_name)
+        return form
+
+
+class PrefetchedAutocompleteInline(admin.TabularInline):
+    """
+    Строки выбираются одним запросом со связанными записями полей autocomplete_fields
+    """
+
+    formset = PrefetchedInlineFormSet
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(*self.autocomplete_fields)
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in self.get_autocomplete_fields(request):
+            kwargs.setdefault(
+                'widget', PrefetchedAutocompleteSelect(db_field, self.admin_site, using=kwargs.get('using'))
+            )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
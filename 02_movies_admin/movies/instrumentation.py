@@ -0,0 +1,216 @@
+import asyncio
+import heapq
+import json
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from config.postgresql.base import get_connection_metrics
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from movies.caching import get_cache_stats
+
+"""
+Замеры запросов к базе в продакшене: для доли запросов INSTRUMENTATION_SAMPLE_RATE считаются количество запросов
+к базе, их суммарное время, самые медленные запросы и время ответа представления.
+Запросы медленнее INSTRUMENTATION_SLOW_REQUEST_MS или с количеством запросов к базе не меньше
+INSTRUMENTATION_QUERY_COUNT_THRESHOLD пишутся в лог movies.instrumentation одной строкой JSON.
+Суммы по представлениям, счетчики соединений и кэша отдаются в текстовом формате Prometheus по /metrics/
+с токеном INSTRUMENTATION_METRICS_TOKEN; счетчики ведутся в каждом процессе отдельно (метка pid).
+Сборщик запроса передается через контекстную переменную, поэтому учитываются и запросы к базе,
+выполненные в других потоках через sync_to_async (представления ASGI)
+"""
+
+logger = logging.getLogger(__name__)
+
+UNRESOLVED_VIEW = '<unresolved>'
+SQL_MAX_LENGTH = 1000
+
+_views: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+_views_lock = threading.Lock()
+_collector: ContextVar[Optional['QueryCollector']] = ContextVar('query_collector', default=None)
+
+
+class QueryCollector:
+    """
+    Обертка выполнения запросов (connection.execute_wrapper): количество, суммарное время и самые медленные запросы
+    """
+
+    def __init__(self, slowest: int):
+        self.slowest = slowest
+        self.count = 0
+        self.seconds = 0.0
+        self.queries: List[Tuple[float, int, str]] = list()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            seconds = time.perf_counter() - started
+            self.count += 1
+            self.seconds += seconds
+            # в куче хранится не больше slowest самых медленных запросов, номер запроса различает равное время
+            query = (seconds, self.count, sql[:SQL_MAX_LENGTH])
+            if len(self.queries) < self.slowest:
+                heapq.heappush(self.queries, query)
+            elif self.queries and query > self.queries[0]:
+                heapq.heapreplace(self.queries, query)
+
+    def get_slowest(self) -> List[dict]:
+        return [
+            {'ms': round(seconds * 1000, 2), 'sql': sql}
+            for seconds, _, sql in sorted(self.queries, reverse=True)
+            if seconds * 1000 >= settings.INSTRUMENTATION_SLOW_QUERY_MS
+        ]
+
+
+def collect_query(execute, sql, params, many, context):
+    collector = _collector.get()
+    if collector is None:
+        return execute(sql, params, many, context)
+    return collector(execute, sql, params, many, context)
+
+
+def install(connection):
+    """
+    Обертка выполнения запросов устанавливается в каждое соединение при подключении (сигнал connection_created)
+    """
+
+    if collect_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(collect_query)
+
+
+def record(view: str, seconds: float, collector: QueryCollector):
+    with _views_lock:
+        metrics = _views[view]
+        metrics['requests'] += 1
+        metrics['seconds'] += seconds
+        metrics['max_seconds'] = max(metrics['max_seconds'], seconds)
+        metrics['queries'] += collector.count
+        metrics['query_seconds'] += collector.seconds
+
+
+def get_view_metrics() -> Dict[str, Dict[str, float]]:
+    with _views_lock:
+        return {view: dict(metrics) for view, metrics in _views.items()}
+
+
+def reset_view_metrics():
+    with _views_lock:
+        _views.clear()
+
+
+class QueryInstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(self.get_response):
+            # обработчик ASGI вызывает промежуточный слой как корутину без адаптации
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if random.random() >= settings.INSTRUMENTATION_SAMPLE_RATE:
+            return self.get_response(request)
+
+        collector = QueryCollector(slowest=settings.INSTRUMENTATION_SLOWEST_QUERIES)
+        token = _collector.set(collector)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _collector.reset(token)
+        self.process(request, response, time.perf_counter() - started, collector)
+        return response
+
+    async def __acall__(self, request):
+        if random.random() >= settings.INSTRUMENTATION_SAMPLE_RATE:
+            return await self.get_response(request)
+
+        collector = QueryCollector(slowest=settings.INSTRUMENTATION_SLOWEST_QUERIES)
+        token = _collector.set(collector)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _collector.reset(token)
+        self.process(request, response, time.perf_counter() - started, collector)
+        return response
+
+    @staticmethod
+    def process(request, response, seconds: float, collector: QueryCollector):
+        match = request.resolver_match
+        view = match.view_name if match else UNRESOLVED_VIEW
+        record(view, seconds, collector)
+        if (
+            seconds * 1000 >= settings.INSTRUMENTATION_SLOW_REQUEST_MS
+            or collector.count >= settings.INSTRUMENTATION_QUERY_COUNT_THRESHOLD
+        ):
+            logger.warning(
+                json.dumps(
+                    {
+                        'event': 'slow_request',
+                        'view': view,
+                        'method': request.method,
+                        'path': request.path,
+                        'status': response.status_code,
+                        'ms': round(seconds * 1000, 2),
+                        'queries': collector.count,
+                        'sql_ms': round(collector.seconds * 1000, 2),
+                        'slowest': collector.get_slowest(),
+                    },
+                    ensure_ascii=False,
+                )
+            )
+
+
+def format_labels(labels: Dict[str, object]) -> str:
+    values = (
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels.items()
+    )
+    return '{' + ','.join(values) + '}'
+
+
+def get_metrics_lines() -> List[str]:
+    connection_metrics = get_connection_metrics()
+    pid = connection_metrics.pop('pid')
+    pool_idle = connection_metrics.pop('pool_idle')
+    lines = list()
+
+    def add(name: str, kind: str, samples: List[Tuple[Dict[str, object], float]]):
+        lines.append(f'# TYPE {name} {kind}')
+        lines.extend(f'{name}{format_labels(dict(labels, pid=pid))} {value}' for labels, value in samples)
+
+    views = sorted(get_view_metrics().items())
+    add('movies_http_requests_total', 'counter', [({'view': view}, m['requests']) for view, m in views])
+    add('movies_http_request_seconds_sum', 'counter', [({'view': view}, m['seconds']) for view, m in views])
+    add('movies_http_request_seconds_max', 'gauge', [({'view': view}, m['max_seconds']) for view, m in views])
+    add('movies_db_queries_total', 'counter', [({'view': view}, m['queries']) for view, m in views])
+    add('movies_db_query_seconds_sum', 'counter', [({'view': view}, m['query_seconds']) for view, m in views])
+    add(
+        'movies_db_connections_total',
+        'counter',
+        [({'event': name}, value) for name, value in connection_metrics.items()],
+    )
+    add('movies_db_pool_idle_connections', 'gauge', [({}, pool_idle)])
+    add(
+        'movies_cache_requests_total', 'counter', [({'name': name}, value) for name, value in get_cache_stats().items()]
+    )
+    return lines
+
+
+def metrics(request):
+    token = settings.INSTRUMENTATION_METRICS_TOKEN
+    if not token or not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        raise Http404
+    return HttpResponse('\n'.join(get_metrics_lines()) + '\n', content_type='text/plain; version=0.0.4')
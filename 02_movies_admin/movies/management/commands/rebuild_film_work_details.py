@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from movies.models import FilmWorkDetail
+from movies.read_model import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Полный пересчет FilmWorkDetail, например после загрузки данных из SQLite'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with transaction.atomic():
+            rebuild()
+        self.stdout.write(
+            f'Пересчитано записей: {FilmWorkDetail.objects.count()} за {time.perf_counter() - started:.2f} с'
+        )
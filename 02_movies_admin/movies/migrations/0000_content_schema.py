@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # схема content создается до таблиц из 0001_initial: на базе, подготовленной schema.ddl
+    # из 01_schema_design, схема уже есть, а тестовая база строится только из миграций
+    initial = True
+
+    dependencies = []
+
+    run_before = [
+        ('movies', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunSQL('CREATE SCHEMA IF NOT EXISTS content', reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 3.2 on 2026-10-18 19:20
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+# заполнение по данным на момент этой миграции, независимо от последующих изменений movies.read_model
+FILL_FILM_WORK_DETAILS_SQL = '''
+INSERT INTO content.film_work_detail
+    (film_work_id, title, description, creation_date, rating, type, genres, persons, refreshed)
+SELECT fw.id, fw.title, fw.description, fw.creation_date, fw.rating, fw.type,
+    COALESCE((
+        SELECT array_agg(g.name ORDER BY g.name)
+        FROM content.genre_film_work gfw
+        JOIN content.genre g ON g.id = gfw.genre_id
+        WHERE gfw.film_work_id = fw.id
+    ), '{}'),
+    COALESCE((
+        SELECT jsonb_object_agg(roles.role, roles.persons)
+        FROM (
+            SELECT pfw.role, jsonb_agg(jsonb_build_object('id', p.id, 'full_name', p.full_name) ORDER BY p.full_name) persons
+            FROM content.person_film_work pfw
+            JOIN content.person p ON p.id = pfw.person_id
+            WHERE pfw.film_work_id = fw.id
+            GROUP BY pfw.role
+        ) roles
+    ), '{}'),
+    NOW()
+FROM content.film_work fw
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0002_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FilmWorkDetail',
+            fields=[
+                (
+                    'film_work',
+                    models.OneToOneField(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name='detail',
+                        serialize=False,
+                        to='movies.filmwork',
+                    ),
+                ),
+                ('title', models.TextField(verbose_name='title')),
+                ('description', models.TextField(blank=True, null=True, verbose_name='description')),
+                ('creation_date', models.DateField(blank=True, null=True, verbose_name='creation date')),
+                ('rating', models.FloatField(blank=True, null=True, verbose_name='rating')),
+                (
+                    'type',
+                    models.CharField(
+                        choices=[('movie', 'Фильм'), ('tv_show', 'ТВ-шоу')], max_length=15, verbose_name='type'
+                    ),
+                ),
+                (
+                    'genres',
+                    django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), default=list, size=None),
+                ),
+                ('persons', models.JSONField(default=dict)),
+                ('refreshed', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'content"."film_work_detail',
+            },
+        ),
+        migrations.RunSQL(FILL_FILM_WORK_DETAILS_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2 on 2026-10-18 19:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0003_film_work_detail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='filmworkdetail',
+            index=models.Index(fields=['creation_date', 'film_work'], name='film_work_detail_creation_idx'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 3.2 on 2026-10-18 19:34
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+# modified обновляется при изменении строки, если запрос не задал его сам (например, загрузка из SQLite
+# переносит исходное значение); повторная запись тех же значений modified не меняет
+SET_MODIFIED_FUNCTION = '''
+CREATE OR REPLACE FUNCTION content.set_modified() RETURNS trigger AS $$
+BEGIN
+    IF NEW.modified IS NOT DISTINCT FROM OLD.modified AND NEW IS DISTINCT FROM OLD THEN
+        NEW.modified := NOW();
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+'''
+
+TABLES = ('film_work', 'genre', 'person')
+
+
+def get_trigger_sql(table: str) -> str:
+    return (
+        f'CREATE TRIGGER {table}_modified BEFORE UPDATE ON content.{table} '
+        f'FOR EACH ROW EXECUTE PROCEDURE content.set_modified();'
+    )
+
+
+class Migration(migrations.Migration):
+    # индексы строятся без блокировки записи (CREATE INDEX CONCURRENTLY), это невозможно в транзакции
+    atomic = False
+
+    dependencies = [
+        ('movies', '0004_film_work_detail_creation_index'),
+    ]
+
+    operations = [
+        migrations.RunSQL(SET_MODIFIED_FUNCTION, reverse_sql='DROP FUNCTION content.set_modified();'),
+        *(
+            migrations.RunSQL(get_trigger_sql(table), reverse_sql=f'DROP TRIGGER {table}_modified ON content.{table};')
+            for table in TABLES
+        ),
+        migrations.AlterField(
+            model_name='filmwork',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, verbose_name='date and time of modifying'),
+        ),
+        migrations.AlterField(
+            model_name='genre',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, verbose_name='date and time of modifying'),
+        ),
+        migrations.AlterField(
+            model_name='person',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, verbose_name='date and time of modifying'),
+        ),
+        AddIndexConcurrently(
+            model_name='filmwork',
+            index=models.Index(fields=['modified'], name='film_work_modified_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='genre',
+            index=models.Index(fields=['modified'], name='genre_modified_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='person',
+            index=models.Index(fields=['modified'], name='person_modified_idx'),
+        ),
+    ]
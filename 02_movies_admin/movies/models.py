@@ -1,10 +1,13 @@
 import datetime
 import uuid
 
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.utils.translation import gettext_lazy as _
-from movies.constants import FilmWorkType
+from movies.constants import SEARCH_CONFIG, FilmWorkType
 
 
 class UUIDMixin(models.Model):
@@ -22,7 +25,8 @@ class CreatedMixin(models.Model):
 
 
 class ModifiedMixin(models.Model):
-    modified = models.DateTimeField(_('date and time of modifying'), default=datetime.datetime.utcnow)
+    # обновляется при save(), при UPDATE в обход модели - триггером базы (миграция 0005_modified_triggers)
+    modified = models.DateTimeField(_('date and time of modifying'), auto_now=True)
 
     class Meta:
         abstract = True
@@ -39,6 +43,7 @@ class Genre(UUIDMixin, CreatedMixin, ModifiedMixin):
         db_table = "content\".\"genre"
         verbose_name = _('genre')
         verbose_name_plural = _('genres')
+        indexes = (models.Index(fields=['modified'], name='genre_modified_idx'),)
 
 
 class Person(UUIDMixin, CreatedMixin, ModifiedMixin):
@@ -51,6 +56,10 @@ class Person(UUIDMixin, CreatedMixin, ModifiedMixin):
         db_table = "content\".\"person"
         verbose_name = _('person')
         verbose_name_plural = _('persons')
+        indexes = (
+            GinIndex(fields=['full_name'], name='person_full_name_trgm_idx', opclasses=['gin_trgm_ops']),
+            models.Index(fields=['modified'], name='person_modified_idx'),
+        )
 
 
 class PersonFilmWork(UUIDMixin, CreatedMixin):
@@ -91,4 +100,36 @@ class FilmWork(UUIDMixin, CreatedMixin, ModifiedMixin):
         db_table = "content\".\"film_work"
         verbose_name = _('filmwork')
         verbose_name_plural = _('filmworks')
-        indexes = (models.Index(fields=['creation_date']),)
+        indexes = (
+            models.Index(fields=['creation_date']),
+            GinIndex(fields=['title'], name='film_work_title_trgm_idx', opclasses=['gin_trgm_ops']),
+            GinIndex(SearchVector('title', 'description', config=SEARCH_CONFIG), name='film_work_search_idx'),
+            models.Index(fields=['modified'], name='film_work_modified_idx'),
+        )
+
+
+class FilmWorkDetail(models.Model):
+    """
+    Денормализованная запись кинопроизведения для чтения: названия жанров и персоны по ролям.
+    Обновляется из movies.read_model при изменении кинопроизведения и его связей
+    """
+
+    film_work = models.OneToOneField(
+        'movies.FilmWork', primary_key=True, on_delete=models.CASCADE, db_constraint=False, related_name='detail'
+    )
+    title = models.TextField(_('title'))
+    description = models.TextField(_('description'), null=True, blank=True)
+    creation_date = models.DateField(_('creation date'), null=True, blank=True)
+    rating = models.FloatField(_('rating'), null=True, blank=True)
+    type = models.CharField(_('type'), max_length=15, choices=FilmWorkType.choices)
+    genres = ArrayField(models.TextField(), default=list)
+    # роль -> список {"id": ..., "full_name": ...}
+    persons = models.JSONField(default=dict)
+    refreshed = models.DateTimeField()
+
+    def __str__(self):
+        return self.title
+
+    class Meta:
+        db_table = "content\".\"film_work_detail"
+        indexes = (models.Index(fields=['creation_date', 'film_work'], name='film_work_detail_creation_idx'),)
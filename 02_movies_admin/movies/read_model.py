@@ -0,0 +1,147 @@
+import threading
+from contextlib import contextmanager
+from typing import Iterable, Optional
+
+from django.contrib.postgres.aggregates import JSONBAgg
+from django.db import connection
+from django.db.models import Q, QuerySet
+from django.db.models.functions import JSONObject
+from movies.models import Person
+
+"""
+Обновление денормализованной модели FilmWorkDetail.
+Записи пересчитываются одним INSERT ... SELECT ... ON CONFLICT для затронутых кинопроизведений,
+записи удаленных кинопроизведений удаляются. Внутри deferred_refresh изменения накапливаются
+и пересчитываются одним запросом при выходе из блока.
+Здесь же выборка и сериализация персон с их кинопроизведениями, общие для API и кэша (movies.caching)
+"""
+
+REFRESH_QUERY = '''
+INSERT INTO content.film_work_detail
+    (film_work_id, title, description, creation_date, rating, type, genres, persons, refreshed)
+SELECT fw.id, fw.title, fw.description, fw.creation_date, fw.rating, fw.type,
+    COALESCE((
+        SELECT array_agg(g.name ORDER BY g.name)
+        FROM content.genre_film_work gfw
+        JOIN content.genre g ON g.id = gfw.genre_id
+        WHERE gfw.film_work_id = fw.id
+    ), '{{}}'),
+    COALESCE((
+        SELECT jsonb_object_agg(roles.role, roles.persons)
+        FROM (
+            SELECT pfw.role, jsonb_agg(jsonb_build_object('id', p.id, 'full_name', p.full_name) ORDER BY p.full_name) persons
+            FROM content.person_film_work pfw
+            JOIN content.person p ON p.id = pfw.person_id
+            WHERE pfw.film_work_id = fw.id
+            GROUP BY pfw.role
+        ) roles
+    ), '{{}}'),
+    NOW()
+FROM content.film_work fw
+{where}
+ON CONFLICT (film_work_id) DO UPDATE SET
+    title = EXCLUDED.title,
+    description = EXCLUDED.description,
+    creation_date = EXCLUDED.creation_date,
+    rating = EXCLUDED.rating,
+    type = EXCLUDED.type,
+    genres = EXCLUDED.genres,
+    persons = EXCLUDED.persons,
+    refreshed = EXCLUDED.refreshed
+'''
+
+DELETE_ORPHANS_QUERY = '''
+DELETE FROM content.film_work_detail d
+WHERE {where} AND NOT EXISTS (SELECT 1 FROM content.film_work fw WHERE fw.id = d.film_work_id)
+'''
+
+FILM_WORK_FIELDS = ('film_work_id', 'title', 'description', 'creation_date', 'rating', 'type', 'genres', 'persons')
+
+_local = threading.local()
+
+
+def serialize_film_work(row: dict) -> dict:
+    row = dict(row)
+    row['id'] = row.pop('film_work_id')
+    return row
+
+
+def get_persons_queryset() -> QuerySet:
+    return Person.objects.values('id', 'full_name').annotate(
+        film_works=JSONBAgg(
+            JSONObject(id='personfilmwork__film_work_id', role='personfilmwork__role'),
+            filter=Q(personfilmwork__isnull=False),
+            ordering='personfilmwork__film_work_id',
+        )
+    )
+
+
+def serialize_person(row: dict) -> dict:
+    return {**row, 'film_works': row['film_works'] or []}
+
+
+def refresh(where: str, params: Optional[tuple] = None, orphans_where: Optional[str] = None):
+    with connection.cursor() as cursor:
+        cursor.execute(REFRESH_QUERY.format(where=where), params)
+        if orphans_where:
+            cursor.execute(DELETE_ORPHANS_QUERY.format(where=orphans_where), params)
+
+
+def refresh_film_works(film_work_ids: Iterable):
+    film_work_ids = list(film_work_ids)
+    if not film_work_ids:
+        return
+    refresh(
+        where='WHERE fw.id = ANY(%s::uuid[])',
+        params=(film_work_ids,),
+        orphans_where='d.film_work_id = ANY(%s::uuid[])',
+    )
+
+
+def refresh_genre_film_works(genre_id):
+    refresh(
+        where='WHERE fw.id IN (SELECT film_work_id FROM content.genre_film_work WHERE genre_id = %s)',
+        params=(genre_id,),
+    )
+
+
+def refresh_person_film_works(person_id):
+    refresh(
+        where='WHERE fw.id IN (SELECT film_work_id FROM content.person_film_work WHERE person_id = %s)',
+        params=(person_id,),
+    )
+
+
+def rebuild():
+    """
+    Полный пересчет, например после загрузки данных в обход Django (03_sqlite_to_postgres)
+    """
+
+    refresh(where='', orphans_where='TRUE')
+
+
+def schedule_refresh(film_work_ids: Iterable):
+    pending = getattr(_local, 'pending', None)
+    if pending is None:
+        refresh_film_works(film_work_ids)
+    else:
+        pending.update(film_work_ids)
+
+
+@contextmanager
+def deferred_refresh():
+    """
+    Изменения кинопроизведений внутри блока пересчитываются одним запросом при выходе из него,
+    при исключении пересчет не выполняется (транзакция изменений откатывается)
+    """
+
+    if getattr(_local, 'pending', None) is not None:
+        yield
+        return
+
+    _local.pending = pending = set()
+    try:
+        yield
+    finally:
+        _local.pending = None
+    refresh_film_works(pending)
@@ -0,0 +1,102 @@
+import pickle
+import re
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
+
+"""
+Бэкенд кэша Django поверх Redis (в Django 3.2 своего нет).
+Клиент создается классом из OPTIONS['CLIENT_CLASS'] (по умолчанию redis.Redis) методом from_url,
+поэтому в тестах его можно заменить локальной заменой с тем же набором команд.
+clear() удаляет только ключи этого кэша (KEY_PREFIX): база Redis может быть общей с другими приложениями
+"""
+
+# количество ключей в одной команде DEL при очистке кэша
+CLEAR_BATCH_SIZE = 1000
+
+
+class RedisCache(BaseCache):
+    def __init__(self, server, params):
+        super().__init__(params)
+        self._server = server
+        client_class = params.get('OPTIONS', {}).get('CLIENT_CLASS', 'redis.Redis')
+        # без пакета redis (requirements.txt) кэш не создается, ошибка не откладывается до первого запроса
+        try:
+            self._client_class = import_string(client_class)
+        except ImportError as exc:
+            raise ImproperlyConfigured(f'Для CACHE_BACKEND=redis нужен клиент {client_class}: {exc}')
+
+    @cached_property
+    def client(self):
+        return self._client_class.from_url(self._server)
+
+    def get_expire(self, timeout=DEFAULT_TIMEOUT):
+        """
+        Время жизни в секундах для SET EX: None - без ограничения
+        """
+
+        if timeout == DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        return None if timeout is None else max(int(timeout), 0)
+
+    def get_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        expire = self.get_expire(timeout)
+        if expire == 0:
+            return False
+        return bool(self.client.set(self.get_key(key, version), pickle.dumps(value), ex=expire, nx=True))
+
+    def get(self, key, default=None, version=None):
+        value = self.client.get(self.get_key(key, version))
+        return default if value is None else pickle.loads(value)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.get_key(key, version)
+        expire = self.get_expire(timeout)
+        if expire == 0:
+            self.client.delete(key)
+        else:
+            self.client.set(key, pickle.dumps(value), ex=expire)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.get_key(key, version)
+        expire = self.get_expire(timeout)
+        if expire is None:
+            return bool(self.client.persist(key))
+        return bool(self.client.expire(key, expire))
+
+    def delete(self, key, version=None):
+        return bool(self.client.delete(self.get_key(key, version)))
+
+    def get_many(self, keys, version=None):
+        keys = {self.get_key(key, version): key for key in keys}
+        if not keys:
+            return {}
+        values = self.client.mget(list(keys))
+        return {keys[key]: pickle.loads(value) for key, value in zip(keys, values) if value is not None}
+
+    def delete_many(self, keys, version=None):
+        keys = [self.get_key(key, version) for key in keys]
+        if keys:
+            self.client.delete(*keys)
+
+    def has_key(self, key, version=None):
+        return bool(self.client.exists(self.get_key(key, version)))
+
+    def clear(self):
+        # SCAN обходит базу частями, не блокируя Redis, как KEYS; шаблон - префикс ключей make_key
+        pattern = re.sub(r'([*?\[\]\\])', r'\\\1', self.key_prefix) + ':*'
+        batch = []
+        for key in self.client.scan_iter(match=pattern, count=CLEAR_BATCH_SIZE):
+            batch.append(key)
+            if len(batch) == CLEAR_BATCH_SIZE:
+                self.client.delete(*batch)
+                batch = []
+        if batch:
+            self.client.delete(*batch)
@@ -0,0 +1,52 @@
+import uuid
+
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db.models import BooleanField, Func, Q, QuerySet
+from movies.constants import SEARCH_CONFIG
+
+"""
+Поиск кинопроизведений и персон по индексам из миграции 0002_search_indexes.
+Подстрока (ILIKE) ищется по триграммному GIN индексу, слова описания - по полнотекстовому индексу,
+выражение SearchVector должно совпадать с выражением индекса film_work_search_idx
+"""
+
+
+class TrigramContains(Func):
+    """
+    Подстрока без учета регистра через ILIKE: в отличие от icontains (UPPER(...) LIKE) использует индекс gin_trgm_ops.
+    Выражение передается в filter() явно, поэтому lookup не регистрируется на всех TextField
+    """
+
+    output_field = BooleanField()
+
+    def __init__(self, expression, term: str):
+        super().__init__(expression)
+        self.term = term
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = compiler.compile(self.source_expressions[0])
+        return f'{lhs} ILIKE %s', [*lhs_params, f'%{connection.ops.prep_for_like_query(self.term)}%']
+
+
+def get_film_work_search_vector() -> SearchVector:
+    return SearchVector('title', 'description', config=SEARCH_CONFIG)
+
+
+def search_film_works(queryset: QuerySet, term: str) -> QuerySet:
+    term = term.strip()
+    if not term:
+        return queryset
+    try:
+        return queryset.filter(pk=uuid.UUID(term))
+    except ValueError:
+        pass
+    return queryset.alias(search=get_film_work_search_vector()).filter(
+        Q(TrigramContains('title', term)) | Q(search=SearchQuery(term, config=SEARCH_CONFIG, search_type='websearch'))
+    )
+
+
+def search_persons(queryset: QuerySet, term: str) -> QuerySet:
+    term = term.strip()
+    if not term:
+        return queryset
+    return queryset.filter(TrigramContains('full_name', term))
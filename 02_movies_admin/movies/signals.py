@@ -0,0 +1,64 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from movies.caching import invalidate_film_works, invalidate_genre, invalidate_person
+from movies.changelist import invalidate_genre_choices
+from movies.instrumentation import install
+from movies.models import FilmWork, Genre, GenreFilmWork, Person, PersonFilmWork
+from movies.read_model import refresh_genre_film_works, refresh_person_film_works, schedule_refresh
+
+
+def get_film_work_ids(link_model, **filters) -> list:
+    # кинопроизведения с названием жанра или именем персоны, их записи в кэше меняются вместе с ними
+    return list(link_model.objects.filter(**filters).values_list('film_work_id', flat=True))
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    install(connection)
+
+
+@receiver(post_save, sender=Genre)
+def genre_saved(sender, instance, created, **kwargs):
+    invalidate_genre_choices()
+    invalidate_genre(instance.pk, () if created else get_film_work_ids(GenreFilmWork, genre_id=instance.pk))
+    refresh_genre_film_works(instance.pk)
+
+
+@receiver(post_delete, sender=Genre)
+def genre_deleted(sender, instance, **kwargs):
+    invalidate_genre_choices()
+    invalidate_genre(instance.pk)
+
+
+@receiver(post_save, sender=Person)
+def person_saved(sender, instance, created, **kwargs):
+    invalidate_person(instance.pk, () if created else get_film_work_ids(PersonFilmWork, person_id=instance.pk))
+    refresh_person_film_works(instance.pk)
+
+
+@receiver(post_delete, sender=Person)
+def person_deleted(sender, instance, **kwargs):
+    invalidate_person(instance.pk)
+
+
+@receiver(post_save, sender=FilmWork)
+@receiver(post_delete, sender=FilmWork)
+def film_work_changed(sender, instance, **kwargs):
+    invalidate_film_works([instance.pk])
+    schedule_refresh([instance.pk])
+
+
+@receiver(post_save, sender=GenreFilmWork)
+@receiver(post_delete, sender=GenreFilmWork)
+def genre_link_changed(sender, instance, **kwargs):
+    invalidate_film_works([instance.film_work_id])
+    schedule_refresh([instance.film_work_id])
+
+
+@receiver(post_save, sender=PersonFilmWork)
+@receiver(post_delete, sender=PersonFilmWork)
+def person_link_changed(sender, instance, **kwargs):
+    # кинопроизведения персоны входят в ее запись и в список персон
+    invalidate_person(instance.person_id, [instance.film_work_id])
+    schedule_refresh([instance.film_work_id])
@@ -0,0 +1,58 @@
+import fnmatch
+import time
+
+"""
+Локальная замена клиента Redis для тестов movies.redis_cache.RedisCache: команды, которые использует бэкенд,
+над словарем в памяти процесса
+"""
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = dict()
+
+    @classmethod
+    def from_url(cls, url: str):
+        return cls()
+
+    def _get_alive(self, key):
+        value, expires = self.data.get(key, (None, None))
+        if expires is not None and expires <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def get(self, key):
+        return self._get_alive(key)
+
+    def mget(self, keys):
+        return [self._get_alive(key) for key in keys]
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and self._get_alive(key) is not None:
+            return None
+        self.data[key] = (value, None if ex is None else time.monotonic() + ex)
+        return True
+
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def exists(self, key):
+        return int(self._get_alive(key) is not None)
+
+    def expire(self, key, seconds):
+        if self._get_alive(key) is None:
+            return False
+        self.data[key] = (self.data[key][0], time.monotonic() + seconds)
+        return True
+
+    def persist(self, key):
+        if self._get_alive(key) is None:
+            return False
+        self.data[key] = (self.data[key][0], None)
+        return True
+
+    def scan_iter(self, match=None, count=None):
+        for key in list(self.data):
+            if self._get_alive(key) is not None and (match is None or fnmatch.fnmatchcase(key, match)):
+                yield key
@@ -0,0 +1,236 @@
+import datetime
+import uuid
+from unittest import mock
+
+from django.contrib.admin.models import DELETION, LogEntry
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from movies.admin import FilmWorkAdmin
+from movies.changelist import EstimatedCountPaginator
+from movies.models import FilmWork, FilmWorkDetail, Genre, GenreFilmWork, Person, PersonFilmWork
+
+
+class FilmWorkChangeFormQueriesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser(username='admin', email='admin@example.com', password='admin')
+        genre = Genre.objects.create(name='drama')
+        persons = Person.objects.bulk_create(Person(full_name=f'Person {number}') for number in range(200))
+        cls.small_film_work, cls.big_film_work = FilmWork.objects.bulk_create(
+            (FilmWork(title='Short film', type='movie'), FilmWork(title='Epic film', type='movie'))
+        )
+        GenreFilmWork.objects.bulk_create(
+            GenreFilmWork(film_work=film_work, genre=genre) for film_work in (cls.small_film_work, cls.big_film_work)
+        )
+        PersonFilmWork.objects.bulk_create(
+            (
+                PersonFilmWork(film_work=cls.small_film_work, person=persons[0], role='actor'),
+                *(PersonFilmWork(film_work=cls.big_film_work, person=person, role='actor') for person in persons),
+            )
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def get_change_form(self, film_work: FilmWork):
+        return self.client.get(reverse('admin:movies_filmwork_change', args=(film_work.pk,)))
+
+    def test_query_count_does_not_depend_on_cast_size(self):
+        """
+        Тест количества запросов формы кинопроизведения: для 200 персон столько же запросов, сколько для одной
+        """
+
+        # первый запрос сессии выполняет разовые запросы
+        self.get_change_form(self.small_film_work)
+        with CaptureQueriesContext(connection) as small_film_queries:
+            response = self.get_change_form(self.small_film_work)
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertNumQueries(len(small_film_queries)):
+            response = self.get_change_form(self.big_film_work)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Person 199')
+
+
+class FilmWorkBulkActionsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser(username='admin', email='admin@example.com', password='admin')
+        cls.genre = Genre.objects.create(name='drama')
+        cls.person = Person.objects.create(full_name='Director')
+        cls.film_works = FilmWork.objects.bulk_create(
+            FilmWork(title=f'Film {number}', type='movie') for number in range(3)
+        )
+        GenreFilmWork.objects.create(film_work=cls.film_works[0], genre=cls.genre)
+        PersonFilmWork.objects.create(film_work=cls.film_works[0], person=cls.person, role='director')
+        FilmWork.objects.update(modified=datetime.datetime(2000, 1, 1, tzinfo=datetime.timezone.utc))
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def run_action(self, url: str, action: str, objects, **data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                url, {'action': action, '_selected_action': [obj.pk for obj in objects], **data}, follow=True
+            )
+
+    def test_genre_type_and_delete_actions(self):
+        """
+        Тест массовых действий: жанр добавляется только кинопроизведениям без него, modified и FilmWorkDetail
+        обновляются, удаление выполняется вместе со связями
+        """
+
+        url = reverse('admin:movies_filmwork_changelist')
+        response = self.run_action(url, 'assign_genre', self.film_works, genre=self.genre.pk)
+        self.assertContains(response, '2 of 3')
+        self.assertEqual(GenreFilmWork.objects.filter(genre=self.genre).count(), 3)
+        self.assertEqual(FilmWork.objects.filter(modified__year=2000).count(), 1)
+        self.assertEqual(FilmWorkDetail.objects.get(pk=self.film_works[1].pk).genres, ['drama'])
+
+        self.run_action(url, 'remove_genre', self.film_works[:1], genre=self.genre.pk)
+        self.assertEqual(FilmWorkDetail.objects.get(pk=self.film_works[0].pk).genres, [])
+
+        self.run_action(url, 'change_type', self.film_works[1:], type='tv_show')
+        self.assertEqual(FilmWorkDetail.objects.filter(type='tv_show').count(), 2)
+
+        with override_settings(ADMIN_BULK_ACTION_MAX_ROWS=1):
+            self.run_action(url, 'delete_film_works', self.film_works)
+        self.assertEqual(FilmWork.objects.count(), 3)
+
+        self.run_action(reverse('admin:movies_person_changelist'), 'delete_persons', [self.person])
+        self.run_action(url, 'delete_film_works', self.film_works)
+        self.assertFalse(FilmWork.objects.exists())
+        self.assertFalse(GenreFilmWork.objects.exists())
+        self.assertFalse(FilmWorkDetail.objects.exists())
+        self.assertFalse(Person.objects.exists())
+        self.assertCountEqual(
+            LogEntry.objects.filter(action_flag=DELETION, user=self.user).values_list('object_id', 'object_repr'),
+            [(str(obj.pk), str(obj)) for obj in (self.person, *self.film_works)],
+        )
+
+    def test_assign_missing_genre(self):
+        """
+        Тест добавления жанра, удаленного после построения списка выбора: связи не создаются, изменено 0 записей
+        """
+
+        missing_id = str(uuid.uuid4())
+        with mock.patch('movies.actions.get_genre_choices', return_value=[(missing_id, 'missing')]):
+            response = self.run_action(
+                reverse('admin:movies_filmwork_changelist'), 'assign_genre', self.film_works, genre=missing_id
+            )
+        self.assertContains(response, '0 of 3')
+        self.assertEqual(GenreFilmWork.objects.count(), 1)
+
+
+class FilmWorkChangeListTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser(username='admin', email='admin@example.com', password='admin')
+        cls.genre = Genre.objects.create(name='drama')
+        cls.film_works = FilmWork.objects.bulk_create(
+            FilmWork(title=f'Film {number}', type='movie') for number in range(7)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        patcher = mock.patch.object(FilmWorkAdmin, 'list_per_page', 3)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_changelist(self, query_string: str = ''):
+        response = self.client.get(reverse('admin:movies_filmwork_changelist') + query_string)
+        self.assertEqual(response.status_code, 200)
+        return response.context['cl']
+
+    def test_keyset_pages_forward_and_back(self):
+        """
+        Тест постраничного вывода по ключу: вперед и назад выводятся те же страницы, каждая запись ровно один раз,
+        у первой страницы нет ссылки назад, у последней - вперед
+        """
+
+        pages = list()
+        changelist = self.get_changelist()
+        self.assertIsNone(changelist.keyset_previous)
+        while True:
+            pages.append([film_work.pk for film_work in changelist.result_list])
+            if changelist.keyset_next is None:
+                break
+            changelist = self.get_changelist(changelist.keyset_next)
+
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(
+            [pk for page in pages for pk in page], sorted((film_work.pk for film_work in self.film_works), reverse=True)
+        )
+
+        back_pages = [pages[-1]]
+        while changelist.keyset_previous is not None:
+            changelist = self.get_changelist(changelist.keyset_previous)
+            back_pages.append([film_work.pk for film_work in changelist.result_list])
+        self.assertEqual(back_pages, pages[::-1])
+        self.assertIsNotNone(changelist.keyset_next)
+
+    def test_full_last_page_has_no_next_link(self):
+        FilmWork.objects.filter(pk__in=[film_work.pk for film_work in self.film_works[:1]]).delete()
+
+        changelist = self.get_changelist()
+        changelist = self.get_changelist(changelist.keyset_next)
+        self.assertEqual(len(changelist.result_list), 3)
+        self.assertIsNone(changelist.keyset_next)
+
+        changelist = self.get_changelist(changelist.keyset_previous)
+        self.assertEqual(len(changelist.result_list), 3)
+        self.assertIsNone(changelist.keyset_previous)
+
+    def test_bad_keyset_parameter_redirects(self):
+        for parameter in ('after', 'before'):
+            response = self.client.get(reverse('admin:movies_filmwork_changelist'), {parameter: 'bad'})
+            self.assertRedirects(response, reverse('admin:movies_filmwork_changelist') + '?e=1')
+
+    def test_column_ordering_uses_numbered_pages(self):
+        """
+        Тест сортировки по столбцу: список выводится обычными страницами без ссылок по ключу
+        """
+
+        changelist = self.get_changelist('?o=1&p=2')
+        self.assertFalse(changelist.keyset_pagination)
+        self.assertIsNone(changelist.keyset_next)
+        self.assertEqual([film_work.title for film_work in changelist.result_list], ['Film 3', 'Film 4', 'Film 5'])
+
+    def test_genre_filter_choices_refresh_after_genre_save(self):
+        """
+        Тест кэша жанров фильтра: жанр, добавленный без сигналов, не виден до сохранения жанра через модель
+        """
+
+        response = self.client.get(reverse('admin:movies_filmwork_changelist'))
+        self.assertContains(response, '?genre={}'.format(self.genre.pk))
+
+        hidden = Genre.objects.bulk_create([Genre(name='comedy')])[0]
+        response = self.client.get(reverse('admin:movies_filmwork_changelist'))
+        self.assertNotContains(response, '?genre={}'.format(hidden.pk))
+
+        Genre.objects.create(name='thriller')
+        response = self.client.get(reverse('admin:movies_filmwork_changelist'))
+        self.assertContains(response, '?genre={}'.format(hidden.pk))
+
+    def test_count_estimate_threshold(self):
+        """
+        Тест количества записей: оценка планировщика не меньше порога выводится вместо COUNT(*),
+        без статистики таблицы и ниже порога записи считаются точно
+        """
+
+        with override_settings(ADMIN_COUNT_ESTIMATE_THRESHOLD=1):
+            paginator = EstimatedCountPaginator(FilmWork.objects.order_by('-pk'), 3)
+            self.assertEqual(paginator.count, 7)
+            self.assertFalse(paginator.estimated)
+
+            paginator = EstimatedCountPaginator(FilmWork.objects.filter(type='movie').order_by('-pk'), 3)
+            self.assertGreaterEqual(paginator.count, 1)
+            self.assertTrue(paginator.estimated)
+
+        with override_settings(ADMIN_COUNT_ESTIMATE_THRESHOLD=10**9):
+            paginator = EstimatedCountPaginator(FilmWork.objects.filter(type='movie').order_by('-pk'), 3)
+            self.assertEqual(paginator.count, 7)
+            self.assertFalse(paginator.estimated)
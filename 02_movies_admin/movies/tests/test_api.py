@@ -0,0 +1,146 @@
+import datetime
+from typing import Callable
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from movies import async_api
+from movies.api import encode_cursor
+from movies.models import FilmWork, Genre, GenreFilmWork, Person, PersonFilmWork
+
+
+class MoviesApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        genre = Genre.objects.create(name='drama')
+        cls.person = Person.objects.create(full_name='Director')
+        cls.film_works = [
+            FilmWork.objects.create(
+                title=f'Film {number}',
+                type='movie',
+                creation_date=datetime.date(2000 + number % 3, 1, 1) if number % 4 else None,
+            )
+            for number in range(10)
+        ]
+        for film_work in cls.film_works[:3]:
+            GenreFilmWork.objects.create(film_work=film_work, genre=genre)
+            PersonFilmWork.objects.create(film_work=film_work, person=cls.person, role='director')
+
+    def setUp(self):
+        cache.clear()
+
+    def get_all_pages(self, url: str) -> list:
+        results = list()
+        while url:
+            with self.assertNumQueries(1):
+                page = self.client.get(url).json()
+            results.extend(page['results'])
+            url = page['next']
+        return results
+
+    def test_film_works_cursor_pagination(self):
+        """
+        Тест обхода списка по курсору: все кинопроизведения ровно один раз, без даты создания - в конце
+        """
+
+        by_id = self.get_all_pages(f'{reverse("movies:film_works")}?page_size=3')
+        self.assertEqual([row['id'] for row in by_id], sorted(str(film_work.pk) for film_work in self.film_works))
+
+        by_date = self.get_all_pages(f'{reverse("movies:film_works")}?page_size=3&ordering=creation_date')
+        expected = sorted(
+            self.film_works,
+            key=lambda film_work: (
+                film_work.creation_date is None,
+                film_work.creation_date or datetime.date.min,
+                str(film_work.pk),
+            ),
+        )
+        self.assertEqual([row['id'] for row in by_date], [str(film_work.pk) for film_work in expected])
+
+        film_work = next(row for row in by_id if row['id'] == str(self.film_works[0].pk))
+        self.assertEqual(film_work['genres'], ['drama'])
+        self.assertEqual(film_work['persons'], {'director': [{'id': str(self.person.pk), 'full_name': 'Director'}]})
+
+    def test_person_with_film_works(self):
+        response = self.client.get(reverse('movies:person', args=(self.person.pk,)))
+        self.assertEqual(len(response.json()['film_works']), 3)
+        self.assertEqual(self.client.get(reverse('movies:person', args=(self.film_works[0].pk,))).status_code, 404)
+        for cursor in ('bad', encode_cursor([1]), encode_cursor({'id': 1}), encode_cursor([str(self.person.pk)] * 2)):
+            self.assertEqual(self.client.get(reverse('movies:persons'), {'cursor': cursor}).status_code, 400)
+        response = self.client.get(
+            reverse('movies:film_works'), {'ordering': 'creation_date', 'cursor': encode_cursor([2000, None])}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_etag_not_modified(self):
+        url = reverse('movies:genres')
+        response = self.client.get(url)
+        with self.assertNumQueries(0):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(self.client.post(url).status_code, 405)
+
+
+class AsyncMoviesApiTest(TransactionTestCase):
+    def setUp(self):
+        # асинхронные представления читают данные через отдельные соединения asyncpg, поэтому данные фиксируются
+        genre = Genre.objects.create(name='drama')
+        self.person = Person.objects.create(full_name='Director')
+        self.film_works = [
+            FilmWork.objects.create(
+                title=f'Film {number}',
+                type='movie',
+                creation_date=datetime.date(2000, 1, number) if number % 2 else None,
+            )
+            for number in range(1, 5)
+        ]
+        GenreFilmWork.objects.create(film_work=self.film_works[0], genre=genre)
+        PersonFilmWork.objects.create(film_work=self.film_works[0], person=self.person, role='director')
+        cache.clear()
+
+    async def get_all_pages(self, get: Callable, url: str, params: dict) -> list:
+        # параметры в адресе: AsyncClient в Django 3.2 передает data в заголовке, а не в строке запроса
+        results = list()
+        response = await get(f'{url}?{urlencode(params)}')
+        while True:
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            results.extend(page['results'])
+            if not page['next']:
+                return results
+            response = await get(page['next'])
+
+    async def test_async_views_match_sync(self):
+        """
+        Тест асинхронных представлений: те же ответы и страницы списков, что у синхронных
+        """
+
+        sync_get = sync_to_async(self.client.get)
+        try:
+            for name, params in (
+                ('film_works', {'page_size': 1}),
+                ('film_works', {'page_size': 1, 'ordering': 'creation_date'}),
+                ('persons', {'page_size': 1}),
+                ('genres', {}),
+            ):
+                self.assertEqual(
+                    await self.get_all_pages(self.async_client.get, reverse(f'movies:async_{name}'), params),
+                    await self.get_all_pages(sync_get, reverse(f'movies:{name}'), params),
+                )
+            for name, pk in (('film_work', self.film_works[0].pk), ('person', self.person.pk)):
+                response = await self.async_client.get(reverse(f'movies:async_{name}', args=(pk,)))
+                self.assertEqual(response.json(), (await sync_get(reverse(f'movies:{name}', args=(pk,)))).json())
+                self.assertEqual(response['ETag'], (await self.async_client.get(response.request['path']))['ETag'])
+
+            response = await self.async_client.get(reverse('movies:async_genre', args=(self.person.pk,)))
+            self.assertEqual(response.status_code, 404)
+            response = await self.async_client.get(
+                f'{reverse("movies:async_persons")}?{urlencode({"cursor": encode_cursor([1])})}'
+            )
+            self.assertEqual(response.status_code, 400)
+            response = await self.async_client.post(reverse('movies:async_genres'))
+            self.assertEqual(response.status_code, 405)
+        finally:
+            await async_api.close_pool()
@@ -0,0 +1,134 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from movies.caching import (
+    FILM_WORK,
+    GENRE,
+    PERSON,
+    get_cache_stats,
+    get_film_work,
+    get_genre,
+    get_person,
+    get_version,
+    reset_cache_stats,
+)
+from movies.models import FilmWork, Genre, GenreFilmWork, Person, PersonFilmWork
+from movies.redis_cache import RedisCache
+
+REDIS_CACHES = {
+    'default': {
+        'BACKEND': 'movies.redis_cache.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:6379/0',
+        'KEY_PREFIX': 'movies_admin',
+        'OPTIONS': {'CLIENT_CLASS': 'movies.tests.fake_redis.FakeRedis'},
+    }
+}
+
+
+class CachingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_cache_stats()
+        self.genre = Genre.objects.create(name='drama')
+        self.film_work = FilmWork.objects.create(title='Film', type='movie')
+
+    def check_invalidation_on_link_change(self):
+        self.assertEqual(get_film_work(self.film_work.pk)['genres'], [])
+        self.assertEqual(get_genre(self.genre.pk), self.genre)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_genre(self.genre.pk), self.genre)
+            self.assertEqual(get_film_work(self.film_work.pk)['genres'], [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            GenreFilmWork.objects.create(film_work=self.film_work, genre=self.genre)
+        self.assertEqual(get_film_work(self.film_work.pk)['genres'], ['drama'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.genre.name = 'comedy'
+            self.genre.save()
+        self.assertEqual(get_genre(self.genre.pk).name, 'comedy')
+        self.assertEqual(get_film_work(self.film_work.pk)['genres'], ['comedy'])
+        self.assertEqual(
+            get_cache_stats(), {'genre_misses': 2, 'genre_hits': 1, 'film_work_misses': 3, 'film_work_hits': 1}
+        )
+
+    def test_locmem_invalidation(self):
+        """
+        Тест сброса кэша кинопроизведения и жанра при изменении связи и названия жанра
+        """
+
+        self.check_invalidation_on_link_change()
+
+    @override_settings(CACHES=REDIS_CACHES)
+    def test_redis_invalidation(self):
+        self.check_invalidation_on_link_change()
+        self.assertTrue(cache.add('key', 'value', timeout=10))
+        self.assertFalse(cache.add('key', 'other'))
+        self.assertEqual(cache.get_many(['key', 'missing']), {'key': 'value'})
+
+    def test_person_invalidation(self):
+        """
+        Тест кэша персоны API: запись сбрасывается при изменении ее кинопроизведений и имени
+        """
+
+        person = Person.objects.create(full_name='Director')
+        url = reverse('movies:person', args=(person.pk,))
+        self.assertEqual(self.client.get(url).json()['film_works'], [])
+        with self.assertNumQueries(0):
+            self.assertEqual(get_person(person.pk)['film_works'], [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            PersonFilmWork.objects.create(film_work=self.film_work, person=person, role='director')
+        self.assertEqual(get_person(person.pk)['film_works'], [{'id': str(self.film_work.pk), 'role': 'director'}])
+        self.assertEqual(get_film_work(self.film_work.pk)['persons']['director'][0]['full_name'], 'Director')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            person.full_name = 'Producer'
+            person.save()
+        self.assertEqual(self.client.get(url).json()['full_name'], 'Producer')
+        self.assertEqual(get_film_work(self.film_work.pk)['persons']['director'][0]['full_name'], 'Producer')
+        self.assertIsNone(get_person(self.genre.pk))
+
+    def test_unrelated_versions_are_kept(self):
+        """
+        Тест версий: изменение кинопроизведения меняет его версию и версию списка кинопроизведений,
+        записи и списки жанров и персон остаются в кэше
+        """
+
+        genres_url = reverse('movies:genres')
+        self.client.get(genres_url)
+        kept = {
+            (name, pk): get_version(name, pk) for name, pk in ((GENRE, None), (GENRE, self.genre.pk), (PERSON, None))
+        }
+        changed = {
+            (name, pk): get_version(name, pk) for name, pk in ((FILM_WORK, None), (FILM_WORK, self.film_work.pk))
+        }
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.film_work.title = 'Other'
+            self.film_work.save()
+        self.assertEqual({key: get_version(*key) for key in kept}, kept)
+        for key, version in changed.items():
+            self.assertNotEqual(get_version(*key), version)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(genres_url).json()['results'][0]['name'], 'drama')
+
+    def test_redis_clear_keeps_other_prefixes(self):
+        """
+        Тест очистки кэша Redis: удаляются только ключи с KEY_PREFIX кэша, пачками по CLEAR_BATCH_SIZE
+        """
+
+        redis_cache = RedisCache(REDIS_CACHES['default']['LOCATION'], REDIS_CACHES['default'])
+        redis_cache.client.set('other_app:1:key', b'value')
+        redis_cache.set_many({f'key{index}': index for index in range(5)})
+        with mock.patch('movies.redis_cache.CLEAR_BATCH_SIZE', 2):
+            redis_cache.clear()
+        self.assertEqual(redis_cache.get_many([f'key{index}' for index in range(5)]), {})
+        self.assertEqual(list(redis_cache.client.scan_iter()), ['other_app:1:key'])
+
+    def test_redis_client_missing(self):
+        with self.assertRaises(ImproperlyConfigured):
+            RedisCache('redis://127.0.0.1:6379/0', {'OPTIONS': {'CLIENT_CLASS': 'movies.tests.missing.Redis'}})
@@ -0,0 +1,112 @@
+import time
+import uuid
+
+from config.postgresql.base import ConnectionPool, DatabaseWrapper, get_connection_metrics
+from django.db import DataError, connection
+from django.test import SimpleTestCase
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    """
+    Пул соединений бэкенда config.postgresql на отдельных DatabaseWrapper тестовой базы, у каждого теста свой пул
+    """
+
+    def setUp(self):
+        self.alias = f'pool_{uuid.uuid4().hex[:8]}'
+        self.metrics = get_connection_metrics()
+        self.addCleanup(self.close_pool)
+
+    def close_pool(self):
+        pool = ConnectionPool.pools.pop(self.alias, None)
+        for raw_connection in pool.idle if pool else ():
+            raw_connection.close()
+
+    def get_wrapper(self, **options) -> DatabaseWrapper:
+        settings_dict = {**connection.settings_dict, 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'POOL_SIZE': 1}
+        wrapper = DatabaseWrapper({**settings_dict, **options}, alias=self.alias)
+        self.addCleanup(wrapper.close)
+        wrapper.ensure_connection()
+        return wrapper
+
+    def get_metrics_delta(self) -> dict:
+        metrics = get_connection_metrics()
+        return {name: metrics.get(name, 0) - self.metrics.get(name, 0) for name in metrics if name != 'pid'}
+
+    @staticmethod
+    def execute(wrapper: DatabaseWrapper, query: str, params: tuple = None):
+        with wrapper.cursor() as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchone()
+
+    def test_closed_connection_is_reused(self):
+        wrapper = self.get_wrapper()
+        raw_connection = wrapper.connection
+        wrapper.close()
+        self.assertIsNone(wrapper.connection)
+        self.assertFalse(raw_connection.closed)
+
+        wrapper.ensure_connection()
+        self.assertIs(wrapper.connection, raw_connection)
+        self.assertEqual(self.execute(wrapper, 'SELECT 1'), (1,))
+        metrics = self.get_metrics_delta()
+        self.assertEqual((metrics['connections_opened'], metrics['connections_reused']), (1, 1))
+
+    def test_aborted_transaction_is_rolled_back_before_reuse(self):
+        """
+        Тест возврата соединения с прерванной ошибкой транзакцией: транзакция откатывается,
+        вместе с ней сбрасываются параметры транзакции
+        """
+
+        wrapper = self.get_wrapper()
+        raw_connection = wrapper.connection
+        wrapper.set_autocommit(False)
+        self.execute(wrapper, "SELECT set_config('statement_timeout', '1234ms', true)")
+        with self.assertRaises(DataError):
+            self.execute(wrapper, 'SELECT 1 / 0')
+        wrapper.close()
+
+        wrapper.ensure_connection()
+        self.assertIs(wrapper.connection, raw_connection)
+        self.assertTrue(wrapper.get_autocommit())
+        self.assertNotEqual(self.execute(wrapper, 'SHOW statement_timeout'), ('1234ms',))
+
+    def test_terminated_connection_is_replaced(self):
+        """
+        Тест проверки соединения из пула: соединение, закрытое сервером (pg_terminate_backend), заменяется новым
+        """
+
+        wrapper = self.get_wrapper(CONN_HEALTH_CHECKS=True)
+        backend_pid = wrapper.connection.info.backend_pid
+        wrapper.close()
+
+        other = self.get_wrapper(POOL_SIZE=0)
+        self.execute(other, 'SELECT pg_terminate_backend(%s)', (backend_pid,))
+        deadline = time.monotonic() + 5
+        while self.execute(other, 'SELECT count(*) FROM pg_stat_activity WHERE pid = %s', (backend_pid,)) != (0,):
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.05)
+
+        wrapper.ensure_connection()
+        self.assertNotEqual(wrapper.connection.info.backend_pid, backend_pid)
+        self.assertEqual(self.execute(wrapper, 'SELECT 1'), (1,))
+        metrics = self.get_metrics_delta()
+        self.assertEqual((metrics['health_checks'], metrics['health_check_failures']), (1, 1))
+
+    def test_release_keeps_at_most_pool_size(self):
+        wrappers = [self.get_wrapper(), self.get_wrapper()]
+        raw_connections = [wrapper.connection for wrapper in wrappers]
+        for wrapper in wrappers:
+            wrapper.close()
+
+        self.assertEqual(ConnectionPool.pools[self.alias].idle, raw_connections[:1])
+        self.assertTrue(raw_connections[1].closed)
+
+    def test_without_pool_connection_is_closed(self):
+        wrapper = self.get_wrapper(POOL_SIZE=0)
+        raw_connection = wrapper.connection
+        wrapper.close()
+
+        self.assertTrue(raw_connection.closed)
+        self.assertNotIn(self.alias, ConnectionPool.pools)
+        metrics = self.get_metrics_delta()
+        self.assertEqual((metrics['connections_opened'], metrics['connections_closed']), (1, 1))
@@ -0,0 +1,38 @@
+import json
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from movies.instrumentation import reset_view_metrics
+from movies.models import Genre
+
+
+@override_settings(
+    INSTRUMENTATION_SAMPLE_RATE=1,
+    INSTRUMENTATION_QUERY_COUNT_THRESHOLD=1,
+    INSTRUMENTATION_SLOW_QUERY_MS=0,
+    INSTRUMENTATION_METRICS_TOKEN='token',
+    API_CACHE_TIMEOUT=0,
+)
+class InstrumentationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_view_metrics()
+        Genre.objects.create(name='drama')
+
+    def test_slow_request_log_and_metrics(self):
+        """
+        Тест записи в лог запроса с количеством запросов к базе выше порога и вывода метрик представления
+        """
+
+        with self.assertLogs('movies.instrumentation', level='WARNING') as logs:
+            self.client.get(reverse('movies:genres'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'movies:genres')
+        self.assertGreaterEqual(record['queries'], 1)
+        self.assertIn('content', record['slowest'][0]['sql'])
+
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer token')
+        self.assertContains(response, 'movies_http_requests_total{view="movies:genres"')
+        self.assertContains(response, 'movies_db_queries_total{view="movies:genres"')
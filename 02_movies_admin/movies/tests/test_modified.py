@@ -0,0 +1,24 @@
+import datetime
+
+from django.test import TestCase
+from movies.models import Genre
+
+OLD = datetime.datetime(2000, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class ModifiedTriggerTest(TestCase):
+    def test_update_bumps_modified(self):
+        """
+        Тест триггера modified: UPDATE в обход модели обновляет modified, явно заданное значение сохраняется,
+        запись тех же значений modified не меняет
+        """
+
+        genre = Genre.objects.create(name='drama')
+        Genre.objects.filter(pk=genre.pk).update(modified=OLD)
+        self.assertEqual(Genre.objects.get(pk=genre.pk).modified, OLD)
+
+        Genre.objects.filter(pk=genre.pk).update(name='drama')
+        self.assertEqual(Genre.objects.get(pk=genre.pk).modified, OLD)
+
+        Genre.objects.filter(pk=genre.pk).update(name='comedy')
+        self.assertGreater(Genre.objects.get(pk=genre.pk).modified, OLD)
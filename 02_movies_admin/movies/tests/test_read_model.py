@@ -0,0 +1,51 @@
+from django.test import TestCase
+from movies.models import FilmWork, FilmWorkDetail, Genre, GenreFilmWork, Person, PersonFilmWork
+from movies.read_model import deferred_refresh
+
+
+class FilmWorkDetailTest(TestCase):
+    def setUp(self):
+        self.film_work = FilmWork.objects.create(title='Film', type='movie')
+        self.genre = Genre.objects.create(name='drama')
+        self.actor = Person.objects.create(full_name='Actor')
+        self.director = Person.objects.create(full_name='Director')
+
+    def test_detail_follows_links(self):
+        """
+        Тест пересчета записи при изменении связей, жанра и персоны
+        """
+
+        GenreFilmWork.objects.create(film_work=self.film_work, genre=self.genre)
+        PersonFilmWork.objects.create(film_work=self.film_work, person=self.actor, role='actor')
+        link = PersonFilmWork.objects.create(film_work=self.film_work, person=self.director, role='director')
+        detail = FilmWorkDetail.objects.get(pk=self.film_work.pk)
+        self.assertEqual(detail.genres, ['drama'])
+        self.assertEqual(
+            detail.persons,
+            {
+                'actor': [{'id': str(self.actor.pk), 'full_name': 'Actor'}],
+                'director': [{'id': str(self.director.pk), 'full_name': 'Director'}],
+            },
+        )
+
+        link.delete()
+        self.genre.name = 'comedy'
+        self.genre.save()
+        detail.refresh_from_db()
+        self.assertEqual(detail.genres, ['comedy'])
+        self.assertEqual(list(detail.persons), ['actor'])
+
+        self.film_work.delete()
+        self.assertFalse(FilmWorkDetail.objects.exists())
+
+    def test_deferred_refresh_runs_once(self):
+        # три изменения и один пересчет: INSERT ... ON CONFLICT и удаление записей удаленных кинопроизведений
+        with self.assertNumQueries(5):
+            with deferred_refresh():
+                PersonFilmWork.objects.bulk_create(
+                    PersonFilmWork(film_work=self.film_work, person=person, role='actor')
+                    for person in (self.actor, self.director)
+                )
+                GenreFilmWork.objects.create(film_work=self.film_work, genre=self.genre)
+                self.film_work.save()
+        self.assertEqual(len(FilmWorkDetail.objects.get(pk=self.film_work.pk).persons['actor']), 2)
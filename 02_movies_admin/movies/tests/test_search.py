@@ -0,0 +1,81 @@
+from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchQuery
+from django.db import connection
+from django.db.models import TextField
+from django.test import TestCase
+from django.urls import reverse
+from movies.constants import SEARCH_CONFIG
+from movies.models import FilmWork, Person
+from movies.search import TrigramContains, get_film_work_search_vector, search_film_works, search_persons
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser(username='admin', email='admin@example.com', password='admin')
+        cls.percent, cls.number, cls.underscore, cls.letter, cls.space = FilmWork.objects.bulk_create(
+            (
+                FilmWork(title='100% love', type='movie'),
+                FilmWork(title='100 love', type='movie'),
+                FilmWork(title='snake_case', type='movie'),
+                FilmWork(title='snakeXcase', type='movie'),
+                FilmWork(title='Odyssey', description='Полет к далеким звездам', type='movie'),
+            )
+        )
+        cls.persons = Person.objects.bulk_create(Person(full_name=name) for name in ('Anna_Smith', 'AnnaXSmith'))
+
+    def assertFound(self, queryset, expected):
+        self.assertCountEqual(list(queryset), expected)
+
+    def test_like_wildcards_are_escaped(self):
+        """
+        Тест подстроки: % и _ в запросе ищутся как символы, а не как шаблоны LIKE
+        """
+
+        self.assertFound(FilmWork.objects.filter(TrigramContains('title', '0% L')), [self.percent])
+        self.assertFound(FilmWork.objects.filter(TrigramContains('title', 'e_c')), [self.underscore])
+        self.assertFound(search_persons(Person.objects.all(), ' a_s '), self.persons[:1])
+        self.assertNotIn('trigram_contains', TextField.get_lookups())
+
+    def test_uuid_term_is_searched_by_pk(self):
+        self.assertFound(search_film_works(FilmWork.objects.all(), f' {self.space.pk} '), [self.space])
+        self.assertFound(search_film_works(FilmWork.objects.all(), str(self.percent.pk).upper()), [self.percent])
+
+    def test_websearch_matches_description(self):
+        """
+        Тест полнотекстового поиска: слова описания в любом порядке, с исключением слов через минус
+        """
+
+        films = FilmWork.objects.all()
+        self.assertFound(search_film_works(films, 'звездам далеким'), [self.space])
+        self.assertFound(search_film_works(films, 'звездам -далеким'), [])
+        self.assertFound(search_film_works(films, 'LOVE'), [self.percent, self.number])
+        self.assertFound(search_film_works(films, '   '), FilmWork.objects.all())
+
+    def test_search_vector_uses_index(self):
+        """
+        Тест совпадения выражения SearchVector с выражением индекса film_work_search_idx:
+        без последовательного чтения планировщик выбирает этот индекс
+        """
+
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        queryset = FilmWork.objects.alias(search=get_film_work_search_vector()).filter(
+            search=SearchQuery('звездам', config=SEARCH_CONFIG, search_type='websearch')
+        )
+        self.assertIn('film_work_search_idx', queryset.explain())
+
+    def test_admin_changelist_and_autocomplete(self):
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse('admin:movies_filmwork_changelist'), {'q': 'далеким'})
+        self.assertEqual(list(response.context['cl'].result_list), [self.space])
+
+        response = self.client.get(reverse('admin:movies_person_changelist'), {'q': 'a_s'})
+        self.assertEqual(list(response.context['cl'].result_list), self.persons[:1])
+
+        response = self.client.get(
+            reverse('admin:autocomplete'),
+            {'app_label': 'movies', 'model_name': 'personfilmwork', 'field_name': 'person', 'term': 'a_s'},
+        )
+        self.assertEqual([result['id'] for result in response.json()['results']], [str(self.persons[0].pk)])
@@ -0,0 +1,20 @@
+from django.urls import path
+from movies import api, async_api
+
+app_name = 'movies'
+
+urlpatterns = [
+    path('film_works/', api.film_works, name='film_works'),
+    path('film_works/<uuid:pk>/', api.film_work, name='film_work'),
+    path('persons/', api.persons, name='persons'),
+    path('persons/<uuid:pk>/', api.person, name='person'),
+    path('genres/', api.genres, name='genres'),
+    path('genres/<uuid:pk>/', api.genre, name='genre'),
+    # те же ответы асинхронными представлениями для запуска под ASGI
+    path('async/film_works/', async_api.film_works, name='async_film_works'),
+    path('async/film_works/<uuid:pk>/', async_api.film_work, name='async_film_work'),
+    path('async/persons/', async_api.persons, name='async_persons'),
+    path('async/persons/<uuid:pk>/', async_api.person, name='async_person'),
+    path('async/genres/', async_api.genres, name='async_genres'),
+    path('async/genres/<uuid:pk>/', async_api.genre, name='async_genre'),
+]
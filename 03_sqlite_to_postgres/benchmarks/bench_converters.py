@@ -0,0 +1,65 @@
+import argparse
+import random
+import time
+import uuid
+
+from converters import VALIDATION_MODES, get_row_processor
+from schemas import FilmWork, PersonFilmWork
+
+"""
+Сравнение скорости подготовки строк к записи при разных способах проверки данных.
+Запуск из каталога 03_sqlite_to_postgres: python -m benchmarks.bench_converters --rows 3000000
+"""
+
+
+def generate_film_work_rows(count: int, rnd: random.Random):
+    for i in range(count):
+        yield (
+            str(uuid.UUID(int=rnd.getrandbits(128), version=4)),
+            f'Film work {i}',
+            None if i % 3 else f'Description of film work {i}',
+            None if i % 2 else '2001-02-03 00:00:00',
+            None if i % 5 else rnd.uniform(0, 100),
+            'movie' if i % 4 else 'tv_show',
+        )
+
+
+def generate_person_film_work_rows(count: int, rnd: random.Random):
+    for _ in range(count):
+        yield (
+            str(uuid.UUID(int=rnd.getrandbits(128), version=4)),
+            str(uuid.UUID(int=rnd.getrandbits(128), version=4)),
+            str(uuid.UUID(int=rnd.getrandbits(128), version=4)),
+            'actor',
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк преобразования строк выборки')
+    parser.add_argument('--rows', type=int, default=3000000, help='количество строк для каждой схемы')
+    parser.add_argument('--sample-rate', type=int, default=1000, help='частота проверки pydantic в режиме sample')
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    datasets = {
+        FilmWork: list(generate_film_work_rows(count=args.rows, rnd=rnd)),
+        PersonFilmWork: list(generate_person_film_work_rows(count=args.rows, rnd=rnd)),
+    }
+
+    for model, rows in datasets.items():
+        baseline = None
+        for validation in VALIDATION_MODES:
+            process_row = get_row_processor(model=model, validation=validation, sample_rate=args.sample_rate)
+            started = time.perf_counter()
+            for row in rows:
+                process_row(row)
+            seconds = time.perf_counter() - started
+            baseline = baseline or seconds
+            print(
+                f'{model.__name__:<15} {validation:<7} {len(rows) / seconds:>12,.0f} строк/с '
+                f'{seconds:>8.2f} с  x{baseline / seconds:.1f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+
+from benchmarks.fixtures import create_sqlite_fixture, get_fixture_counts
+from converters import VALIDATION_MODES
+from load_data import TABLES_MODEL_MAP, MigrationOptions, load_from_sqlite
+from services import PostgresService
+from settings import settings
+
+"""
+Замер скорости переноса данных на синтетических базах SQLite профилей 01_schema_design/dataset_profiles.
+Для каждого профиля, способа записи и режима переноса таблицы Postgres очищаются, перенос выполняется
+в отдельном процессе, в файл результатов добавляется запуск со скоростью (строк/с), пиковым RSS
+и временем стадий по таблицам. Нужна локальная база Postgres со схемой content (см. settings).
+Запуск из каталога 03_sqlite_to_postgres: python -m benchmarks.bench_migration --profiles small medium
+"""
+
+# режимы переноса - параметры MigrationOptions сверх размера пачки и способа записи
+MODES = {
+    'sequential': {},
+    'parallel': {'workers': 3},
+    'pipeline': {'pipeline': True, 'converters': 2},
+    'partitioned': {'partitioned_tables': ('person_film_work',)},
+    'deferred': {'defer_indexes': True, 'workers': 3},
+}
+
+LOADERS = ('insert', 'copy')
+
+
+def get_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def get_peak_rss_kb() -> int:
+    """
+    Пиковый RSS процесса переноса и его дочерних процессов (пул process), в килобайтах
+    """
+
+    return max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    )
+
+
+def run_migration(sqllite_db: str, options: MigrationOptions) -> dict:
+    """
+    Перенос в отдельном процессе, чтобы пиковый RSS относился только к одному запуску
+    """
+
+    started = time.perf_counter()
+    reports = load_from_sqlite(postgres_dsn=settings.PG_DATABASE_URL, sqllite_db=sqllite_db, options=options)
+    return {
+        'seconds': time.perf_counter() - started,
+        'peak_rss_kb': get_peak_rss_kb(),
+        'tables': {table: asdict(report) for table, report in reports.items()},
+    }
+
+
+def truncate_tables():
+    with PostgresService(dsn=settings.PG_DATABASE_URL) as postgres:
+        postgres.truncate_tables(tables=list(TABLES_MODEL_MAP))
+        postgres.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк переноса данных из SQLite в PostgreSQL')
+    parser.add_argument('--profiles', nargs='+', default=['small'], help='профили данных (см. dataset_profiles)')
+    parser.add_argument('--loaders', nargs='+', choices=LOADERS, default=list(LOADERS), help='способы записи')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES), help='режимы переноса')
+    parser.add_argument(
+        '--validation', choices=VALIDATION_MODES, default=settings.MIGRATE_VALIDATION, help='способ проверки данных'
+    )
+    parser.add_argument('--size', type=int, default=settings.MIGRATE_DATA_SIZE, help='размер пачки записей')
+    parser.add_argument('--seed', type=int, default=0, help='seed генерации данных')
+    parser.add_argument('--fixtures-dir', default='benchmark_fixtures', help='каталог синтетических баз SQLite')
+    parser.add_argument('--results', default='benchmark_results.json', help='файл результатов в формате JSON')
+    args = parser.parse_args()
+
+    os.makedirs(args.fixtures_dir, exist_ok=True)
+    results = list()
+    for profile in args.profiles:
+        sqllite_db = os.path.join(args.fixtures_dir, f'{profile}_seed_{args.seed}.sqlite')
+        # база с тем же профилем и seed воспроизводится, поэтому создается один раз
+        if os.path.exists(sqllite_db):
+            counts = get_fixture_counts(path=sqllite_db)
+        else:
+            started = time.perf_counter()
+            counts = create_sqlite_fixture(path=sqllite_db, profile=profile, seed=args.seed)
+            print(f'База {sqllite_db} создана за {time.perf_counter() - started:.2f} с')
+        print(f'База {sqllite_db}: {counts}')
+
+        for loader in args.loaders:
+            for mode in args.modes:
+                truncate_tables()
+                options = MigrationOptions(size=args.size, loader=loader, validation=args.validation, **MODES[mode])
+                context = multiprocessing.get_context('spawn')
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    result = executor.submit(run_migration, sqllite_db, options).result()
+
+                rows = sum(counts.values())
+                result.update(
+                    profile=profile, loader=loader, mode=mode, rows=rows, rows_per_second=rows / result['seconds']
+                )
+                results.append(result)
+                print(
+                    f'{profile:<10} {loader:<7} {mode:<12} {result["rows_per_second"]:>12,.0f} строк/с '
+                    f'{result["seconds"]:>8.2f} с {result["peak_rss_kb"] / 1024:>8.1f} МБ'
+                )
+
+    # результаты добавляются к предыдущим запускам, чтобы сравнивать их между коммитами
+    runs = list()
+    if os.path.exists(args.results):
+        with open(args.results) as results_file:
+            runs = json.load(results_file)
+    runs.append(
+        {
+            'commit': get_commit(),
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'size': args.size,
+            'validation': args.validation,
+            'seed': args.seed,
+            'results': results,
+        }
+    )
+    with open(args.results, 'w') as results_file:
+        json.dump(runs, results_file, indent=2)
+    print(f'Результаты сохранены в {args.results}')
+
+
+if __name__ == '__main__':
+    main()
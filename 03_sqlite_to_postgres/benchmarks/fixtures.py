@@ -0,0 +1,65 @@
+import importlib.util
+import os
+import sqlite3
+import sys
+from contextlib import closing
+
+"""
+Синтетические базы SQLite в формате, который переносит load_data.py.
+Создаются выгрузкой профилей 01_schema_design/dataset_profiles.py: при одном профиле и seed база одна и та же
+"""
+
+SCHEMA_DESIGN_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), '01_schema_design'
+)
+
+TABLES = ('person', 'genre', 'film_work', 'genre_film_work', 'person_film_work')
+
+
+def load_schema_design_module(name: str):
+    """
+    Загрузка модуля 01_schema_design по пути файла. Модуль регистрируется под своим именем, чтобы работал импорт
+    from samplers import ... внутри dataset_profiles. Каталог 01_schema_design в путь поиска не добавляется,
+    поэтому его модули settings и services не подменяют одноименные модули 03_sqlite_to_postgres
+    """
+
+    path = os.path.join(SCHEMA_DESIGN_DIR, f'{name}.py')
+    module = sys.modules.get(name)
+    if module is not None:
+        if os.path.abspath(getattr(module, '__file__', '')) != path:
+            raise ImportError(f'Модуль {name} уже загружен не из {SCHEMA_DESIGN_DIR}', name=name)
+        return module
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
+
+
+def load_dataset_profiles():
+    # модули, которые импортирует dataset_profiles, загружаются до него
+    load_schema_design_module('generators')
+    load_schema_design_module('samplers')
+    return load_schema_design_module('dataset_profiles')
+
+
+def create_sqlite_fixture(path: str, profile, seed: int = 0) -> dict:
+    """
+    Создание базы SQLite по пути path для профиля (имя или DatasetProfile), возвращает количество записей по таблицам
+    """
+
+    dataset_profiles = load_dataset_profiles()
+    if isinstance(profile, str):
+        profile = dataset_profiles.PROFILES[profile]
+    return dataset_profiles.export_to_sqlite(profile=profile, seed=seed, path=path)
+
+
+def get_fixture_counts(path: str) -> dict:
+    with closing(sqlite3.connect(path)) as connection:
+        return {
+            table: connection.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0] for table in TABLES  # noqa: S608
+        }
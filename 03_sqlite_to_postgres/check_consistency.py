@@ -0,0 +1,209 @@
+import argparse
+import datetime
+import hashlib
+import json
+import logging
+import sys
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Type
+
+from converters import get_converter
+from load_data import TABLES_MODEL_MAP
+from pydantic.main import BaseModel
+from services import PostgresService, SQLiteService
+from settings import settings
+from sync import diff_rows, iterate_rows
+
+"""
+Скрипт проверки соответствия данных между SQLite и PostgreSQL.
+Обе базы читаются в порядке id крупными блоками, для каждого блока сравниваются контрольные суммы:
+сумма блока SQLite считается на клиенте, сумма того же диапазона id в Postgres - на сервере.
+Построчно сравниваются только блоки с несовпавшими суммами
+"""
+
+logger = logging.getLogger()
+
+NULL_TEXT = '\\N'
+FIELD_SEPARATOR = '\x1f'
+
+# текстовое представление значения поля в Postgres, совпадающее с format_value для значения того же типа
+SQL_TEXT_EXPRESSIONS = {
+    uuid.UUID: '{field}::text',
+    str: '{field}',
+    datetime.datetime: "to_char({field}, 'YYYY-MM-DD HH24:MI:SS')",
+    float: '{field}::text',
+}
+
+
+@dataclass
+class ConsistencyReport:
+    table: str
+    source_rows: int = 0
+    target_rows: int = 0
+    chunks: int = 0
+    mismatched_chunks: int = 0
+    differences_count: int = 0
+    differences: List[Dict[str, str]] = field(default_factory=list)
+    seconds: float = 0
+
+
+def format_value(value) -> str:
+    if value is None:
+        return NULL_TEXT
+    if isinstance(value, float):
+        text = repr(value)
+        return text[:-2] if text.endswith('.0') else text
+    return str(value)
+
+
+def get_chunk_digest(rows: Sequence[tuple]) -> str:
+    """
+    Контрольная сумма блока записей, приведенных к типам схемы
+    """
+
+    text = '\n'.join(FIELD_SEPARATOR.join(format_value(value) for value in row) for row in rows)
+    return hashlib.md5(text.encode()).hexdigest()  # noqa: S303
+
+
+def get_chunk_digest_query(model: Type[BaseModel], table: str, condition: str) -> str:
+    """
+    Запрос количества записей и контрольной суммы диапазона id, вычисляемой на стороне Postgres
+    """
+
+    values = [
+        f"COALESCE({SQL_TEXT_EXPRESSIONS[model_field.outer_type_].format(field=name)}, '{NULL_TEXT}')"
+        for name, model_field in model.__fields__.items()
+    ]
+    row_text = f"concat_ws(E'{FIELD_SEPARATOR}', {', '.join(values)})"
+    return (
+        f"SELECT COUNT(*), md5(COALESCE(string_agg({row_text}, E'\\n' ORDER BY id), '')) "
+        f'FROM content.{table} WHERE {condition}'
+    )
+
+
+def get_range_condition(first_id: Optional[uuid.UUID], last_id: Optional[uuid.UUID]) -> Tuple[str, tuple]:
+    """
+    Условие на диапазон id (first_id, last_id], отсутствующая граница не ограничивает диапазон
+    """
+
+    conditions = list()
+    params = list()
+    if first_id is not None:
+        conditions.append('id > %s')
+        params.append(first_id)
+    if last_id is not None:
+        conditions.append('id <= %s')
+        params.append(last_id)
+    return ' AND '.join(conditions) or 'TRUE', tuple(params)
+
+
+def iterate_chunks(
+    sqllite: SQLiteService, table: str, chunk_size: int
+) -> Iterator[Tuple[Optional[uuid.UUID], Optional[uuid.UUID], List[tuple]]]:
+    """
+    Блоки записей SQLite в порядке id вместе с диапазоном id (first_id, last_id], который они покрывают:
+    у первого блока нет нижней границы, у последнего - верхней, чтобы лишние записи Postgres тоже были проверены
+    """
+
+    model = TABLES_MODEL_MAP[table]
+    convert = get_converter(model)
+    fields = ', '.join([field for field in model.__fields__])
+
+    batches = sqllite.get_batches(query=f'SELECT {fields} FROM {table} ORDER BY id', size=chunk_size)
+    first_id = None
+    current = next(batches, None)
+    if current is None:
+        yield None, None, []
+        return
+    while current is not None:
+        rows = [convert(row) for row in current]
+        following = next(batches, None)
+        last_id = rows[-1][0] if following is not None else None
+        yield first_id, last_id, rows
+        first_id, current = last_id, following
+
+
+def check_table(
+    sqllite: SQLiteService, postgres: PostgresService, table: str, chunk_size: int, max_differences: int
+) -> ConsistencyReport:
+    started = time.perf_counter()
+    model = TABLES_MODEL_MAP[table]
+    convert = get_converter(model)
+    fields = ', '.join([field for field in model.__fields__])
+
+    report = ConsistencyReport(table=table)
+    logger.info(f'Проверка таблицы {table} начата')
+    for first_id, last_id, source_rows in iterate_chunks(sqllite=sqllite, table=table, chunk_size=chunk_size):
+        condition, params = get_range_condition(first_id=first_id, last_id=last_id)
+        target_count, target_digest = postgres.get_row(
+            query=get_chunk_digest_query(model=model, table=table, condition=condition), params=params
+        )
+        report.chunks += 1
+        report.source_rows += len(source_rows)
+        report.target_rows += target_count
+        if target_count == len(source_rows) and target_digest == get_chunk_digest(source_rows):
+            continue
+
+        report.mismatched_chunks += 1
+        target_rows = iterate_rows(
+            postgres.get_batches(
+                query=f'SELECT {fields} FROM content.{table} WHERE {condition} ORDER BY id',
+                size=chunk_size,
+                params=params,
+            ),
+            convert,
+        )
+        for kind, row in diff_rows(source=iter(source_rows), target=target_rows):
+            if kind == 'unchanged':
+                continue
+            report.differences_count += 1
+            if len(report.differences) < max_differences:
+                report.differences.append({'kind': kind, 'id': str(row[0])})
+
+    report.seconds = time.perf_counter() - started
+    logger.info(
+        f'Таблица {table}: {report.source_rows} записей в SQLite, {report.target_rows} в Postgres, '
+        f'блоков с расхождениями {report.mismatched_chunks} из {report.chunks}, '
+        f'расхождений {report.differences_count}, {report.seconds:.2f} с'
+    )
+    return report
+
+
+def check_consistency(
+    postgres_dsn: str, sqllite_db: str, chunk_size: int = 10000, max_differences: int = 1000
+) -> Dict[str, ConsistencyReport]:
+    """
+    Основной метод проверки: отчет по каждой таблице с количеством записей и списком расхождений
+    (insert - запись есть только в SQLite, delete - только в Postgres, update - записи отличаются),
+    в отчет попадает не более max_differences расхождений на таблицу
+    """
+
+    with SQLiteService(database=sqllite_db, read_only=True) as sqllite, PostgresService(dsn=postgres_dsn) as postgres:
+        return {
+            table: check_table(
+                sqllite=sqllite, postgres=postgres, table=table, chunk_size=chunk_size, max_differences=max_differences
+            )
+            for table in TABLES_MODEL_MAP
+        }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Проверка соответствия данных между SQLite и PostgreSQL')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='количество записей в проверяемом блоке')
+    parser.add_argument('--max-differences', type=int, default=1000, help='ограничение расхождений в отчете')
+    parser.add_argument('--report', default='consistency_report.json', help='файл отчета в формате JSON')
+    args = parser.parse_args()
+
+    logger.info('Работа скрипта начата')
+    reports = check_consistency(
+        postgres_dsn=settings.PG_DATABASE_URL,
+        sqllite_db=settings.SQLITE_FILENAME,
+        chunk_size=args.chunk_size,
+        max_differences=args.max_differences,
+    )
+    with open(args.report, 'w') as report_file:
+        json.dump({table: asdict(report) for table, report in reports.items()}, report_file, indent=2)
+    logger.info(f'Работа скрипта завершена, отчет сохранен в {args.report}')
+    sys.exit(1 if any(report.differences_count for report in reports.values()) else 0)
@@ -0,0 +1,95 @@
+import logging
+import sqlite3
+import threading
+from collections import defaultdict
+from contextlib import closing
+from typing import List
+
+"""
+Хранилище отметок о ходе переноса данных для возобновления прерванной миграции
+"""
+
+logger = logging.getLogger()
+
+
+class CheckpointStore:
+    """
+    Отметки о последней перенесенной записи (rowid) по ключам - таблицам или диапазонам rowid таблиц.
+    Хранятся в локальном файле SQLite, что позволяет обновлять их из нескольких процессов переноса.
+    Пачки одного ключа могут фиксироваться в Postgres не по порядку (несколько потоков записи),
+    поэтому отметка сдвигается только до последней пачки, все предыдущие пачки которой уже зафиксированы
+    """
+
+    def __init__(self, path: str = ':memory:'):
+        self.path = path
+        self.connection = None
+        self.lock = threading.Lock()
+        self.pending = defaultdict(dict)
+        self.next_sequence = defaultdict(int)
+
+    def __enter__(self):
+        self.connection = sqlite3.connect(database=self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS checkpoint (key TEXT PRIMARY KEY, last_rowid INTEGER)')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS deferred (position INTEGER PRIMARY KEY, kind TEXT, name TEXT, '
+            'table_name TEXT, definition TEXT)'
+        )
+        logger.debug(f'Открыто хранилище отметок переноса {self.path}')
+        return self
+
+    def __exit__(self, *exc):
+        if self.connection:
+            self.connection.close()
+
+    def get(self, key: str) -> int:
+        with self.lock, closing(self.connection.cursor()) as cursor:
+            cursor.execute('SELECT last_rowid FROM checkpoint WHERE key = ?', (key,))
+            row = cursor.fetchone()
+        return row[0] if row else 0
+
+    def reset(self):
+        with self.lock:
+            self.connection.execute('DELETE FROM checkpoint')
+
+    def get_deferred(self) -> List[tuple]:
+        """
+        Удаленные на время загрузки индексы и внешние ключи (kind, name, table, definition), которые еще не восстановлены.
+        Не очищаются при reset, чтобы определения не потерялись, если перенос прерван до восстановления
+        """
+
+        with self.lock, closing(self.connection.cursor()) as cursor:
+            cursor.execute('SELECT kind, name, table_name, definition FROM deferred ORDER BY position')
+            return cursor.fetchall()
+
+    def save_deferred(self, objects: List[tuple]):
+        with self.lock:
+            self.connection.execute('BEGIN')
+            self.connection.execute('DELETE FROM deferred')
+            self.connection.executemany(
+                'INSERT INTO deferred (kind, name, table_name, definition) VALUES (?, ?, ?, ?)', objects
+            )
+            self.connection.execute('COMMIT')
+
+    def clear_deferred(self):
+        with self.lock:
+            self.connection.execute('DELETE FROM deferred')
+
+    def commit_batch(self, key: str, sequence: int, last_rowid: int):
+        """
+        Отметка о фиксации пачки с порядковым номером sequence (с 0 в пределах ключа за запуск),
+        заканчивающейся записью last_rowid
+        """
+
+        with self.lock:
+            pending = self.pending[key]
+            pending[sequence] = last_rowid
+            if self.next_sequence[key] not in pending:
+                return
+            while self.next_sequence[key] in pending:
+                last_rowid = pending.pop(self.next_sequence[key])
+                self.next_sequence[key] += 1
+            self.connection.execute(
+                'INSERT INTO checkpoint (key, last_rowid) VALUES (?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET last_rowid = excluded.last_rowid',
+                (key, last_rowid),
+            )
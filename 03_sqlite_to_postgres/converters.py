@@ -0,0 +1,140 @@
+import datetime
+import itertools
+import uuid
+from functools import lru_cache
+from typing import Any, Callable, Sequence, Type
+
+from pydantic.main import BaseModel
+
+"""
+Быстрое преобразование строк выборки в кортежи типизированных значений без создания моделей pydantic.
+Для каждой схемы из schemas.py один раз генерируется функция, приводящая значения позиционно
+"""
+
+# способы проверки данных: all - pydantic для каждой записи, sample - pydantic для каждой sample_rate записи,
+# none - только быстрое преобразование
+VALIDATION_MODES = ('all', 'sample', 'none')
+
+
+class RowConversionError(ValueError):
+    def __init__(self, model: Type[BaseModel], field: str, value: Any, reason: Exception):
+        self.model = model
+        self.field = field
+        self.value = value
+        super().__init__(f'{model.__name__}.{field}: не удалось преобразовать значение {value!r} ({reason})')
+
+
+def coerce_uuid(value: Any) -> uuid.UUID:
+    if isinstance(value, uuid.UUID):
+        return value
+    return uuid.UUID(value)
+
+
+def coerce_datetime(value: Any) -> datetime.datetime:
+    if isinstance(value, datetime.datetime):
+        return value
+    if isinstance(value, datetime.date):
+        return datetime.datetime.combine(value, datetime.time())
+    if isinstance(value, str):
+        return datetime.datetime.fromisoformat(value)
+    raise TypeError(f'ожидается дата и время, получено {type(value).__name__}')
+
+
+def coerce_float(value: Any) -> float:
+    if value is None:
+        raise TypeError('ожидается число, получено None')
+    return float(value)
+
+
+def coerce_str(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if value is None:
+        raise TypeError('ожидается строка, получено None')
+    return str(value)
+
+
+COERCERS = {
+    uuid.UUID: coerce_uuid,
+    datetime.datetime: coerce_datetime,
+    float: coerce_float,
+    str: coerce_str,
+}
+
+
+def find_conversion_error(model: Type[BaseModel], row: Sequence) -> RowConversionError:
+    """
+    Поиск поля, значение которого не удалось преобразовать, для сообщения об ошибке
+    """
+
+    if len(row) != len(model.__fields__):
+        reason = ValueError(f'ожидается {len(model.__fields__)} значений, получено {len(row)}')
+        return RowConversionError(model=model, field='*', value=row, reason=reason)
+    for value, field in zip(row, model.__fields__.values()):
+        if value is None and not field.required:
+            continue
+        try:
+            COERCERS[field.outer_type_](value)
+        except Exception as exc:
+            return RowConversionError(model=model, field=field.name, value=value, reason=exc)
+    return RowConversionError(model=model, field='*', value=row, reason=ValueError('неизвестная ошибка'))
+
+
+@lru_cache(maxsize=None)
+def get_converter(model: Type[BaseModel]) -> Callable[[Sequence], tuple]:
+    """
+    Генерация функции преобразования строки выборки с полями модели в порядке model.__fields__
+    в кортеж значений тех же типов, что получились бы после проверки моделью pydantic
+    """
+
+    namespace = {'model': model, 'find_conversion_error': find_conversion_error}
+    values = list()
+    for i, field in enumerate(model.__fields__.values()):
+        namespace[f'coerce_{i}'] = COERCERS[field.outer_type_]
+        if field.required:
+            values.append(f'coerce_{i}(row[{i}])')
+        else:
+            values.append(f'(None if row[{i}] is None else coerce_{i}(row[{i}]))')
+
+    source = (
+        f'def convert_{model.__name__}(row):\n'
+        f'    try:\n'
+        f'        if len(row) != {len(values)}:\n'
+        f'            raise ValueError\n'
+        f'        return ({", ".join(values)},)\n'
+        f'    except Exception:\n'
+        f'        raise find_conversion_error(model, row) from None\n'
+    )
+    exec(compile(source, f'<converter {model.__name__}>', 'exec'), namespace)  # noqa: S102
+    return namespace[f'convert_{model.__name__}']
+
+
+def validate_row(model: Type[BaseModel], row: Sequence) -> tuple:
+    """
+    Проверка строки выборки моделью pydantic
+    """
+
+    checked_row = model(**{key: row[i] for i, key in enumerate(model.__fields__)})
+    return tuple(checked_row.dict().values())
+
+
+def get_row_processor(model: Type[BaseModel], validation: str = 'all', sample_rate: int = 1000):
+    """
+    Функция подготовки строки выборки к записи для выбранного способа проверки данных
+    """
+
+    if validation == 'all':
+        return lambda row: validate_row(model=model, row=row)
+
+    convert = get_converter(model)
+    if validation == 'none':
+        return convert
+
+    counter = itertools.count()
+
+    def convert_with_sample_validation(row: Sequence) -> tuple:
+        if next(counter) % sample_rate == 0:
+            validate_row(model=model, row=row)
+        return convert(row)
+
+    return convert_with_sample_validation
@@ -0,0 +1,124 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
+
+from services import PostgresService
+from settings import settings
+
+"""
+Отложенное создание вторичных индексов и внешних ключей при массовой загрузке.
+Перед загрузкой индексы (кроме первичных ключей, нужных для ON CONFLICT) и внешние ключи удаляются,
+после загрузки индексы строятся параллельно на отдельных соединениях, а внешние ключи добавляются
+без проверки (NOT VALID) и затем проверяются VALIDATE CONSTRAINT, тоже параллельно
+"""
+
+logger = logging.getLogger()
+
+INDEX = 'index'
+FOREIGN_KEY = 'foreign_key'
+
+# вторичные индексы таблиц схемы, не являющиеся первичными ключами и не обслуживающие ограничения
+INDEXES_QUERY = '''
+SELECT format('%%I.%%I', n.nspname, ic.relname), format('%%I.%%I', n.nspname, c.relname), pg_get_indexdef(i.indexrelid)
+FROM pg_index i
+JOIN pg_class ic ON ic.oid = i.indexrelid
+JOIN pg_class c ON c.oid = i.indrelid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE n.nspname = %s AND c.relname = ANY(%s) AND NOT i.indisprimary
+AND NOT EXISTS (SELECT 1 FROM pg_constraint con WHERE con.conindid = i.indexrelid)
+ORDER BY 1
+'''
+
+FOREIGN_KEYS_QUERY = '''
+SELECT format('%%I', con.conname), format('%%I.%%I', n.nspname, c.relname), pg_get_constraintdef(con.oid)
+FROM pg_constraint con
+JOIN pg_class c ON c.oid = con.conrelid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE n.nspname = %s AND c.relname = ANY(%s) AND con.contype = 'f'
+ORDER BY 1
+'''
+
+
+@dataclass
+class DeferredObject:
+    kind: str
+    name: str
+    table: str
+    definition: str
+
+    def get_drop_query(self) -> str:
+        if self.kind == INDEX:
+            return f'DROP INDEX IF EXISTS {self.name}'
+        return f'ALTER TABLE {self.table} DROP CONSTRAINT IF EXISTS {self.name}'
+
+    def get_create_query(self) -> str:
+        if self.kind == INDEX:
+            return self.definition
+        return f'ALTER TABLE {self.table} ADD CONSTRAINT {self.name} {self.definition} NOT VALID'
+
+
+def get_deferrable_objects(postgres: PostgresService, tables: Iterable[str]) -> List[DeferredObject]:
+    objects = list()
+    for kind, query in ((FOREIGN_KEY, FOREIGN_KEYS_QUERY), (INDEX, INDEXES_QUERY)):
+        for rows in postgres.get_batches(query=query, params=(settings.PG_DB_SCHEMA, list(tables))):
+            objects.extend(DeferredObject(kind, name, table, definition) for name, table, definition in rows)
+    return objects
+
+
+def drop_objects(postgres: PostgresService, objects: List[DeferredObject]) -> bool:
+    """
+    Удаление индексов и внешних ключей в одной транзакции: внешние ключи удаляются первыми.
+    При ошибке удаления транзакция откатывается с результатом False
+    """
+
+    for deferred in sorted(objects, key=lambda deferred: deferred.kind != FOREIGN_KEY):
+        if not postgres.execute(query=deferred.get_drop_query()):
+            postgres.connection.rollback()
+            logger.error(f'Не удалось удалить {deferred.kind} {deferred.name} таблицы {deferred.table}')
+            return False
+        logger.info(f'Удален {deferred.kind} {deferred.name} таблицы {deferred.table}')
+    return postgres.commit()
+
+
+def run_query(postgres_dsn: str, deferred: DeferredObject, query: str) -> float:
+    started = time.perf_counter()
+    with PostgresService(dsn=postgres_dsn) as postgres:
+        if not postgres.execute(query=query) or not postgres.commit():
+            raise RuntimeError(f'Не удалось восстановить {deferred.kind} {deferred.name} таблицы {deferred.table}')
+    return time.perf_counter() - started
+
+
+def rebuild_objects(postgres_dsn: str, objects: List[DeferredObject], workers: int) -> Dict[str, float]:
+    """
+    Восстановление индексов и внешних ключей после загрузки, возвращает время восстановления каждого объекта.
+    Индексы строятся параллельно, внешние ключи добавляются без проверки последовательно (это быстро)
+    и проверяются параллельно
+    """
+
+    indexes = [deferred for deferred in objects if deferred.kind == INDEX]
+    foreign_keys = [deferred for deferred in objects if deferred.kind == FOREIGN_KEY]
+    timings = dict()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        index_timings = executor.map(
+            lambda deferred: run_query(postgres_dsn, deferred, deferred.get_create_query()), indexes
+        )
+        timings.update(zip((deferred.name for deferred in indexes), index_timings))
+
+        for deferred in foreign_keys:
+            timings[deferred.name] = run_query(postgres_dsn, deferred, deferred.get_create_query())
+        validate_timings = executor.map(
+            lambda deferred: run_query(
+                postgres_dsn, deferred, f'ALTER TABLE {deferred.table} VALIDATE CONSTRAINT {deferred.name}'
+            ),
+            foreign_keys,
+        )
+        for deferred, seconds in zip(foreign_keys, validate_timings):
+            timings[deferred.name] += seconds
+
+    for deferred in objects:
+        logger.info(
+            f'Восстановлен {deferred.kind} {deferred.name} таблицы {deferred.table} за {timings[deferred.name]:.2f} с'
+        )
+    return timings
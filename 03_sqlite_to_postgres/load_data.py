@@ -1,5 +1,18 @@
+import argparse
 import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
+from checkpoint import CheckpointStore
+from converters import get_row_processor
+from indexes import DeferredObject, drop_objects, get_deferrable_objects, rebuild_objects
+from pipeline import STOP, cancel_on_error, close_stage, get_item, put_item
+from scheduler import run_with_dependencies
 from schemas import FilmWork, Genre, GenreFilmWork, Person, PersonFilmWork
 from services import PostgresService, SQLiteService
 from settings import settings
@@ -10,55 +23,488 @@ from settings import settings
 
 logger = logging.getLogger()
 
+TABLES_MODEL_MAP = {
+    'person': Person,
+    'genre': Genre,
+    'film_work': FilmWork,
+    'genre_film_work': GenreFilmWork,
+    'person_film_work': PersonFilmWork,
+}
 
-def load_from_sqlite(postgres_dsn: str, sqllite_db: str, size: int):
+# таблицы, перенос которых должен быть завершен до начала переноса зависимой таблицы
+TABLES_DEPENDENCIES = {
+    'genre_film_work': ('film_work', 'genre'),
+    'person_film_work': ('film_work', 'person'),
+}
+
+
+@dataclass
+class TableReport:
+    table: str
+    rows: int
+    seconds: float
+    # время работы стадий переноса (чтение, подготовка, запись), суммарно по потокам стадии
+    # и без учета ожидания в очередях
+    stages: Dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class MigrationOptions:
+    """
+    Параметры переноса данных
+
+    size - размер пачки записей
+    loader - способ записи данных: insert (execute_batch построчно) или copy (COPY через временную таблицу)
+    validation, sample_rate - способ проверки данных: all, sample или none (см. converters)
+    workers, pool - количество таблиц, переносимых одновременно, и тип пула для них: thread или process
+    partitioned_tables - таблицы, читаемые параллельно по диапазонам rowid в partitions потоков
+    с записью в writers потоков через очередь размером queue_size
+    pipeline - остальные таблицы переносятся конвейером: поток чтения, converters потоков подготовки
+    и writers потоков записи, связанные очередями размером queue_size
+    defer_indexes - вторичные индексы и внешние ключи удаляются на время загрузки и восстанавливаются после нее
+    в index_workers потоков (см. indexes)
+    checkpoint_file - файл SQLite с отметками о перенесенных пачках, resume - продолжить перенос с этих отметок
+    """
+
+    size: int = 1000
+    loader: str = 'insert'
+    validation: str = 'all'
+    sample_rate: int = 1000
+    workers: int = 1
+    pool: str = 'thread'
+    partitioned_tables: Tuple[str, ...] = ()
+    partitions: int = 4
+    writers: int = 4
+    queue_size: int = 8
+    pipeline: bool = False
+    converters: int = 1
+    defer_indexes: bool = False
+    index_workers: int = 4
+    checkpoint_file: str = ':memory:'
+    resume: bool = False
+
+
+def get_save_function(postgres: PostgresService, table: str, loader: str, upsert: bool = False) -> Callable[..., None]:
+    """
+    Метод записи пачки данных таблицы в Postgres для выбранного способа загрузки,
+    при upsert существующие записи обновляются, иначе пропускаются
+    """
+
+    model = TABLES_MODEL_MAP[table]
+
+    if upsert:
+        updates = ', '.join([f'{field} = EXCLUDED.{field}' for field in model.__fields__ if field != 'id'])
+        on_conflict = f'DO UPDATE SET {updates}'
+    else:
+        on_conflict = 'DO NOTHING'
+
+    if loader == 'copy':
+        return partial(postgres.copy_all_data, table=table, fields=list(model.__fields__), on_conflict=on_conflict)
+
+    # строка с полями целевой модели данных
+    fields = ', '.join([field for field in model.__fields__])
+
+    delimiters = ', '.join(['%s' for _ in range(len(model.__fields__))])
+    # запрос на вставку данных в postgresql
+    query_to_migrate = f'INSERT INTO content.{table} ({fields}) VALUES ({delimiters}) ON CONFLICT (id) {on_conflict}'
+    return partial(postgres.save_all_data, query=query_to_migrate)
+
+
+def read_rows(
+    sqllite: SQLiteService, table: str, size: int, after_rowid: int = 0, last_rowid: Optional[int] = None
+) -> Iterator[List[tuple]]:
+    """
+    Чтение данных таблицы из SQLite в порядке rowid пачками по size записей, начиная после записи after_rowid
+    и до записи last_rowid включительно. Первое значение каждой записи - ее rowid
+    """
+
+    model = TABLES_MODEL_MAP[table]
+
+    # строка с полями целевой модели данных
+    fields = ', '.join([field for field in model.__fields__])
+
+    # запрос на выборку данных из sqllite
+    conditions = [f'rowid > {after_rowid}']
+    if last_rowid is not None:
+        conditions.append(f'rowid <= {last_rowid}')
+    query_to_get = f'SELECT rowid, {fields} FROM {table} WHERE {" AND ".join(conditions)} ORDER BY rowid'
+
+    yield from sqllite.get_batches(query=query_to_get, size=size)
+
+
+def prepare_batch(rows: List[tuple], process_row: Callable[[tuple], tuple]) -> Tuple[int, List[tuple]]:
+    """
+    Подготовка прочитанной пачки к записи, возвращает rowid последней записи пачки и подготовленные кортежи
+    """
+
+    return rows[-1][0], [process_row(row[1:]) for row in rows]
+
+
+def read_batches(
+    sqllite: SQLiteService,
+    table: str,
+    size: int,
+    after_rowid: int = 0,
+    last_rowid: Optional[int] = None,
+    validation: str = 'all',
+    sample_rate: int = 1000,
+) -> Iterator[Tuple[int, List[tuple]]]:
+    """
+    Чтение данных таблицы пачками подготовленных к записи кортежей (см. read_rows и prepare_batch),
+    validation и sample_rate - способ проверки данных (см. converters)
+    """
+
+    process_row = get_row_processor(model=TABLES_MODEL_MAP[table], validation=validation, sample_rate=sample_rate)
+    for rows in read_rows(sqllite=sqllite, table=table, size=size, after_rowid=after_rowid, last_rowid=last_rowid):
+        yield prepare_batch(rows=rows, process_row=process_row)
+
+
+def save_batch(
+    postgres: PostgresService,
+    checkpoint: CheckpointStore,
+    save_data: Callable[..., None],
+    table: str,
+    key: str,
+    sequence: int,
+    last_rowid: int,
+    data: List[tuple],
+) -> int:
+    """
+    Запись и фиксация пачки с отметкой о ней в checkpoint, возвращает количество сохраненных записей
+    """
+
+    save_data(data=data)
+    if not postgres.commit():
+        logger.error(f'Пачка таблицы {table} до записи {last_rowid} не сохранена')
+        return 0
+    checkpoint.commit_batch(key=key, sequence=sequence, last_rowid=last_rowid)
+    logger.debug(f'Для таблицы {table} обработано {len(data)} записей')
+    return len(data)
+
+
+def log_start(checkpoint: CheckpointStore, table: str) -> int:
+    """
+    Сообщение о начале переноса таблицы, возвращает rowid записи, после которой перенос продолжается
+    """
+
+    after_rowid = checkpoint.get(key=table)
+    if after_rowid:
+        logger.info(f'Перенос данных таблицы {table} возобновлен после записи {after_rowid}')
+    else:
+        logger.info(f'Перенос данных таблицы {table} начат')
+    return after_rowid
+
+
+def migrate_table(
+    sqllite: SQLiteService,
+    postgres: PostgresService,
+    checkpoint: CheckpointStore,
+    table: str,
+    options: MigrationOptions,
+) -> TableReport:
+    """
+    Перенос данных одной таблицы через открытые соединения с фиксацией каждой пачки
+    и отметкой о ней в checkpoint
+    """
+
+    started = time.perf_counter()
+    report = TableReport(table=table, rows=0, seconds=0, stages={'read': 0, 'write': 0})
+    save_data = get_save_function(postgres=postgres, table=table, loader=options.loader)
+
+    batches = read_batches(
+        sqllite=sqllite,
+        table=table,
+        size=options.size,
+        after_rowid=log_start(checkpoint=checkpoint, table=table),
+        validation=options.validation,
+        sample_rate=options.sample_rate,
+    )
+    stage_started = time.perf_counter()
+    for sequence, (last_rowid, data) in enumerate(batches):
+        report.stages['read'] += time.perf_counter() - stage_started
+        stage_started = time.perf_counter()
+        report.rows += save_batch(
+            postgres=postgres,
+            checkpoint=checkpoint,
+            save_data=save_data,
+            table=table,
+            key=table,
+            sequence=sequence,
+            last_rowid=last_rowid,
+            data=data,
+        )
+        report.stages['write'] += time.perf_counter() - stage_started
+        stage_started = time.perf_counter()
+    logger.info(f'Перенос данных таблицы {table} завершен')
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def migrate_table_in_worker(postgres_dsn: str, sqllite_db: str, table: str, options: MigrationOptions) -> TableReport:
     """
-    Основной метод загрузки данных из SQLite в Postgres
+    Перенос данных одной таблицы на собственных соединениях, используется планировщиком в потоке или процессе
     """
 
-    tables_model_map = {
-        'person': Person,
-        'genre': Genre,
-        'film_work': FilmWork,
-        'genre_film_work': GenreFilmWork,
-        'person_film_work': PersonFilmWork,
-    }
+    with CheckpointStore(path=options.checkpoint_file) as checkpoint:
+        with SQLiteService(database=sqllite_db, size=options.size) as sqllite:
+            with PostgresService(dsn=postgres_dsn) as postgres:
+                return migrate_table(
+                    sqllite=sqllite, postgres=postgres, checkpoint=checkpoint, table=table, options=options
+                )
 
-    with SQLiteService(database=sqllite_db, size=size) as sqllite, PostgresService(dsn=postgres_dsn) as postgres:
-        for table in tables_model_map:
-            model = tables_model_map[table]
 
-            # строка с полями целевой модели данных
-            fields = ', '.join([field for field in model.__fields__])
+def migrate_table_pipelined(postgres_dsn: str, sqllite_db: str, table: str, options: MigrationOptions) -> TableReport:
+    """
+    Перенос данных одной таблицы конвейером из потока чтения SQLite, converters потоков подготовки данных
+    и writers потоков записи в Postgres, связанных очередями размером queue_size: чтение, подготовка
+    и запись разных пачек выполняются одновременно, а заполненная очередь приостанавливает предыдущую стадию
+    """
+
+    started = time.perf_counter()
+    report = TableReport(table=table, rows=0, seconds=0, stages={'read': 0, 'convert': 0, 'write': 0})
+    stages_lock = threading.Lock()
+    raw_batches = queue.Queue(maxsize=options.queue_size)
+    batches = queue.Queue(maxsize=options.queue_size)
+    cancelled = threading.Event()
 
-            # запрос на выборку данных из sqllite
-            query_to_get = f'SELECT {fields} FROM {table}'
+    def add_stage_time(stage: str, stage_started: float):
+        with stages_lock:
+            report.stages[stage] += time.perf_counter() - stage_started
 
-            delimiters = ', '.join(['%s' for _ in range(len(model.__fields__))])
-            # запрос на вставку данных в postgresql
-            query_to_migrate = (
-                f'INSERT INTO content.{table} ({fields}) ' f'VALUES ({delimiters}) ON CONFLICT (id) DO NOTHING'
+    def read(checkpoint: CheckpointStore):
+        with SQLiteService(database=sqllite_db, size=options.size, read_only=True) as sqllite:
+            rows_batches = read_rows(
+                sqllite=sqllite,
+                table=table,
+                size=options.size,
+                after_rowid=log_start(checkpoint=checkpoint, table=table),
             )
+            sequence = 0
+            stage_started = time.perf_counter()
+            while (rows := next(rows_batches, None)) is not None:
+                add_stage_time(stage='read', stage_started=stage_started)
+                put_item(items=raw_batches, item=(sequence, rows), cancelled=cancelled)
+                sequence += 1
+                stage_started = time.perf_counter()
 
-            data = list()
-            logger.info(f'Перенос данных таблицы {table} начат')
-            for row in sqllite.get_data(query=query_to_get):
-                checked_row = model(**{key: row[i] for i, key in enumerate(model.__fields__)})
-                data.append(checked_row)
-                if (saved_rows := len(data)) == size:
-                    postgres.save_all_data(data=data, query=query_to_migrate)
-                    logger.debug(f'Для таблицы {table} обработано {saved_rows} записей')
-                    data = list()
-            else:
-                if saved_rows := len(data):
-                    postgres.save_all_data(data=data, query=query_to_migrate)
-                    logger.debug(f'Для таблицы {table} обработано {saved_rows} записей')
-            logger.info(f'Перенос данных таблицы {table} завершен')
+    def convert():
+        process_row = get_row_processor(
+            model=TABLES_MODEL_MAP[table], validation=options.validation, sample_rate=options.sample_rate
+        )
+        while (item := get_item(items=raw_batches, cancelled=cancelled)) is not STOP:
+            stage_started = time.perf_counter()
+            sequence, rows = item
+            last_rowid, data = prepare_batch(rows=rows, process_row=process_row)
+            add_stage_time(stage='convert', stage_started=stage_started)
+            put_item(items=batches, item=(sequence, last_rowid, data), cancelled=cancelled)
+
+    def write(checkpoint: CheckpointStore) -> int:
+        rows = 0
+        with PostgresService(dsn=postgres_dsn) as postgres:
+            save_data = get_save_function(postgres=postgres, table=table, loader=options.loader)
+            while (item := get_item(items=batches, cancelled=cancelled)) is not STOP:
+                stage_started = time.perf_counter()
+                sequence, last_rowid, data = item
+                rows += save_batch(
+                    postgres=postgres,
+                    checkpoint=checkpoint,
+                    save_data=save_data,
+                    table=table,
+                    key=table,
+                    sequence=sequence,
+                    last_rowid=last_rowid,
+                    data=data,
+                )
+                add_stage_time(stage='write', stage_started=stage_started)
+        return rows
+
+    with CheckpointStore(path=options.checkpoint_file) as checkpoint:
+        with ThreadPoolExecutor(max_workers=1 + options.converters + options.writers) as executor:
+            writer_futures = [
+                executor.submit(cancel_on_error(write, cancelled), checkpoint) for _ in range(options.writers)
+            ]
+            converter_futures = [
+                executor.submit(cancel_on_error(convert, cancelled)) for _ in range(options.converters)
+            ]
+            reader_future = executor.submit(cancel_on_error(read, cancelled), checkpoint)
+            close_stage(futures=[reader_future], items=raw_batches, consumers=options.converters, cancelled=cancelled)
+            close_stage(futures=converter_futures, items=batches, consumers=options.writers, cancelled=cancelled)
+            report.rows = sum(future.result() for future in writer_futures)
+    logger.info(f'Перенос данных таблицы {table} завершен')
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def split_rowid_range(first_rowid: int, last_rowid: int, partitions: int) -> List[Tuple[int, int]]:
+    """
+    Разбиение диапазона rowid на не более чем partitions непересекающихся диапазонов (границы включительно)
+    """
+
+    step = -(-(last_rowid - first_rowid + 1) // partitions)
+    return [(start, min(start + step - 1, last_rowid)) for start in range(first_rowid, last_rowid + 1, step)]
+
+
+def migrate_table_partitioned(postgres_dsn: str, sqllite_db: str, table: str, options: MigrationOptions) -> TableReport:
+    """
+    Перенос данных одной таблицы с параллельным чтением: таблица делится на диапазоны rowid,
+    каждый диапазон читается в своем потоке на отдельном соединении SQLite только для чтения,
+    пачки данных через ограниченную очередь передаются общему пулу потоков записи.
+    Отметки о переносе ведутся для каждого диапазона отдельно
+    """
+
+    started = time.perf_counter()
+    with SQLiteService(database=sqllite_db, size=options.size, read_only=True) as sqllite:
+        first_rowid, last_rowid = sqllite.get_rowid_bounds(table_name=table)
+    if first_rowid is None:
+        return TableReport(table=table, rows=0, seconds=time.perf_counter() - started)
+
+    ranges = split_rowid_range(first_rowid=first_rowid, last_rowid=last_rowid, partitions=options.partitions)
+    batches = queue.Queue(maxsize=options.queue_size)
+    cancelled = threading.Event()
+
+    def read_partition(checkpoint: CheckpointStore, first: int, last: int):
+        key = f'{table}:{first}-{last}'
+        with SQLiteService(database=sqllite_db, size=options.size, read_only=True) as partition_sqllite:
+            partition_batches = read_batches(
+                sqllite=partition_sqllite,
+                table=table,
+                size=options.size,
+                after_rowid=max(checkpoint.get(key=key), first - 1),
+                last_rowid=last,
+                validation=options.validation,
+                sample_rate=options.sample_rate,
+            )
+            for sequence, (batch_last_rowid, data) in enumerate(partition_batches):
+                put_item(items=batches, item=(key, sequence, batch_last_rowid, data), cancelled=cancelled)
+
+    def write_batches(checkpoint: CheckpointStore) -> int:
+        rows = 0
+        with PostgresService(dsn=postgres_dsn) as postgres:
+            save_data = get_save_function(postgres=postgres, table=table, loader=options.loader)
+            while (batch := get_item(items=batches, cancelled=cancelled)) is not STOP:
+                key, sequence, batch_last_rowid, data = batch
+                rows += save_batch(
+                    postgres=postgres,
+                    checkpoint=checkpoint,
+                    save_data=save_data,
+                    table=table,
+                    key=key,
+                    sequence=sequence,
+                    last_rowid=batch_last_rowid,
+                    data=data,
+                )
+        return rows
+
+    logger.info(
+        f'Перенос данных таблицы {table} в {len(ranges)} потоков чтения и {options.writers} потоков записи начат'
+    )
+    with CheckpointStore(path=options.checkpoint_file) as checkpoint:
+        with ThreadPoolExecutor(max_workers=len(ranges) + options.writers) as executor:
+            writer_futures = [
+                executor.submit(cancel_on_error(write_batches, cancelled), checkpoint) for _ in range(options.writers)
+            ]
+            reader_futures = [
+                executor.submit(cancel_on_error(read_partition, cancelled), checkpoint, first, last)
+                for first, last in ranges
+            ]
+            close_stage(futures=reader_futures, items=batches, consumers=options.writers, cancelled=cancelled)
+            rows = sum(future.result() for future in writer_futures)
+    logger.info(f'Перенос данных таблицы {table} завершен')
+    return TableReport(table=table, rows=rows, seconds=time.perf_counter() - started)
+
+
+def drop_deferred_objects(postgres_dsn: str, checkpoint: CheckpointStore) -> List[DeferredObject]:
+    """
+    Удаление вторичных индексов и внешних ключей перед загрузкой. Их определения сохраняются в checkpoint
+    до удаления, а если там остались определения прерванного переноса, используются они
+    """
+
+    objects = [DeferredObject(*saved) for saved in checkpoint.get_deferred()]
+    with PostgresService(dsn=postgres_dsn) as postgres:
+        if not objects:
+            objects = get_deferrable_objects(postgres=postgres, tables=TABLES_MODEL_MAP)
+            checkpoint.save_deferred(
+                [(deferred.kind, deferred.name, deferred.table, deferred.definition) for deferred in objects]
+            )
+        if not drop_objects(postgres=postgres, objects=objects):
+            raise RuntimeError('Не удалось удалить индексы и внешние ключи перед загрузкой')
+    return objects
+
+
+def load_from_sqlite(postgres_dsn: str, sqllite_db: str, options: MigrationOptions) -> Dict[str, TableReport]:
+    """
+    Основной метод загрузки данных из SQLite в Postgres.
+    Каждая таблица переносится на своих соединениях с учетом TABLES_DEPENDENCIES,
+    при defer_indexes зависимостей нет: внешние ключи удаляются на время загрузки и восстанавливаются после нее
+    """
+
+    deferred_objects = list()
+    dependencies = TABLES_DEPENDENCIES
+    with CheckpointStore(path=options.checkpoint_file) as checkpoint:
+        if not options.resume:
+            checkpoint.reset()
+        if options.defer_indexes:
+            deferred_objects = drop_deferred_objects(postgres_dsn=postgres_dsn, checkpoint=checkpoint)
+            dependencies = dict()
+
+    tasks = dict()
+    for table in TABLES_MODEL_MAP:
+        if table in options.partitioned_tables:
+            migrate = migrate_table_partitioned
+        elif options.pipeline:
+            migrate = migrate_table_pipelined
+        else:
+            migrate = migrate_table_in_worker
+        tasks[table] = partial(migrate, postgres_dsn=postgres_dsn, sqllite_db=sqllite_db, table=table, options=options)
+    started = time.perf_counter()
+    reports = run_with_dependencies(tasks=tasks, dependencies=dependencies, workers=options.workers, pool=options.pool)
+
+    if deferred_objects:
+        logger.info(f'Загрузка данных без индексов и внешних ключей заняла {time.perf_counter() - started:.2f} с')
+        rebuild_started = time.perf_counter()
+        timings = rebuild_objects(postgres_dsn=postgres_dsn, objects=deferred_objects, workers=options.index_workers)
+        with CheckpointStore(path=options.checkpoint_file) as checkpoint:
+            checkpoint.clear_deferred()
+        for deferred in deferred_objects:
+            stages = reports[deferred.table.split('.')[-1]].stages
+            stages['indexes'] = stages.get('indexes', 0) + timings[deferred.name]
+        logger.info(f'Индексы и внешние ключи восстановлены за {time.perf_counter() - rebuild_started:.2f} с')
+
+    for report in reports.values():
+        stages = ', '.join(f'{stage} {seconds:.2f} с' for stage, seconds in report.stages.items())
+        logger.info(
+            f'Таблица {report.table}: перенесено {report.rows} записей за {report.seconds:.2f} с'
+            + (f' ({stages})' if stages else '')
+        )
+    return reports
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Перенос данных из SQLite в PostgreSQL')
+    parser.add_argument('--resume', action='store_true', help='продолжить прерванный перенос с сохраненных отметок')
+    args = parser.parse_args()
+
     logger.info('Работа скрипта начата')
     load_from_sqlite(
-        postgres_dsn=settings.PG_DATABASE_URL, sqllite_db=settings.SQLITE_FILENAME, size=settings.MIGRATE_DATA_SIZE
+        postgres_dsn=settings.PG_DATABASE_URL,
+        sqllite_db=settings.SQLITE_FILENAME,
+        options=MigrationOptions(
+            size=settings.MIGRATE_DATA_SIZE,
+            loader=settings.MIGRATE_LOADER,
+            validation=settings.MIGRATE_VALIDATION,
+            sample_rate=settings.MIGRATE_VALIDATION_SAMPLE_RATE,
+            workers=settings.MIGRATE_WORKERS,
+            pool=settings.MIGRATE_POOL,
+            partitioned_tables=tuple(table for table in settings.MIGRATE_PARTITIONED_TABLES.split(',') if table),
+            partitions=settings.MIGRATE_PARTITIONS,
+            writers=settings.MIGRATE_WRITERS,
+            queue_size=settings.MIGRATE_QUEUE_SIZE,
+            pipeline=settings.MIGRATE_PIPELINE,
+            converters=settings.MIGRATE_CONVERTERS,
+            defer_indexes=settings.MIGRATE_DEFER_INDEXES,
+            index_workers=settings.MIGRATE_INDEX_WORKERS,
+            checkpoint_file=settings.MIGRATE_CHECKPOINT_FILE,
+            resume=args.resume,
+        ),
     )
     logger.info('Работа скрипта завершена')
@@ -0,0 +1,73 @@
+import queue
+import threading
+from concurrent.futures import Future
+from functools import wraps
+from typing import Any, Callable, Iterable
+
+"""
+Примитивы обмена данными между стадиями переноса, работающими в потоках и связанными ограниченными очередями
+"""
+
+# признак окончания данных в очереди
+STOP = object()
+
+# период проверки признака отмены при ожидании очереди, в секундах
+POLL_TIMEOUT = 0.1
+
+
+class PipelineCancelled(Exception):
+    pass
+
+
+def put_item(items: queue.Queue, item: Any, cancelled: threading.Event):
+    """
+    Запись в очередь с ожиданием свободного места, пока перенос не отменен другим потоком
+    """
+
+    while not cancelled.is_set():
+        try:
+            items.put(item, timeout=POLL_TIMEOUT)
+            return
+        except queue.Full:
+            continue
+    raise PipelineCancelled('Перенос данных отменен')
+
+
+def get_item(items: queue.Queue, cancelled: threading.Event) -> Any:
+    """
+    Чтение из очереди с ожиданием данных, пока перенос не отменен другим потоком
+    """
+
+    while not cancelled.is_set():
+        try:
+            return items.get(timeout=POLL_TIMEOUT)
+        except queue.Empty:
+            continue
+    raise PipelineCancelled('Перенос данных отменен')
+
+
+def cancel_on_error(func: Callable, cancelled: threading.Event) -> Callable:
+    """
+    Обертка функции потока стадии: ошибка в ней отменяет перенос во всех остальных потоках
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            cancelled.set()
+            raise
+
+    return wrapper
+
+
+def close_stage(futures: Iterable[Future], items: queue.Queue, consumers: int, cancelled: threading.Event):
+    """
+    Ожидание завершения потоков стадии и передача признака окончания данных каждому потоку следующей стадии
+    """
+
+    for future in futures:
+        future.result()
+    for _ in range(consumers):
+        put_item(items=items, item=STOP, cancelled=cancelled)
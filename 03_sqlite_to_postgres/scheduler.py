@@ -0,0 +1,49 @@
+import logging
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable
+
+"""
+Планировщик параллельного выполнения задач с учетом зависимостей между ними
+"""
+
+logger = logging.getLogger()
+
+POOL_EXECUTORS = {
+    'thread': ThreadPoolExecutor,
+    'process': ProcessPoolExecutor,
+}
+
+
+def run_with_dependencies(
+    tasks: Dict[str, Callable[[], Any]], dependencies: Dict[str, Iterable[str]], workers: int, pool: str = 'thread'
+) -> Dict[str, Any]:
+    """
+    Выполнение задач в пуле потоков или процессов.
+    Задача запускается, как только завершены все задачи, от которых она зависит,
+    зависимости на задачи, отсутствующие в tasks, считаются выполненными.
+    Для пула процессов задачи должны быть сериализуемы (функции модуля или functools.partial от них)
+
+    Возвращает словарь с результатами задач по их именам
+    """
+
+    results = dict()
+    pending = dict(tasks)
+    with POOL_EXECUTORS[pool](max_workers=workers) as executor:
+        running = dict()
+        while pending or running:
+            ready = [
+                name
+                for name in pending
+                if all(dependency in results or dependency not in tasks for dependency in dependencies.get(name, ()))
+            ]
+            for name in ready:
+                logger.debug(f'Задача {name} передана на выполнение')
+                running[executor.submit(pending.pop(name))] = name
+
+            if not running:
+                raise ValueError(f'Зависимости задач {", ".join(pending)} не могут быть разрешены')
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+    return results
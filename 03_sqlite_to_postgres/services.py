@@ -1,18 +1,30 @@
+import io
 import logging
 import sqlite3
+import uuid
 from contextlib import closing
 from typing import List
 
 import psycopg2
-from pydantic.main import BaseModel
+import psycopg2.extras
 from settings import settings
 
 logger = logging.getLogger()
 
 
+def prepare_copy_value(value) -> str:
+    """
+    Приведение значения к текстовому формату COPY с экранированием спецсимволов
+    """
+    if value is None:
+        return '\\N'
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
 class PostgresService:
-    def __init__(self, dsn: str):
+    def __init__(self, dsn: str, itersize: int = settings.PG_ITER_SIZE):
         self.dsn = dsn
+        self.itersize = itersize
         self.connection = None
 
     def __enter__(self):
@@ -27,22 +39,98 @@ class PostgresService:
             self.connection.commit()
             self.connection.close()
 
-    def save_all_data(self, data: List[BaseModel], query: str):
-        ready_data = [tuple(instance.dict().values()) for instance in data]
+    def commit(self) -> bool:
+        """
+        Фиксация транзакции, прерванная ошибкой транзакция откатывается с результатом False
+        """
+
+        if self.connection.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_INERROR:
+            self.connection.rollback()
+            return False
+        self.connection.commit()
+        return True
+
+    def save_all_data(self, data: List[tuple], query: str):
         with closing(self.connection.cursor()) as cursor:
             try:
-                psycopg2.extras.execute_batch(cur=cursor, sql=query, argslist=ready_data)
+                psycopg2.extras.execute_batch(cur=cursor, sql=query, argslist=data)
             except (psycopg2.IntegrityError, psycopg2.DatabaseError) as exc:
                 logger.exception(exc)
 
-    def get_data(self, query: str):
+    def copy_all_data(self, data: List[tuple], table: str, fields: List[str], on_conflict: str = 'DO NOTHING'):
+        """
+        Загрузка пачки записей через COPY во временную таблицу и слияние её с целевой,
+        ON CONFLICT при слиянии сохраняет идемпотентность повторных запусков
+        """
+        target_table = f'{settings.PG_DB_SCHEMA}.{table}'
+        staging_table = f'staging_{table}'
+        columns = ', '.join(fields)
+
+        buffer = io.StringIO()
+        for row in data:
+            buffer.write('\t'.join(prepare_copy_value(value) for value in row))
+            buffer.write('\n')
+        buffer.seek(0)
+
+        with closing(self.connection.cursor()) as cursor:
+            try:
+                cursor.execute(
+                    f'CREATE TEMP TABLE IF NOT EXISTS {staging_table} (LIKE {target_table} INCLUDING DEFAULTS)'
+                )
+                cursor.copy_expert(sql=f'COPY {staging_table} ({columns}) FROM STDIN', file=buffer)
+                cursor.execute(
+                    f'INSERT INTO {target_table} ({columns}) SELECT {columns} FROM {staging_table} '
+                    f'ON CONFLICT (id) {on_conflict}'
+                )
+                cursor.execute(f'TRUNCATE {staging_table}')
+            except (psycopg2.IntegrityError, psycopg2.DatabaseError) as exc:
+                logger.exception(exc)
+
+    def delete_data(self, table: str, ids: List[uuid.UUID]):
+        query = f'DELETE FROM {settings.PG_DB_SCHEMA}.{table} WHERE id = ANY(%s)'
+        with closing(self.connection.cursor()) as cursor:
+            try:
+                cursor.execute(query, (ids,))
+            except (psycopg2.IntegrityError, psycopg2.DatabaseError) as exc:
+                logger.exception(exc)
+
+    def execute(self, query: str, params: tuple = None) -> bool:
+        """
+        Выполнение команды без результата, ошибка записывается в лог с результатом False
+        """
+
+        with closing(self.connection.cursor()) as cursor:
+            try:
+                cursor.execute(query, params)
+                return True
+            except psycopg2.DatabaseError as exc:
+                logger.exception(exc)
+                return False
+
+    def truncate_tables(self, tables: List[str]):
+        query = f'TRUNCATE {", ".join(f"{settings.PG_DB_SCHEMA}.{table}" for table in tables)}'
         with closing(self.connection.cursor()) as cursor:
             try:
                 cursor.execute(query)
-                row = cursor.fetchone()
-                while row is not None:
-                    yield row
-                    row = cursor.fetchone()
+            except psycopg2.DatabaseError as exc:
+                logger.exception(exc)
+
+    def get_data(self, query: str):
+        for rows in self.get_batches(query=query):
+            yield from rows
+
+    def get_batches(self, query: str, size: int = None, params: tuple = None):
+        """
+        Чтение результата запроса пачками по size записей через именованный курсор на стороне сервера,
+        без загрузки всего результата в память клиента. Должно выполняться внутри транзакции
+        """
+
+        size = size or self.itersize
+        with closing(self.connection.cursor(name=f'batches_{uuid.uuid4().hex}')) as cursor:
+            try:
+                cursor.execute(query, params)
+                while rows := cursor.fetchmany(size):
+                    yield rows
             except psycopg2.DatabaseError as exc:
                 logger.exception(exc)
 
@@ -55,23 +143,27 @@ class PostgresService:
             except psycopg2.DatabaseError as exc:
                 logger.exception(exc)
 
-    def get_row(self, query: str):
+    def get_row(self, query: str, params: tuple = None):
         with closing(self.connection.cursor()) as cursor:
             try:
-                cursor.execute(query)
+                cursor.execute(query, params)
                 return cursor.fetchone()
             except psycopg2.DatabaseError as exc:
                 logger.exception(exc)
 
 
 class SQLiteService:
-    def __init__(self, database: str, size: int = 1000):
+    def __init__(self, database: str, size: int = 1000, read_only: bool = False):
         self.database = database
         self.size = size
+        self.read_only = read_only
         self.connection = None
 
     def __enter__(self):
-        self.connection = sqlite3.connect(database=self.database)
+        if self.read_only:
+            self.connection = sqlite3.connect(database=f'file:{self.database}?mode=ro', uri=True)
+        else:
+            self.connection = sqlite3.connect(database=self.database)
         logger.debug(f'Установлено соединение с базой данных с параметрами {self.database}')
         return self
 
@@ -81,13 +173,20 @@ class SQLiteService:
             self.connection.close()
 
     def get_data(self, query: str):
+        for rows in self.get_batches(query=query):
+            yield from rows
+
+    def get_batches(self, query: str, size: int = None):
+        """
+        Чтение результата запроса пачками по size записей (по умолчанию размер пачки сервиса)
+        """
+
         with closing(self.connection.cursor()) as cursor:
+            cursor.arraysize = size or self.size
             try:
                 cursor.execute(query)
-                row = cursor.fetchone()
-                while row is not None:
-                    yield row
-                    row = cursor.fetchone()
+                while rows := cursor.fetchmany():
+                    yield rows
             except sqlite3.DatabaseError as exc:
                 logger.exception(exc)
 
@@ -99,3 +198,12 @@ class SQLiteService:
                 return cursor.fetchone()
             except sqlite3.DatabaseError as exc:
                 logger.exception(exc)
+
+    def get_rowid_bounds(self, table_name: str):
+        query = f'SELECT MIN(rowid), MAX(rowid) FROM {table_name}'
+        with closing(self.connection.cursor()) as cursor:
+            try:
+                cursor.execute(query)
+                return cursor.fetchone()
+            except sqlite3.DatabaseError as exc:
+                logger.exception(exc)
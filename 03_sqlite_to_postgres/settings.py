@@ -2,6 +2,7 @@ import logging
 import os
 from typing import Optional
 
+from converters import VALIDATION_MODES
 from dotenv import load_dotenv
 from pydantic import BaseSettings, validator
 
@@ -18,10 +19,37 @@ class Settings(BaseSettings):
     PG_DB_PORT: int = os.environ.get('DB_PORT', 5432)
     PG_DATABASE_URL: Optional[str] = os.environ.get('DATABASE_URL')
     PG_DB_SCHEMA: str = os.environ.get('DB_SCHEMA', 'content')
+    # количество записей, получаемых за одно обращение к курсору на стороне сервера
+    PG_ITER_SIZE: int = os.environ.get('DB_ITER_SIZE', 2000)
 
     SQLITE_FILENAME: str = os.environ['SQLITE_FILENAME']
 
     MIGRATE_DATA_SIZE: int = os.environ.get('MIGRATE_DATA_SIZE', 1000)
+    # способ записи в Postgres: insert - execute_batch, copy - COPY через временную таблицу
+    MIGRATE_LOADER: str = os.environ.get('MIGRATE_LOADER', 'insert')
+    # проверка данных: all - pydantic для каждой записи, sample - для каждой MIGRATE_VALIDATION_SAMPLE_RATE записи,
+    # none - только быстрое преобразование типов
+    MIGRATE_VALIDATION: str = os.environ.get('MIGRATE_VALIDATION', 'all')
+    MIGRATE_VALIDATION_SAMPLE_RATE: int = os.environ.get('MIGRATE_VALIDATION_SAMPLE_RATE', 1000)
+    # количество таблиц, переносимых одновременно, и тип пула для них: thread или process
+    MIGRATE_WORKERS: int = os.environ.get('MIGRATE_WORKERS', 1)
+    MIGRATE_POOL: str = os.environ.get('MIGRATE_POOL', 'thread')
+    # таблицы через запятую, читаемые параллельно по диапазонам rowid, число диапазонов,
+    # потоков записи и размер очереди пачек между ними
+    MIGRATE_PARTITIONED_TABLES: str = os.environ.get('MIGRATE_PARTITIONED_TABLES', '')
+    MIGRATE_PARTITIONS: int = os.environ.get('MIGRATE_PARTITIONS', 4)
+    MIGRATE_WRITERS: int = os.environ.get('MIGRATE_WRITERS', 4)
+    MIGRATE_QUEUE_SIZE: int = os.environ.get('MIGRATE_QUEUE_SIZE', 8)
+    # конвейерный перенос остальных таблиц: чтение, подготовка и запись в отдельных потоках,
+    # MIGRATE_CONVERTERS - количество потоков подготовки данных
+    MIGRATE_PIPELINE: bool = os.environ.get('MIGRATE_PIPELINE', False)
+    MIGRATE_CONVERTERS: int = os.environ.get('MIGRATE_CONVERTERS', 1)
+    # удаление вторичных индексов и внешних ключей на время загрузки,
+    # MIGRATE_INDEX_WORKERS - количество потоков их восстановления
+    MIGRATE_DEFER_INDEXES: bool = os.environ.get('MIGRATE_DEFER_INDEXES', False)
+    MIGRATE_INDEX_WORKERS: int = os.environ.get('MIGRATE_INDEX_WORKERS', 4)
+    # файл с отметками о перенесенных пачках для возобновления переноса (load_data.py --resume)
+    MIGRATE_CHECKPOINT_FILE: str = os.environ.get('MIGRATE_CHECKPOINT_FILE', 'migration_state.sqlite')
     LOG_LEVEL: str = os.environ.get('LOG_LEVEL', 'INFO')
 
     @validator('PG_DATABASE_URL', pre=True, always=True)
@@ -32,6 +60,24 @@ class Settings(BaseSettings):
         )
         return database_url
 
+    @validator('MIGRATE_LOADER')
+    def check_MIGRATE_LOADER(cls, value):
+        if value not in ('insert', 'copy'):
+            raise ValueError(f'Неизвестный способ записи данных {value}')
+        return value
+
+    @validator('MIGRATE_VALIDATION')
+    def check_MIGRATE_VALIDATION(cls, value):
+        if value not in VALIDATION_MODES:
+            raise ValueError(f'Неизвестный способ проверки данных {value}')
+        return value
+
+    @validator('MIGRATE_POOL')
+    def check_MIGRATE_POOL(cls, value):
+        if value not in ('thread', 'process'):
+            raise ValueError(f'Неизвестный тип пула {value}')
+        return value
+
 
 settings = Settings()
 
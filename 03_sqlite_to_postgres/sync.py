@@ -0,0 +1,196 @@
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+from converters import get_converter
+from load_data import TABLES_DEPENDENCIES, TABLES_MODEL_MAP, get_save_function
+from services import PostgresService, SQLiteService
+from settings import settings
+
+"""
+Скрипт инкрементальной синхронизации данных из SQLite в PostgreSQL:
+переносятся только новые и измененные записи, удаляются записи, отсутствующие в SQLite.
+Записи пачки считаются перенесенными только после фиксации транзакции, id записей непрошедших пачек
+попадают в отчет (failed)
+"""
+
+logger = logging.getLogger()
+
+
+@dataclass
+class SyncReport:
+    table: str
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    seconds: float = 0
+    failed: List = field(default_factory=list)
+
+
+def iterate_rows(batches: Iterable[List[tuple]], convert) -> Iterator[tuple]:
+    for rows in batches:
+        for row in rows:
+            yield convert(row)
+
+
+def ensure_ordered(rows: Iterator[tuple]) -> Iterator[tuple]:
+    previous_id = None
+    for row in rows:
+        if previous_id is not None and row[0] <= previous_id:
+            raise ValueError(f'Записи не упорядочены по id: {row[0]} после {previous_id}')
+        previous_id = row[0]
+        yield row
+
+
+def diff_rows(source: Iterator[tuple], target: Iterator[tuple]) -> Iterator[Tuple[str, tuple]]:
+    """
+    Сравнение двух потоков записей, упорядоченных по id (первое значение записи), слиянием.
+    Возвращает пары из вида отличия (insert, update, delete или unchanged) и записи:
+    для insert и update - записи источника, для delete и unchanged - записи приемника
+    """
+
+    source = ensure_ordered(source)
+    target = ensure_ordered(target)
+    source_row = next(source, None)
+    target_row = next(target, None)
+    while source_row is not None or target_row is not None:
+        if target_row is None or (source_row is not None and source_row[0] < target_row[0]):
+            yield 'insert', source_row
+            source_row = next(source, None)
+        elif source_row is None or target_row[0] < source_row[0]:
+            yield 'delete', target_row
+            target_row = next(target, None)
+        else:
+            if source_row == target_row:
+                yield 'unchanged', target_row
+            else:
+                yield 'update', source_row
+            source_row = next(source, None)
+            target_row = next(target, None)
+
+
+def write_batch(writer: PostgresService, write: Callable[[], None], table: str, ids: List) -> bool:
+    """
+    Запись и фиксация пачки, при ошибке транзакция откатывается и id записей пачки попадают в лог
+    """
+
+    write()
+    if writer.commit():
+        return True
+    logger.error(f'Пачка таблицы {table} не сохранена, записи {ids[0]}..{ids[-1]} ({len(ids)} шт.) пропущены')
+    return False
+
+
+def delete_rows(writer: PostgresService, report: SyncReport, ids: List, size: int):
+    for i in range(0, len(ids), size):
+        batch = ids[i : i + size]
+        if write_batch(writer, lambda: writer.delete_data(table=report.table, ids=batch), report.table, batch):
+            report.deleted += len(batch)
+        else:
+            report.failed.extend(batch)
+
+
+def sync_table(
+    sqllite: SQLiteService, reader: PostgresService, writer: PostgresService, table: str, size: int, loader: str
+) -> Tuple[SyncReport, List]:
+    """
+    Перенос новых и измененных записей таблицы с фиксацией каждой пачки.
+    Возвращает отчет и id записей, подлежащих удалению: удаление выполняется отдельно,
+    после синхронизации всех таблиц, в порядке, обратном зависимостям.
+    Записи таблиц связей, на которые никто не ссылается, удаляются до вставок: связь, пересозданная в SQLite
+    с новым id, иначе нарушила бы уникальность пары (film_work_id, genre_id) или (film_work_id, person_id)
+    """
+
+    started = time.perf_counter()
+    model = TABLES_MODEL_MAP[table]
+    convert = get_converter(model)
+    save_data = get_save_function(postgres=writer, table=table, loader=loader, upsert=True)
+
+    # строка с полями целевой модели данных
+    fields = ', '.join([field for field in model.__fields__])
+
+    def get_diff() -> Iterator[Tuple[str, tuple]]:
+        source = iterate_rows(
+            sqllite.get_batches(query=f'SELECT {fields} FROM {table} ORDER BY id', size=size), convert
+        )
+        target = iterate_rows(
+            reader.get_batches(query=f'SELECT {fields} FROM content.{table} ORDER BY id', size=size), convert
+        )
+        return diff_rows(source=source, target=target)
+
+    report = SyncReport(table=table)
+    logger.info(f'Синхронизация таблицы {table} начата')
+    if table in TABLES_DEPENDENCIES:
+        delete_rows(writer, report, [row[0] for kind, row in get_diff() if kind == 'delete'], size)
+
+    data = list()
+    kinds = list()
+    ids_to_delete = list()
+
+    def flush():
+        if write_batch(writer, lambda: save_data(data=data), table, [row[0] for row in data]):
+            report.inserted += kinds.count('insert')
+            report.updated += kinds.count('update')
+        else:
+            report.failed.extend(row[0] for row in data)
+
+    for kind, row in get_diff():
+        if kind == 'unchanged':
+            report.unchanged += 1
+            continue
+        if kind == 'delete':
+            ids_to_delete.append(row[0])
+            continue
+
+        data.append(row)
+        kinds.append(kind)
+        if len(data) == size:
+            flush()
+            data = list()
+            kinds = list()
+    if data:
+        flush()
+
+    report.seconds = time.perf_counter() - started
+    return report, ids_to_delete
+
+
+def sync_from_sqlite(postgres_dsn: str, sqllite_db: str, size: int, loader: str = 'insert') -> Dict[str, SyncReport]:
+    """
+    Основной метод инкрементальной синхронизации: сначала вставки и обновления в порядке зависимостей таблиц,
+    затем удаления в обратном порядке, чтобы не нарушать внешние ключи
+    """
+
+    reports = dict()
+    deletes = dict()
+    with SQLiteService(database=sqllite_db, size=size, read_only=True) as sqllite:
+        with PostgresService(dsn=postgres_dsn) as reader, PostgresService(dsn=postgres_dsn) as writer:
+            for table in TABLES_MODEL_MAP:
+                reports[table], deletes[table] = sync_table(
+                    sqllite=sqllite, reader=reader, writer=writer, table=table, size=size, loader=loader
+                )
+
+            for table in reversed(list(TABLES_MODEL_MAP)):
+                delete_rows(writer, reports[table], deletes[table], size)
+
+    for report in reports.values():
+        logger.info(
+            f'Таблица {report.table}: добавлено {report.inserted}, обновлено {report.updated}, '
+            f'удалено {report.deleted}, без изменений {report.unchanged} записей за {report.seconds:.2f} с'
+        )
+        if report.failed:
+            logger.error(f'Таблица {report.table}: не синхронизировано {len(report.failed)} записей')
+    return reports
+
+
+if __name__ == '__main__':
+    logger.info('Работа скрипта начата')
+    sync_from_sqlite(
+        postgres_dsn=settings.PG_DATABASE_URL,
+        sqllite_db=settings.SQLITE_FILENAME,
+        size=settings.MIGRATE_DATA_SIZE,
+        loader=settings.MIGRATE_LOADER,
+    )
+    logger.info('Работа скрипта завершена')
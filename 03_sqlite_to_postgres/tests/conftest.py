@@ -0,0 +1,41 @@
+import os
+import uuid
+from contextlib import closing
+
+import psycopg2
+import pytest
+from psycopg2 import sql
+from settings import settings
+
+"""
+Временная база Postgres со схемой из 01_schema_design/schema.ddl для тестов записи данных,
+создается и удаляется на сервере из настроек (DB_*), пользователю нужно право CREATEDB
+"""
+
+SCHEMA_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '01_schema_design', 'schema.ddl'
+)
+
+
+def execute_autocommit(dsn: str, query):
+    with closing(psycopg2.connect(dsn=dsn)) as connection:
+        connection.autocommit = True
+        connection.set_client_encoding('UTF8')
+        with closing(connection.cursor()) as cursor:
+            cursor.execute(query)
+
+
+@pytest.fixture
+def postgres_dsn() -> str:
+    name = f'test_sync_{uuid.uuid4().hex[:8]}'
+    execute_autocommit(
+        settings.PG_DATABASE_URL,
+        sql.SQL("CREATE DATABASE {} ENCODING 'UTF8' TEMPLATE template0").format(sql.Identifier(name)),
+    )
+    dsn = f'{settings.PG_DATABASE_URL.rsplit("/", 1)[0]}/{name}'
+    try:
+        with open(SCHEMA_FILE) as schema_file:
+            execute_autocommit(dsn, schema_file.read())
+        yield dsn
+    finally:
+        execute_autocommit(settings.PG_DATABASE_URL, sql.SQL('DROP DATABASE {}').format(sql.Identifier(name)))
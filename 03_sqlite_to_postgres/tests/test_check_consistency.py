@@ -1,30 +1,27 @@
-import os
-
 import pytest
-from dotenv import load_dotenv
+from benchmarks.fixtures import create_sqlite_fixture, load_dataset_profiles
+from check_consistency import check_table
 from load_data import FilmWork, Genre, GenreFilmWork, Person, PersonFilmWork, PostgresService, SQLiteService
+from sync import sync_from_sqlite
 
 
-@pytest.fixture(autouse=True)
-def load_env():
-    dotenv_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '.env')
-    if os.path.exists(dotenv_path):
-        load_dotenv(dotenv_path)
+@pytest.fixture
+def sqllite_path(tmp_path) -> str:
+    path = str(tmp_path / 'source.sqlite')
+    profile = load_dataset_profiles().DatasetProfile(persons=20, genres=5, film_works=50, genres_per_film=2)
+    create_sqlite_fixture(path=path, profile=profile, seed=1)
+    return path
 
 
 @pytest.fixture
-def postgres_db(load_env):
-    postgres_dsn = (
-        f'postgresql://{os.environ["DB_USER"]}:{os.environ["DB_PASSWORD"]}@'
-        f'{os.environ["DB_HOST"]}:{os.environ.get("DB_PORT", 5432)}/{os.environ["DB_NAME"]}'
-    )
+def postgres_db(postgres_dsn, sqllite_path):
+    sync_from_sqlite(postgres_dsn=postgres_dsn, sqllite_db=sqllite_path, size=16)
     return PostgresService(dsn=postgres_dsn)
 
 
 @pytest.fixture
-def sqllite_db():
-    sqllite_db = f'../{os.environ["SQLITE_FILENAME"]}'
-    return SQLiteService(database=sqllite_db)
+def sqllite_db(sqllite_path):
+    return SQLiteService(database=sqllite_path)
 
 
 @pytest.fixture
@@ -60,17 +57,8 @@ def test_consistency_between_tables_detail(postgres_db, sqllite_db, db_table_mod
 
     with sqllite_db, postgres_db:
         for table in db_table_model_map:
-            model = db_table_model_map[table]
-
-            fields = ', '.join([field for field in model.__fields__])
-            query_to_get_sqllite = f'SELECT {fields} FROM {table}'
-
-            for sqllite_row in sqllite_db.get_data(query=query_to_get_sqllite):
-                sqllite_row_id = sqllite_row[0]
-                query_to_get_postgres = f"SELECT {fields} FROM {table} WHERE id = '{sqllite_row_id}'"
-                postgres_row = postgres_db.get_row(query=query_to_get_postgres)
-
-                sqllite_checked_row = model(**{key: sqllite_row[i] for i, key in enumerate(model.__fields__)})
-                postgresql_checked_row = model(**{key: postgres_row[i] for i, key in enumerate(model.__fields__)})
-
-                assert sqllite_checked_row == postgresql_checked_row
+            report = check_table(
+                sqllite=sqllite_db, postgres=postgres_db, table=table, chunk_size=10000, max_differences=10
+            )
+            assert report.source_rows == report.target_rows
+            assert not report.differences_count, report.differences
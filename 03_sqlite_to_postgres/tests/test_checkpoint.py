@@ -0,0 +1,20 @@
+from checkpoint import CheckpointStore
+
+
+def test_checkpoint_moves_only_over_contiguous_batches(tmp_path):
+    """
+    Тест сдвига отметки только до пачки, все предыдущие пачки которой зафиксированы
+    """
+
+    path = str(tmp_path / 'state.sqlite')
+    with CheckpointStore(path=path) as checkpoint:
+        checkpoint.commit_batch(key='film_work:1-300', sequence=1, last_rowid=200)
+        assert checkpoint.get(key='film_work:1-300') == 0
+
+        checkpoint.commit_batch(key='film_work:1-300', sequence=0, last_rowid=100)
+        assert checkpoint.get(key='film_work:1-300') == 200
+
+    with CheckpointStore(path=path) as checkpoint:
+        assert checkpoint.get(key='film_work:1-300') == 200
+        checkpoint.reset()
+        assert checkpoint.get(key='film_work:1-300') == 0
@@ -0,0 +1,49 @@
+import datetime
+import uuid
+
+import pytest
+from converters import RowConversionError, get_converter, get_row_processor, validate_row
+from schemas import FilmWork, Genre, PersonFilmWork
+
+FILM_WORK_ROWS = [
+    (str(uuid.uuid4()), 'Star Wars', 'Space opera', '1977-05-25 00:00:00', 8.6, 'movie'),
+    (str(uuid.uuid4()), 'Star Trek', None, None, None, 'tv_show'),
+    (uuid.uuid4(), 'Alien', '', datetime.datetime(1979, 5, 25), 8, 'movie'),
+]
+
+
+@pytest.mark.parametrize('row', FILM_WORK_ROWS)
+def test_converter_matches_pydantic(row):
+    """
+    Тест совпадения результата быстрого преобразования с результатом проверки моделью pydantic
+    """
+
+    assert get_converter(FilmWork)(row) == validate_row(model=FilmWork, row=row)
+
+
+def test_converter_is_generated_once_per_model():
+    assert get_converter(Genre) is get_converter(Genre)
+
+
+@pytest.mark.parametrize(
+    'row, field',
+    [
+        (('not-a-uuid', str(uuid.uuid4()), str(uuid.uuid4()), 'actor'), 'id'),
+        ((str(uuid.uuid4()), str(uuid.uuid4()), str(uuid.uuid4()), None), 'role'),
+        ((str(uuid.uuid4()), str(uuid.uuid4())), '*'),
+    ],
+)
+def test_converter_reports_invalid_field(row, field):
+    """
+    Тест сообщения об ошибке преобразования с указанием поля
+    """
+
+    with pytest.raises(RowConversionError) as exc_info:
+        get_converter(PersonFilmWork)(row)
+    assert exc_info.value.field == field
+
+
+@pytest.mark.parametrize('validation', ['all', 'sample', 'none'])
+def test_row_processor_modes(validation):
+    process_row = get_row_processor(model=FilmWork, validation=validation, sample_rate=2)
+    assert [process_row(row) for row in FILM_WORK_ROWS] == [get_converter(FilmWork)(row) for row in FILM_WORK_ROWS]
@@ -0,0 +1,22 @@
+import sqlite3
+from contextlib import closing
+
+from benchmarks.fixtures import TABLES, create_sqlite_fixture, load_dataset_profiles
+
+
+def dump_fixture(path: str) -> dict:
+    with closing(sqlite3.connect(path)) as connection:
+        return {table: connection.execute(f'SELECT * FROM {table} ORDER BY rowid').fetchall() for table in TABLES}
+
+
+def test_fixture_is_reproducible_with_seed(tmp_path):
+    """
+    Тест воспроизводимости синтетической базы SQLite при одинаковых профиле и seed
+    """
+
+    profile = load_dataset_profiles().DatasetProfile(persons=10, genres=15, film_works=20, genres_per_film=1)
+    paths = [str(tmp_path / f'fixture_{i}.sqlite') for i in range(2)]
+    counts = [create_sqlite_fixture(path=path, profile=profile, seed=1) for path in paths]
+
+    assert counts[0] == {'person': 10, 'genre': 15, 'film_work': 20, 'person_film_work': 20, 'genre_film_work': 20}
+    assert dump_fixture(paths[0]) == dump_fixture(paths[1])
@@ -0,0 +1,57 @@
+import pytest
+from indexes import FOREIGN_KEY, INDEX, DeferredObject, drop_objects, get_deferrable_objects
+from load_data import TABLES_MODEL_MAP
+from services import PostgresService
+
+
+def test_deferred_foreign_key_is_restored_without_validation():
+    """
+    Тест команд удаления и восстановления внешнего ключа: ключ добавляется NOT VALID и проверяется отдельно
+    """
+
+    deferred = DeferredObject(
+        kind=FOREIGN_KEY,
+        name='person_film_work_person_id_fkey',
+        table='content.person_film_work',
+        definition='FOREIGN KEY (person_id) REFERENCES content.person(id)',
+    )
+
+    assert deferred.get_drop_query() == (
+        'ALTER TABLE content.person_film_work DROP CONSTRAINT IF EXISTS person_film_work_person_id_fkey'
+    )
+    assert deferred.get_create_query() == (
+        'ALTER TABLE content.person_film_work ADD CONSTRAINT person_film_work_person_id_fkey '
+        'FOREIGN KEY (person_id) REFERENCES content.person(id) NOT VALID'
+    )
+
+
+def test_deferred_index_is_restored_from_its_definition():
+    definition = 'CREATE INDEX film_work_creation_date_idx ON content.film_work USING btree (creation_date)'
+    deferred = DeferredObject(
+        kind=INDEX, name='content.film_work_creation_date_idx', table='content.film_work', definition=definition
+    )
+
+    assert deferred.get_drop_query() == 'DROP INDEX IF EXISTS content.film_work_creation_date_idx'
+    assert deferred.get_create_query() == definition
+
+
+@pytest.mark.database_access
+def test_drop_objects_rolls_back_on_error(postgres_dsn, caplog):
+    """
+    Тест удаления объектов одной транзакцией: после ошибки удаления одного объекта остальные команды
+    не выполняются, удаление откатывается
+    """
+
+    missing = DeferredObject(
+        kind=INDEX, name='content.missing_idx', table='content.missing', definition='CREATE INDEX missing_idx'
+    )
+    missing_key = DeferredObject(
+        kind=FOREIGN_KEY, name='missing_fkey', table='content.missing', definition='FOREIGN KEY (id)'
+    )
+    with PostgresService(dsn=postgres_dsn) as postgres:
+        objects = get_deferrable_objects(postgres=postgres, tables=TABLES_MODEL_MAP)
+        assert not drop_objects(postgres=postgres, objects=[*objects, missing, missing_key])
+        assert 'current transaction is aborted' not in caplog.text
+        assert get_deferrable_objects(postgres=postgres, tables=TABLES_MODEL_MAP) == objects
+        assert drop_objects(postgres=postgres, objects=[*objects, missing])
+        assert get_deferrable_objects(postgres=postgres, tables=TABLES_MODEL_MAP) == []
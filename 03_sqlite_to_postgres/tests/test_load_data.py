@@ -0,0 +1,19 @@
+import pytest
+from load_data import split_rowid_range
+
+
+@pytest.mark.parametrize(
+    'first_rowid, last_rowid, partitions, expected',
+    [
+        (1, 10, 4, [(1, 3), (4, 6), (7, 9), (10, 10)]),
+        (1, 11, 4, [(1, 3), (4, 6), (7, 9), (10, 11)]),
+        (1, 2, 4, [(1, 1), (2, 2)]),
+        (5, 5, 3, [(5, 5)]),
+    ],
+)
+def test_split_rowid_range(first_rowid, last_rowid, partitions, expected):
+    """
+    Тест разбиения диапазона rowid на не более чем partitions непересекающихся диапазонов
+    """
+
+    assert split_rowid_range(first_rowid=first_rowid, last_rowid=last_rowid, partitions=partitions) == expected
@@ -0,0 +1,55 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pipeline import STOP, PipelineCancelled, cancel_on_error, close_stage, get_item, put_item
+
+
+def test_error_in_stage_cancels_waiting_stages():
+    """
+    Тест отмены конвейера: ошибка потока чтения освобождает поток, ожидающий данных в очереди
+    """
+
+    items = queue.Queue(maxsize=1)
+    cancelled = threading.Event()
+
+    def read():
+        raise ValueError('ошибка чтения')
+
+    def write():
+        while get_item(items=items, cancelled=cancelled) is not STOP:
+            pass
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        writer_future = executor.submit(cancel_on_error(write, cancelled))
+        reader_future = executor.submit(cancel_on_error(read, cancelled))
+        with pytest.raises(ValueError):
+            close_stage(futures=[reader_future], items=items, consumers=1, cancelled=cancelled)
+        with pytest.raises(PipelineCancelled):
+            writer_future.result()
+    assert cancelled.is_set()
+
+
+def test_close_stage_stops_every_consumer():
+    """
+    Тест передачи признака окончания данных каждому потоку следующей стадии
+    """
+
+    items = queue.Queue(maxsize=2)
+    cancelled = threading.Event()
+    received = list()
+
+    def consume():
+        while (item := get_item(items=items, cancelled=cancelled)) is not STOP:
+            received.append(item)
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        consumer_futures = [executor.submit(consume) for _ in range(2)]
+        producer_future = executor.submit(
+            lambda: [put_item(items=items, item=i, cancelled=cancelled) for i in range(10)]
+        )
+        close_stage(futures=[producer_future], items=items, consumers=2, cancelled=cancelled)
+        for future in consumer_futures:
+            future.result()
+    assert sorted(received) == list(range(10))
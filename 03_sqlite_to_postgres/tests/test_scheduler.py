@@ -0,0 +1,38 @@
+import threading
+
+import pytest
+from scheduler import run_with_dependencies
+
+
+def test_dependent_task_starts_after_its_dependencies():
+    """
+    Тест запуска зависимой задачи только после завершения всех задач, от которых она зависит
+    """
+
+    finished = list()
+    lock = threading.Lock()
+
+    def task(name):
+        with lock:
+            finished.append(name)
+        return name
+
+    tasks = {name: (lambda name=name: task(name)) for name in ('person', 'film_work', 'person_film_work')}
+    results = run_with_dependencies(
+        tasks=tasks, dependencies={'person_film_work': ('film_work', 'person')}, workers=3, pool='thread'
+    )
+
+    assert results == {name: name for name in tasks}
+    assert finished[-1] == 'person_film_work'
+
+
+def test_unresolvable_dependencies():
+    """
+    Тест ошибки при циклической зависимости задач
+    """
+
+    tasks = {'genre': lambda: None, 'film_work': lambda: None}
+    with pytest.raises(ValueError):
+        run_with_dependencies(
+            tasks=tasks, dependencies={'genre': ('film_work',), 'film_work': ('genre',)}, workers=2, pool='thread'
+        )
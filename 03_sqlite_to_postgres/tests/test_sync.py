@@ -0,0 +1,52 @@
+import sqlite3
+import uuid
+from contextlib import closing
+
+import pytest
+from benchmarks.fixtures import create_sqlite_fixture, load_dataset_profiles
+from services import PostgresService
+from sync import diff_rows, sync_from_sqlite
+
+
+def test_diff_rows():
+    """
+    Тест сравнения упорядоченных по id потоков записей источника и приемника
+    """
+
+    source = [(1, 'a'), (2, 'b'), (4, 'd'), (5, 'e')]
+    target = [(0, 'z'), (2, 'b'), (3, 'c'), (4, 'x')]
+
+    assert list(diff_rows(source=iter(source), target=iter(target))) == [
+        ('delete', (0, 'z')),
+        ('insert', (1, 'a')),
+        ('unchanged', (2, 'b')),
+        ('delete', (3, 'c')),
+        ('update', (4, 'd')),
+        ('insert', (5, 'e')),
+    ]
+
+
+@pytest.mark.database_access
+def test_sync_replaces_link_recreated_with_new_id(tmp_path, postgres_dsn):
+    """
+    Тест синхронизации связи, пересозданной в SQLite с новым id: старая связь удаляется до вставки новой,
+    иначе вставка нарушает уникальность пары (film_work_id, genre_id) и пачка не сохраняется
+    """
+
+    path = str(tmp_path / 'source.sqlite')
+    profile = load_dataset_profiles().DatasetProfile(persons=5, genres=3, film_works=10, genres_per_film=1)
+    create_sqlite_fixture(path=path, profile=profile, seed=1)
+    sync_from_sqlite(postgres_dsn=postgres_dsn, sqllite_db=path, size=4)
+
+    new_id = str(uuid.uuid4())
+    with closing(sqlite3.connect(path)) as connection:
+        (old_id,) = connection.execute('SELECT id FROM genre_film_work ORDER BY id LIMIT 1').fetchone()
+        connection.execute('UPDATE genre_film_work SET id = ? WHERE id = ?', (new_id, old_id))
+        connection.commit()
+    reports = sync_from_sqlite(postgres_dsn=postgres_dsn, sqllite_db=path, size=4)
+
+    report = reports['genre_film_work']
+    assert (report.inserted, report.deleted, report.failed) == (1, 1, [])
+    with PostgresService(dsn=postgres_dsn) as postgres:
+        assert postgres.get_row('SELECT id FROM content.genre_film_work WHERE id = %s', (new_id,)) is not None
+        assert postgres.get_count_for_table('content.genre_film_work') == (10,)